@@ -29,7 +29,9 @@ total_count=0
 non_empty_count=0
 
 # Loop through .err files
+declare -A seen
 for file in "$DIR"/*.err; do
+  seen["${file##*/}"]=1
   ((total_count++))
   if [ -s "$file" ]; then
     ((non_empty_count++))
@@ -39,8 +41,32 @@ for file in "$DIR"/*.err; do
   fi
 done
 
+# .err files packed by submit_nnlojet.sh (PACK_LOGS): sizes from the archive index, no extraction.
+# Same rule as logpack.log_members: a loose file wins over a packed one of the same name, and
+# the last archive wins over earlier ones (hence the reversed order).
+LOGPACK="$(dirname "$0")/../logpack.py"
+archives=()
+for archive in "$DIR"/*.zip; do
+  archives=("$archive" "${archives[@]}")
+done
+if [ ${#archives[@]} -gt 0 ]; then
+  while read -r size member; do
+    if [ -n "${seen[${member##*:}]}" ]; then
+      continue
+    fi
+    seen["${member##*:}"]=1
+    ((total_count++))
+    if [ "$size" -gt 0 ]; then
+      ((non_empty_count++))
+      if $PRINT; then
+        echo "$member"
+      fi
+    fi
+  done < <(python3 "$LOGPACK" list "${archives[@]}" --suffix .err)
+fi
+
 # Final summary
 echo
-echo "Total .err files checked in '$DIR': $total_count"
+echo "Total .err files checked in '$DIR' (loose and packed): $total_count"
 echo "Number of non-empty .err files: $non_empty_count"
 
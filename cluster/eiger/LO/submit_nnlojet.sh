@@ -3,18 +3,73 @@
 # === Configuration ===
 RUNCARD="epemZH2bb.run"  # Your NNLOJET runcard
 NAME="bbLO"              # Job label
+CHANNEL="LO"             # Channel label used for the eiger.profile overrides
 ACCOUNT="eth5f"          # CSCS group account
 EMAIL="scaletti@ethz.ch" # Replace with your ETH email
 TIME="1-00:00:00"        # Walltime
 NUM_NODES=2              # Number of sbatch jobs to launch (each is NUM_THREADS jobs)
 NUM_THREADS=256          # Eiger: 256 logical core per node
+OMP_THREADS=1            # OpenMP threads per NNLOJET run (NUM_THREADS x OMP_THREADS <= 256)
 PARTITION="normal"       # Partition to submit
 CONSTRAINT="mc"          # Ensure multicore node
 START_SEED=1             # First seed: can be different than 1
-MEMORY=1G                # Memory requirement per job
+MEMORY=1G                # Memory requirement per cpu (per run: MEMORY x OMP_THREADS)
+CPU_BIND="none"          # CPU binding: none, core, thread (see cpubind.sh)
+NUMA_POLICY="none"       # NUMA memory policy: none, local, interleave
+TELEMETRY=60             # Seconds between RSS/CPU samples of the runs (0 disables procsampler.py)
+QUOTA_CHECK=true         # Scale down NUM_NODES or defer the jobs when the quarter budget is short (quota.py)
+WATCHDOG=true            # Kill seeds with error blow-ups, stalls or runaway iterations and start spare seeds (watchdog.py)
+SPARE_SEED_OFFSET=1000000 # Spare seeds of a node: its seeds + SPARE_SEED_OFFSET
+PACK_LOGS=true           # Pack the per-seed logs of each node into logs/<NAME>_nod<ID>.zip at job end (logpack.py)
+CLEAR_CONVERGED=false    # Remove a <NAME>.converged marker of a previous campaign (converge.py) instead of refusing to submit
+TOOLS_DIR=".."           # Folder with cpubind.sh, procsampler.py, quota.py, logpack.py, watchdog.py and eiger.profile
 #DEPEND=5398786             # Dependence job id, if used add
 # "#SBATCH --dependency=afeterok:${DEPEND}" below
 
+# === Cluster profile (written by benchmark_collect.sh) ===
+# Per-channel entries, e.g. NUM_THREADS_RV=128, override the values above
+PROFILE="${TOOLS_DIR}/eiger.profile"
+if [ -f "${PROFILE}" ]; then
+  source "${PROFILE}"
+  for VAR in NUM_THREADS OMP_THREADS MEMORY CPU_BIND NUMA_POLICY; do
+    KEY="${VAR}_${CHANNEL}"
+    if [ -n "${!KEY+x}" ]; then
+      printf -v "$VAR" '%s' "${!KEY}"
+    fi
+  done
+fi
+
+# === CPU binding: embed cpubind.sh in the job script ===
+BIND_FUNCS=""
+PIN_CMD=""
+if [ "${CPU_BIND}" != "none" ] || [ "${NUMA_POLICY}" != "none" ]; then
+  BIND_FUNCS=$(cat "${TOOLS_DIR}/cpubind.sh") || exit 1
+  PIN_CMD="\$(cpubind_prefix ${CPU_BIND} ${NUMA_POLICY} \$i ${NUM_THREADS} ${OMP_THREADS}) "
+fi
+
+# === Converged marker (converge.py): node jobs would exit at once ===
+if [ -f "${NAME}.converged" ]; then
+  if [ "${CLEAR_CONVERGED}" == "true" ]; then
+    echo "Removing ${NAME}.converged of a previous campaign"
+    rm -f "${NAME}.converged"
+  else
+    echo "${NAME}.converged exists (converge.py): the node jobs would exit without running." >&2
+    echo "Remove it (rm ${NAME}.converged) or set CLEAR_CONVERGED=true to submit ${NAME} again." >&2
+    exit 1
+  fi
+fi
+
+# === Quota check: may lower NUM_NODES, or set DEFER_BEGIN when nothing fits ===
+DEFER_BEGIN=""
+if [ "${QUOTA_CHECK}" == "true" ]; then
+  QUOTA_VARS=$(python3 "${TOOLS_DIR}/quota.py" check --nodes "${NUM_NODES}" --time "${TIME}") || exit 1
+  eval "${QUOTA_VARS}"
+fi
+BEGIN_LINE=""
+if [ -n "${DEFER_BEGIN}" ]; then
+  BEGIN_LINE="#SBATCH --begin=${DEFER_BEGIN}"
+fi
+
 mkdir -p logs
 
 CURRENT_SEED=$START_SEED
@@ -24,6 +79,27 @@ for NODE_ID in $(seq 0 $((NUM_NODES - 1))); do
 
   SEED_THIS_JOB=$CURRENT_SEED
 
+  # Telemetry sampler running alongside the NNLOJET runs of this node
+  SAMPLER_CMD=""
+  if [ "${TELEMETRY}" != "0" ]; then
+    mkdir -p telemetry
+    SAMPLER_CMD="python3 ${TOOLS_DIR}/procsampler.py --label ${CHANNEL} --threads ${OMP_THREADS} --interval ${TELEMETRY} --output telemetry/${NAME}_nod${NODE_ID}.tsv &"
+  fi
+
+  # Watchdog of the NNLOJET runs of this node: a killed seed is marked in its .err
+  # file, its .out becomes .killed, its histograms go to rejected/ and a spare seed
+  # takes its cores (same CPU set and NUMA policy)
+  WATCHDOG_CMD=""
+  if [ "${WATCHDOG}" == "true" ]; then
+    WATCHDOG_CMD="python3 ${TOOLS_DIR}/watchdog.py --logs logs/${NAME}_nod${NODE_ID} --output logs/${NAME}_nod${NODE_ID}.watchdog --spare-seeds $((SEED_THIS_JOB + SPARE_SEED_OFFSET)) ${NUM_THREADS} --walltime ${TIME} --numa-policy ${NUMA_POLICY} &"
+  fi
+
+  # One archive per node job instead of two files per seed (read by check_err.sh and monitor.py)
+  PACK_CMD=""
+  if [ "${PACK_LOGS}" == "true" ]; then
+    PACK_CMD="python3 ${TOOLS_DIR}/logpack.py pack logs/${NAME}_nod${NODE_ID}.zip logs/${NAME}_nod${NODE_ID}_s*.out logs/${NAME}_nod${NODE_ID}_s*.err logs/${NAME}_nod${NODE_ID}_s*.killed --remove"
+  fi
+
   # === Single job start here ===
   sbatch <<EOF
 #!/bin/bash -l
@@ -34,29 +110,44 @@ for NODE_ID in $(seq 0 $((NUM_NODES - 1))); do
 #SBATCH --time=${TIME}
 #SBATCH --nodes=1
 #SBATCH --ntasks-per-node=${NUM_THREADS}
-#SBATCH --cpus-per-task=1
+#SBATCH --cpus-per-task=${OMP_THREADS}
 #SBATCH --partition=${PARTITION}
 #SBATCH --constraint=${CONSTRAINT}
 #SBATCH --output=logs/${NAME}_${NODE_ID}.out
 #SBATCH --error=logs/${NAME}_${NODE_ID}.err
 #SBATCH --mem-per-cpu=${MEMORY}
 #SBATCH --exclusive
+${BEGIN_LINE}
+
+# Label already converged (converge.py): leave the node to others
+if [ -f ${NAME}.converged ]; then
+  echo "${NAME}.converged found, node job ${NODE_ID} not needed"
+  exit 0
+fi
 
 export OMP_STACKSIZE=1G
-export OMP_NUM_THREADS=1
+export OMP_NUM_THREADS=${OMP_THREADS}
+
+${BIND_FUNCS}
+
+${SAMPLER_CMD}
 
 SEED=${SEED_THIS_JOB}
 for ((i=0; i<${NUM_THREADS}; i++)); do
     echo "Launching seed \$SEED"
-    NNLOJET -run ${RUNCARD} -iseed \$SEED > logs/${NAME}_nod${NODE_ID}_s\${SEED}.out 2> logs/${NAME}_nod${NODE_ID}_s\${SEED}.err &
+    ${PIN_CMD}NNLOJET -run ${RUNCARD} -iseed \$SEED > logs/${NAME}_nod${NODE_ID}_s\${SEED}.out 2> logs/${NAME}_nod${NODE_ID}_s\${SEED}.err &
     SEED=\$((SEED + 1))
 done
 
+${WATCHDOG_CMD}
+
 wait
 
+${PACK_CMD}
+
 EOF
 
-  echo "Submitted on the ${NODE_ID} node ${NUM_THREADS} NNLOJET runs (seeds ${CURRENT_SEED}–$((CURRENT_SEED + NUM_THREADS - 1)))."
+  echo "Submitted on the ${NODE_ID} node ${NUM_THREADS} NNLOJET runs (seeds ${CURRENT_SEED}–$((CURRENT_SEED + NUM_THREADS - 1)), ${OMP_THREADS} threads each, bind=${CPU_BIND}, numa=${NUMA_POLICY})."
   CURRENT_SEED=$((CURRENT_SEED + NUM_THREADS))
 
 done
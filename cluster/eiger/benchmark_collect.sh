@@ -0,0 +1,70 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+# Usage: ./benchmark_collect.sh [bench_dir] [profile]
+#
+# Reads <bench_dir>/<label>/results.tsv written by benchmark_nodes.sh, prints
+# the throughput table and writes the best configuration of every label
+# (highest events/s per node among the layouts that fit the node memory)
+# into the cluster profile read by submit_nnlojet.sh.
+
+BENCH_DIR="${1:-bench}"
+PROFILE="${2:-eiger.profile}"
+
+NODE_MEM_MB=250000       # Usable memory of an Eiger mc node (256 GB)
+MEM_SAFETY=1.3           # Headroom on the measured peak RSS (production grows histograms)
+
+if [ ! -d "$BENCH_DIR" ]; then
+  echo "Error: '$BENCH_DIR' is not a valid directory."
+  exit 1
+fi
+
+touch "$PROFILE"
+
+set_profile_kv() {
+  # set_profile_kv <file> <KEY> <value>
+  local f="$1" key="$2" val="$3"
+  if grep -qE "^${key}=" "$f"; then
+    sed -i -E "s|^${key}=.*$|${key}=${val}|" "$f"
+  else
+    printf '%s=%s\n' "$key" "$val" >> "$f"
+  fi
+}
+
+shopt -s nullglob
+for results in "$BENCH_DIR"/*/results.tsv; do
+  label=$(basename "$(dirname "$results")")
+
+  echo "==> ${label}"
+  awk -F'\t' '{ printf " %-6s %-7s %-8s %-7s %-11s %-9s %-11s %-13s %s\n", $1, $2, $3, $4, $5, $6, $7, $8, $9 }' "$results"
+
+  # Best layout whose processes fit in memory; mem-per-cpu rounded up to 100 MB
+  best=$(awk -F'\t' -v node=$NODE_MEM_MB -v safety=$MEM_SAFETY '
+    NR > 1 {
+      need = $9 * safety
+      if ($2 * need > node) next
+      if ($8 > best) {
+        best = $8
+        mem = int((need / $3 + 99) / 100) * 100
+        if (mem < 100) mem = 100
+        line = $2 " " $3 " " $4 " " $5 " " $8 " " mem
+      }
+    }
+    END { print line }' "$results")
+  if [ -z "$best" ]; then
+    echo "No completed configuration fits in ${NODE_MEM_MB} MB for ${label}, profile unchanged."
+    echo
+    continue
+  fi
+
+  read -r nprocs threads bind numa evps mem <<< "$best"
+  set_profile_kv "$PROFILE" "NUM_THREADS_${label}" "$nprocs"
+  set_profile_kv "$PROFILE" "OMP_THREADS_${label}" "$threads"
+  set_profile_kv "$PROFILE" "CPU_BIND_${label}" "$bind"
+  set_profile_kv "$PROFILE" "NUMA_POLICY_${label}" "$numa"
+  set_profile_kv "$PROFILE" "MEMORY_${label}" "${mem}M"
+  echo "Best: ${nprocs} processes x ${threads} threads, bind=${bind}, numa=${numa}, mem-per-cpu=${mem}M (${evps} events/s per node)"
+  echo
+done
+
+echo "Profile written to: ${PROFILE}"
@@ -0,0 +1,145 @@
+#!/usr/bin/env bash
+set -euo pipefail
+
+############################################
+#         >>>> EDIT HERE <<<<
+############################################
+
+# Channels (labels) to benchmark if none are specified on the CLI.
+# RRa / RRb use the split runcards <base>.a.run / <base>.b.run in RR/
+DEFAULT_LABELS=(R V VV RV RRa RRb)
+
+# Configurations scanned on each node (every combination is run)
+# Layouts are <processes per node>x<OpenMP threads per process>
+LAYOUTS=(64x1 128x1 192x1 256x1 64x2 128x2 32x4 16x8)
+BIND_STRATEGIES=(none core thread)    # See cpubind.sh
+NUMA_POLICIES=(none local)            # See cpubind.sh
+
+# Short production slice per process: BENCH_EVENTS[BENCH_ITER]
+BENCH_EVENTS=2000
+BENCH_ITER=2
+BENCH_SEED=900001                     # Far away from production seeds
+
+# SLURM settings for the benchmark jobs (one exclusive node per label)
+ACCOUNT="eth5f"
+TIME="04:00:00"
+PARTITION="normal"
+CONSTRAINT="mc"
+BENCH_DIR="bench"
+
+############################################
+
+usage() {
+  cat <<EOF
+Usage: $(basename "$0") <runcard_base> [labels...]
+
+Arguments:
+  runcard_base   Base name (e.g. 'myproc' -> myproc.run, or myproc.a.run for RRa)
+  labels...      Optional. Defaults to: ${DEFAULT_LABELS[*]}
+
+Run from the folder containing the channel directories, after the warmups.
+For each label this script:
+  - creates ${BENCH_DIR}/<label>/ with links to the channel warmup grids
+  - writes a runcard with production = ${BENCH_EVENTS}[${BENCH_ITER}]
+  - submits one exclusive node job that runs the production slice for every
+    layout (processes x threads) x binding x NUMA policy and records the
+    throughput and the peak RSS per process (/usr/bin/time) in
+    ${BENCH_DIR}/<label>/results.tsv
+
+Then use benchmark_collect.sh to write the best configuration that fits the
+node memory to eiger.profile.
+EOF
+}
+
+[[ ${1-} == "-h" || ${1-} == "--help" || $# -lt 1 ]] && { usage; exit 0; }
+
+RUNCARD_BASE="$1"
+shift || true
+
+LABELS=("$@")
+if [ ${#LABELS[@]} -eq 0 ]; then
+  LABELS=("${DEFAULT_LABELS[@]}")
+fi
+
+TOOLS_DIR="$(cd "$(dirname "$0")" && pwd)"
+BIND_FUNCS=$(cat "${TOOLS_DIR}/cpubind.sh")
+
+for label in "${LABELS[@]}"; do
+  chdir="${label%%[ab]}"
+  if [[ "$label" != "$chdir" ]]; then
+    runcard="${RUNCARD_BASE}.${label#"$chdir"}.run"
+  else
+    runcard="${RUNCARD_BASE}.run"
+  fi
+
+  if [ ! -f "${chdir}/${runcard}" ]; then
+    echo "Skipping ${label}: missing ${chdir}/${runcard}" >&2
+    continue
+  fi
+
+  workdir="${BENCH_DIR}/${label}"
+  mkdir -p "${workdir}/logs"
+
+  # Link everything produced by the warmup, but not runcards, logs and scripts
+  for f in "${chdir}"/*; do
+    case "$(basename "$f")" in
+      *.run|logs|submit_*|*.sh) continue ;;
+    esac
+    ln -sfn "$(cd "$(dirname "$f")" && pwd)/$(basename "$f")" "${workdir}/$(basename "$f")"
+  done
+
+  cp -f "${chdir}/${runcard}" "${workdir}/bench.run"
+  sed -i 's/\r$//' "${workdir}/bench.run"
+  sed -i -E "s|(^\s*production\s*=\s*).*$|\1${BENCH_EVENTS}[${BENCH_ITER}]|I" "${workdir}/bench.run"
+
+  printf "label\tnprocs\tthreads\tbind\tnuma\tseconds\tevents\tevents_per_s\tmax_rss_mb\n" > "${workdir}/results.tsv"
+
+  sbatch <<EOF
+#!/bin/bash -l
+#SBATCH --job-name=bench${label}
+#SBATCH --account=${ACCOUNT}
+#SBATCH --time=${TIME}
+#SBATCH --nodes=1
+#SBATCH --ntasks-per-node=256
+#SBATCH --cpus-per-task=1
+#SBATCH --partition=${PARTITION}
+#SBATCH --constraint=${CONSTRAINT}
+#SBATCH --output=${workdir}/bench.out
+#SBATCH --error=${workdir}/bench.err
+#SBATCH --exclusive
+
+export OMP_STACKSIZE=1G
+
+${BIND_FUNCS}
+
+cd ${workdir}
+SEED=${BENCH_SEED}
+for LAYOUT in ${LAYOUTS[*]}; do
+  NPROC=\${LAYOUT%x*}
+  NTHR=\${LAYOUT#*x}
+  export OMP_NUM_THREADS=\$NTHR
+  for BIND in ${BIND_STRATEGIES[*]}; do
+    for NUMA in ${NUMA_POLICIES[*]}; do
+      echo "Benchmark ${label}: \${NPROC} processes x \${NTHR} threads, bind=\${BIND}, numa=\${NUMA}"
+      rm -f logs/*.rss
+      START=\$(date +%s.%N)
+      for ((i=0; i<NPROC; i++)); do
+        \$(cpubind_prefix \$BIND \$NUMA \$i \$NPROC \$NTHR) /usr/bin/time -f %M -o logs/bench_s\${SEED}.rss \\
+          NNLOJET -run bench.run -iseed \$SEED > logs/bench_s\${SEED}.out 2> logs/bench_s\${SEED}.err &
+        SEED=\$((SEED + 1))
+      done
+      wait
+      END=\$(date +%s.%N)
+      RSS_KB=\$(cat logs/*.rss 2>/dev/null | awk '\$1 ~ /^[0-9]+\$/ && \$1 > m { m = \$1 } END { print m + 0 }')
+      awk -v l=${label} -v n=\$NPROC -v t=\$NTHR -v b=\$BIND -v m=\$NUMA -v t0=\$START -v t1=\$END \\
+          -v ev=$((BENCH_EVENTS * BENCH_ITER)) -v rss=\$RSS_KB 'BEGIN {
+        dt = t1 - t0
+        printf "%s\t%d\t%d\t%s\t%s\t%.2f\t%d\t%.2f\t%.1f\n", l, n, t, b, m, dt, n * ev, n * ev / dt, rss / 1024
+      }' >> results.tsv
+    done
+  done
+done
+EOF
+
+  echo "Submitted benchmark for ${label} (${#LAYOUTS[@]} layouts x ${#BIND_STRATEGIES[@]} bindings x ${#NUMA_POLICIES[@]} NUMA policies)."
+done
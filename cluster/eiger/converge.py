@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Convergence-driven early stopping of a NNLOJET production.
+
+Run from the process folder (like monitor.py), e.g. every 10 minutes:
+
+  converge.py --target 0.002                           report only
+  converge.py --target 0.002 --cancel --watch 600      stop converged labels
+  converge.py --target 0.002 --observable mH_all --bins 10 11 12 --bin-target 0.01
+
+For every job label (NAME of submit_nnlojet.sh) the seeds with at least
+--min-iterations iterations are combined (inverse-variance weights, as in
+monitor.py), from the loose or packed logs (logpack.py). The total cross
+section is the sum over the labels, its error the quadrature sum. A label is
+converged when its error is within its share of the target:
+
+  err_label <= target x |total| / sqrt(number of labels)
+
+so the total meets the target once every label does. With --observable the
+same rule applies to the chosen bins (data-line indices), combined from the
+per-seed histograms <channel>/*.<observable>.s<seed>.dat of the label (its
+seeds are those of its logs) and summed over the labels.
+
+A converged label gets a marker <channel>/<NAME>.converged: node jobs of
+submit_nnlojet.sh that start later exit at once. With --cancel its pending
+node jobs (<NAME><ID>) are also cancelled (scancel via slurmq.py), returning
+their node-hours to the quota. Running jobs are never touched. The marker
+stays until removed: submit_nnlojet.sh refuses to submit a NAME that has one,
+so delete it (rm <channel>/<NAME>.converged) or set CLEAR_CONVERGED=true there
+before a new campaign with the same NAME.
+"""
+
+import argparse
+import getpass
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+import logpack
+import quota
+import slurmq
+
+SEED_DAT_RE = re.compile(r"\.s(\d+)\.dat$")
+
+
+def find_channel_dirs():
+    return sorted(d for d in os.listdir(".") if os.path.isdir(os.path.join(d, "logs")))
+
+
+def combine(results):
+    """Inverse-variance combination of (value, error) pairs -> (value, error), or (None, None)."""
+    wsum, wval = 0.0, 0.0
+    for val, err in results:
+        if err:
+            w = 1.0 / err ** 2
+            wsum += w
+            wval += w * val
+    if not wsum:
+        return None, None
+    return wval / wsum, 1.0 / math.sqrt(wsum)
+
+
+def label_results(channel_dir, min_iterations):
+    """{label: {"seeds", "used", "val", "err", "seed_numbers"}} from the per-seed logs of a channel folder."""
+    seeds = defaultdict(list)
+    numbers = defaultdict(set)
+    for name, size, read in logpack.log_members(os.path.join(channel_dir, "logs"), ".out"):
+        m = logpack.LOG_RE.match(name)
+        if not m:
+            continue
+        numbers[m.group("name")].add(int(m.group("seed")))
+        try:
+            seeds[m.group("name")].append(logpack.seed_result(read(0)))
+        except OSError:
+            continue
+    labels = {}
+    for label, results in seeds.items():
+        used = [(val, err) for iterations, val, err in results if iterations >= min_iterations and val is not None]
+        val, err = combine(used)
+        labels[label] = {"seeds": len(results), "used": len(used), "val": val, "err": err,
+                         "seed_numbers": numbers[label]}
+    return labels
+
+
+def seed_histogram(path, bins):
+    """{bin: (tot_scale01, tot_scale01_Err)} of the chosen data lines of a per-seed .dat file."""
+    val_idx, err_idx = 3, 4
+    rows = []
+    with open(path) as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith("#labels:"):
+                names = [re.sub(r"\[\d+\]$", "", t) for t in stripped.split(":", 1)[1].split()]
+                if "tot_scale01" in names and "tot_scale01_Err" in names:
+                    val_idx, err_idx = names.index("tot_scale01"), names.index("tot_scale01_Err")
+            elif stripped and not stripped.startswith("#"):
+                rows.append(stripped.split())
+    return {b: (float(rows[b][val_idx]), float(rows[b][err_idx])) for b in bins if b < len(rows)}
+
+
+def seed_labels(paths, labels):
+    """{path: label} of per-seed histograms, from the seeds in the logs of each label.
+
+    A folder can hold several labels (RRa and RRb of SPLIT_RR). A seed used by
+    one label only gives the label; a seed shared by labels (same START_SEED)
+    is resolved by the run name prefix of the file: the label already seen
+    with that prefix, else the only candidate without a prefix yet. Files of
+    unknown or unresolved seeds are left out.
+    """
+    owners = defaultdict(list)
+    for label, r in labels.items():
+        for seed in r["seed_numbers"]:
+            owners[seed].append(label)
+    found, label_prefixes, shared = {}, defaultdict(set), []
+    for path in sorted(paths):
+        prefix = os.path.basename(path).split(".", 1)[0]
+        candidates = owners.get(int(SEED_DAT_RE.search(path).group(1)), [])
+        if len(candidates) == 1:
+            found[path] = candidates[0]
+            label_prefixes[candidates[0]].add(prefix)
+        elif candidates:
+            shared.append((path, prefix, candidates))
+    for path, prefix, candidates in shared:
+        match = [label for label in candidates if prefix in label_prefixes[label]] \
+            or [label for label in candidates if not label_prefixes[label]]
+        if len(match) == 1:
+            found[path] = match[0]
+            label_prefixes[match[0]].add(prefix)
+    return found
+
+
+def bin_results(channel_dir, observable, bins, labels):
+    """{label: {bin: (value, error)}}: the seeds of each label combined, from the per-seed histograms."""
+    paths = [p for p in glob.glob(os.path.join(channel_dir, f"*.{observable}.s*.dat")) if SEED_DAT_RE.search(p)]
+    per_bin = defaultdict(lambda: defaultdict(list))
+    for path, label in seed_labels(paths, labels).items():
+        try:
+            hist = seed_histogram(path, bins)
+        except (OSError, ValueError, IndexError):
+            continue   # file being written
+        for b, pair in hist.items():
+            per_bin[label][b].append(pair)
+    return {label: {b: combine(pairs) for b, pairs in label_bins.items()} for label, label_bins in per_bin.items()}
+
+
+def evaluate(dirs, args):
+    """Rows {dir, label, val, err, converged, bins} and the total (value, error)."""
+    rows = []
+    for d in dirs:
+        labels = label_results(d, args.min_iterations)
+        bins = bin_results(d, args.observable, args.bins, labels) if args.observable else {}
+        for label, r in sorted(labels.items()):
+            rows.append(dict(r, dir=d, label=label, bins=bins.get(label, {})))
+    have = [r for r in rows if r["val"] is not None]
+    total = sum(r["val"] for r in have) if have else None
+    total_err = math.sqrt(sum(r["err"] ** 2 for r in have)) if have else None
+
+    share = 1.0 / math.sqrt(len(rows)) if rows else 0.0
+    bin_totals = defaultdict(float)
+    for r in rows:
+        for b, (val, _) in r["bins"].items():
+            if val is not None:
+                bin_totals[b] += val
+    for r in rows:
+        ok = r["err"] is not None and total is not None and r["err"] <= args.target * abs(total) * share
+        if args.observable:
+            for b in args.bins:
+                val, err = r["bins"].get(b, (None, None))
+                ok = ok and err is not None and err <= args.bin_target * abs(bin_totals[b]) * share
+        r["converged"] = ok
+    return rows, total, total_err
+
+
+def pending_jobs(jobs, label):
+    """Pending node jobs <label><ID> of submit_nnlojet.sh."""
+    pattern = re.compile(re.escape(label) + r"\d+$")
+    return [j for j in jobs if j["state"] == "PENDING" and pattern.match(j["name"])]
+
+
+def write_marker(row, total, total_err, args):
+    path = os.path.join(row["dir"], f"{row['label']}.converged")
+    if os.path.isfile(path):
+        return False
+    with open(path, "w") as f:
+        json.dump({"label": row["label"], "time": time.strftime("%Y-%m-%d %H:%M:%S"), "seeds": row["used"],
+                   "val": row["val"], "err": row["err"], "total": total, "total_err": total_err,
+                   "target": args.target}, f, indent=1)
+    return True
+
+
+def step(dirs, args, query):
+    rows, total, total_err = evaluate(dirs, args)
+    jobs = []
+    if query is not None:
+        try:
+            jobs = slurmq.run(query.squeue(user=getpass.getuser()))
+        except (OSError, slurmq.SlurmError) as e:
+            print(f"Warning: squeue failed ({e}), pending jobs unknown")
+
+    print(f"{'label':<12} {'seeds':>6} {'used':>6} {'result':>13} {'error':>10} {'budget':>10} {'PD':>4} {'state':<10}")
+    freed = 0.0
+    for r in rows:
+        budget = args.target * abs(total) / math.sqrt(len(rows)) if total else None
+        pending = pending_jobs(jobs, r["label"])
+        state = "converged" if r["converged"] else "running"
+        if r["converged"]:
+            if write_marker(r, total, total_err, args):
+                print(f"  -> {r['dir']}/{r['label']}.converged written")
+            if args.cancel and pending:
+                try:
+                    slurmq.run(query.scancel([j["jobid"] for j in pending]))
+                except (OSError, slurmq.SlurmError) as e:
+                    print(f"Warning: scancel failed: {e}")
+                else:
+                    freed += sum(j["nodes"] * (quota.slurm_hours(j["time_limit"]) or 0) for j in pending)
+                    state = f"cancel {len(pending)}"
+        val_s = f"{r['val']:13.5E}" if r["val"] is not None else "-"
+        err_s = f"{r['err']:10.2E}" if r["err"] is not None else "-"
+        budget_s = f"{budget:10.2E}" if budget is not None else "-"
+        print(f"{r['label']:<12} {r['seeds']:>6} {r['used']:>6} {val_s:>13} {err_s:>10} {budget_s:>10} {len(pending):>4} {state:<10}")
+        for b in args.bins if args.observable else []:
+            val, err = r["bins"].get(b, (None, None))
+            rel = f"{100 * err / abs(val):6.2f}%" if val and err else "-"
+            print(f"   {args.observable}[{b}] {rel:>8}")
+
+    if total is not None:
+        print(f"\nTotal: {total:.5E} +- {total_err:.2E} ({100 * total_err / abs(total):.3f}%, target {100 * args.target:.3f}%)")
+    if freed:
+        print(f"Cancelled pending jobs: {freed:.0f} node-hours back to the quota")
+    return rows
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stop the NNLOJET production of a label once its share of the precision target is met")
+    parser.add_argument('dirs', nargs='*', help="Channel folders with a logs/ subfolder (default: all of them in the current folder)")
+    parser.add_argument('--target', type=float, required=True, help="Relative error target on the total cross section, e.g. 0.002")
+    parser.add_argument('--observable', help="Also require the target on bins of this observable (per-seed .dat files)")
+    parser.add_argument('--bins', type=int, nargs='+', default=[], help="Data-line indices of the bins to check")
+    parser.add_argument('--bin-target', type=float, help="Relative error target on each bin (default --target)")
+    parser.add_argument('--min-iterations', type=int, default=1, help="Seeds with fewer completed iterations are ignored (default 1)")
+    parser.add_argument('--cancel', action='store_true', help="Cancel the pending node jobs of converged labels")
+    parser.add_argument('--no-squeue', action='store_true', help="Do not query SLURM (markers only)")
+    parser.add_argument('--watch', type=float, default=0, help="Repeat every this many seconds (default: once)")
+    args = parser.parse_args(argv)
+    if args.observable and not args.bins:
+        parser.error("--observable needs --bins")
+    if args.bin_target is None:
+        args.bin_target = args.target
+
+    dirs = [d.rstrip("/") for d in args.dirs] or find_channel_dirs()
+    if not dirs:
+        sys.exit("No channel folder with a logs/ subfolder found")
+    query = None if args.no_squeue else slurmq.SlurmQuery()
+
+    while True:
+        print(f"[{time.strftime('%H:%M:%S')}]")
+        rows = step(dirs, args, query)
+        if not args.watch or (rows and all(r["converged"] for r in rows)):
+            break
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/bin/bash
+
+# Helper sourced by submit_nnlojet.sh and benchmark_nodes.sh.
+# Defines cpubind_prefix, which prints the numactl prefix that pins one
+# NNLOJET process on an Eiger node (empty output = no binding).
+#
+# Eiger node: 2 x AMD EPYC 7742 = 128 physical cores, SMT2 = 256 logical CPUs.
+# Logical CPUs c and c+128 are the two hardware threads of physical core c.
+
+EIGER_CORES=128     # Physical cores per node
+EIGER_SMT=2         # Hardware threads per core
+
+cpubind_prefix() {
+  # cpubind_prefix <bind> <numa> <index> <nprocs> [threads]
+  #   bind    : none   -> no pinning (let the kernel schedule)
+  #             core   -> <threads> physical cores per process (both hardware
+  #                       threads), processes spread evenly over the cores;
+  #                       falls back to thread when nprocs x threads exceeds
+  #                       the physical cores (processes would share cores)
+  #             thread -> <threads> hardware threads per process, filling both
+  #                       threads of a core before moving to the next one
+  #   numa    : none | local (--localalloc) | interleave (--interleave=all)
+  #   threads : OpenMP threads per process (default 1)
+  local bind="$1" numa="$2" idx="$3" nprocs="$4" threads="${5:-1}"
+  local ncpu=$((EIGER_CORES * EIGER_SMT))
+  local args=()
+  local start slot cpus="" t k
+
+  if [ "$bind" = "core" ] && [ $(( nprocs * threads )) -gt "$EIGER_CORES" ]; then
+    if [ "$idx" -eq 0 ]; then
+      echo "cpubind: ${nprocs}x${threads} exceeds ${EIGER_CORES} cores, using thread binding" >&2
+    fi
+    bind=thread
+  fi
+
+  case "$bind" in
+    none) ;;
+    core)
+      start=$(( idx * EIGER_CORES / nprocs ))
+      for ((k=0; k<threads; k++)); do
+        for ((t=0; t<EIGER_SMT; t++)); do
+          cpus+=",$(( (start + k) % EIGER_CORES + t * EIGER_CORES ))"
+        done
+      done
+      args+=("--physcpubind=${cpus#,}")
+      ;;
+    thread)
+      start=$(( idx * ncpu / nprocs ))
+      for ((k=0; k<threads; k++)); do
+        slot=$(( (start + k) % ncpu ))
+        cpus+=",$(( (slot % EIGER_SMT) * EIGER_CORES + slot / EIGER_SMT ))"
+      done
+      args+=("--physcpubind=${cpus#,}")
+      ;;
+    *)
+      echo "cpubind: unknown binding '${bind}' (use none, core, thread)" >&2
+      return 1
+      ;;
+  esac
+
+  case "$numa" in
+    none) ;;
+    local)      args+=("--localalloc") ;;
+    interleave) args+=("--interleave=all") ;;
+    *)
+      echo "cpubind: unknown NUMA policy '${numa}' (use none, local, interleave)" >&2
+      return 1
+      ;;
+  esac
+
+  if [ ${#args[@]} -gt 0 ]; then
+    echo "numactl ${args[*]}"
+  fi
+}
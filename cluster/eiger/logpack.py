@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Per-seed logs packed into one zip archive per node job.
+
+submit_nnlojet.sh ends every node job with (PACK_LOGS=true)
+
+  python3 logpack.py pack logs/<NAME>_nod<ID>.zip logs/<NAME>_nod<ID>_s*.out logs/<NAME>_nod<ID>_s*.err \
+      logs/<NAME>_nod<ID>_s*.killed --remove
+
+so a channel folder keeps one file per node instead of two per seed. The zip
+central directory is the member index: sizes are known without decompressing
+and a single log is read without extracting the others.
+
+  python3 logpack.py list logs/bbLO_nod0.zip [--suffix .err] [--nonempty]
+  python3 logpack.py cat logs/bbLO_nod0.zip bbLO_nod0_s17.out
+
+From Python (monitor.py, converge.py): for name, size, read in logpack.log_members(log_dir): ...
+covers loose log files and archive members alike; seed_result(read(0)) parses a log.
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import zipfile
+import zlib
+
+ARCHIVE_SUFFIX = ".zip"
+
+# === LOG FORMAT ===
+# Per-seed logs written by submit_nnlojet.sh: logs/<NAME>_nod<NODE>_s<SEED>.out
+# (watchdog.py renames the log of a killed seed to _s<SEED>.killed, which does not match)
+LOG_RE = re.compile(r"^(?P<name>.+)_nod(?P<node>\d+)_s(?P<seed>\d+)\.out$")
+# NNLOJET prints one block per VEGAS iteration; the accumulated result is the
+# last "integral = ... std. dev. = ..." pair printed in the log
+ITERATION_RE = re.compile(rb"iteration\s*[:=]?\s*(\d+)", re.IGNORECASE)
+RESULT_RE = re.compile(rb"integral\s*=\s*([-+0-9.EeDd]+).*?std\.?\s*dev\.?\s*=\s*([-+0-9.EeDd]+)", re.IGNORECASE)
+
+
+def to_float(token):
+    return float(token.replace(b"D", b"E").replace(b"d", b"e"))
+
+
+def seed_result(data):
+    """(iterations, integral, std. dev.) of a complete seed log; None values when no result yet."""
+    iterations = max((int(m.group(1)) for m in ITERATION_RE.finditer(data)), default=0)
+    results = RESULT_RE.findall(data)
+    if not results:
+        return iterations, None, None
+    return iterations, to_float(results[-1][0]), to_float(results[-1][1])
+
+
+def file_crc(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def pack(archive, files, remove=False):
+    """Add files (by base name) to archive; returns the number of files added.
+
+    The archive is written to a temporary file and renamed, so readers never
+    see a partial one. With remove, files are deleted once their archived copy
+    is verified (size and CRC).
+    """
+    files = [f for f in files if os.path.isfile(f)]
+    tmp = archive + ".tmp"
+    new_names = {os.path.basename(f) for f in files}
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as dst:
+        if os.path.isfile(archive):
+            # Job restarted: keep the members packed before
+            with zipfile.ZipFile(archive) as src:
+                for info in src.infolist():
+                    if info.filename not in new_names:
+                        dst.writestr(info, src.read(info))
+        for path in files:
+            dst.write(path, os.path.basename(path))
+    os.replace(tmp, archive)
+
+    if remove:
+        with zipfile.ZipFile(archive) as zf:
+            infos = {info.filename: info for info in zf.infolist()}
+        for path in files:
+            info = infos.get(os.path.basename(path))
+            if info and info.file_size == os.path.getsize(path) and info.CRC == file_crc(path):
+                os.remove(path)
+    return len(files)
+
+
+# archive -> ((size, mtime), [(name, size)]): a finished archive is indexed once per process
+_index_cache = {}
+
+
+def archive_members(archive, suffix=""):
+    """(name, size) of the members of archive ending with suffix, from the index only."""
+    st = os.stat(archive)
+    key = (st.st_size, st.st_mtime)
+    cached = _index_cache.get(archive)
+    if cached is None or cached[0] != key:
+        with zipfile.ZipFile(archive) as zf:
+            cached = _index_cache[archive] = (key, [(info.filename, info.file_size) for info in zf.infolist()])
+    return [(name, size) for name, size in cached[1] if name.endswith(suffix)]
+
+
+def read_member(archive, name, offset=0):
+    """Bytes of one member from offset on."""
+    with zipfile.ZipFile(archive) as zf:
+        with zf.open(name) as f:
+            data = f.read()
+    return data[offset:]
+
+
+def log_members(log_dir, suffix=""):
+    """(name, size, reader) for the loose logs and archive members of log_dir; reader(offset) -> bytes.
+
+    A loose file wins over an archive member of the same name (it is the newer one).
+    """
+    found = {}
+    for archive in sorted(glob.glob(os.path.join(log_dir, "*" + ARCHIVE_SUFFIX))):
+        try:
+            members = archive_members(archive, suffix)
+        except (OSError, zipfile.BadZipFile):
+            continue
+        for name, size in members:
+            found[name] = (size, lambda offset, a=archive, n=name: read_member(a, n, offset))
+    for dentry in os.scandir(log_dir):
+        if dentry.name.endswith(suffix) and not dentry.name.endswith(ARCHIVE_SUFFIX) and dentry.is_file():
+            try:
+                size = dentry.stat().st_size
+            except OSError:
+                continue
+            found[dentry.name] = (size, lambda offset, p=dentry.path: read_file(p, offset))
+    return [(name, size, reader) for name, (size, reader) in sorted(found.items())]
+
+
+def read_file(path, offset=0):
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read()
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack per-seed NNLOJET logs into a zip archive and read them from it")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("pack", help="Pack log files into an archive")
+    p.add_argument('archive', help="Archive file, e.g. logs/bbLO_nod0.zip")
+    p.add_argument('files', nargs='*', help="Log files (unmatched shell globs are ignored)")
+    p.add_argument('--remove', action='store_true', help="Delete the files once their archived copy is verified")
+
+    p = sub.add_parser("list", help="Print size and name of the members of archives")
+    p.add_argument('archives', nargs='+', help="Archive files")
+    p.add_argument('--suffix', default="", help="Only members ending with this, e.g. .err")
+    p.add_argument('--nonempty', action='store_true', help="Only non-empty members")
+
+    p = sub.add_parser("cat", help="Print one member")
+    p.add_argument('archive', help="Archive file")
+    p.add_argument('member', help="Member name, e.g. bbLO_nod0_s17.out")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        n = pack(args.archive, args.files, args.remove)
+        print(f"Packed {n} log(s) into {args.archive}")
+    elif args.command == "list":
+        for archive in args.archives:
+            for name, size in archive_members(archive, args.suffix):
+                if size or not args.nonempty:
+                    print(f"{size} {archive}:{name}")
+    else:
+        sys.stdout.buffer.write(read_member(args.archive, args.member))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+import argparse
+import getpass
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+import logpack
+import slurmq
+
+# --- Parse command-line arguments ---
+parser = argparse.ArgumentParser(description="Live progress of a NNLOJET production: iterations, current error and ETA per channel")
+parser.add_argument('dirs', nargs='*', help="Channel folders with a logs/ subfolder (default: all of them in the current folder)")
+parser.add_argument('--refresh', type=float, default=10, help="Seconds between two refreshes (default 10)")
+parser.add_argument('--once', action='store_true', help="Print the table once and exit")
+parser.add_argument('--state', help="JSON file to keep byte offsets and parsed results between invocations")
+parser.add_argument('--no-squeue', action='store_true', help="Do not query squeue (e.g. on a login node without SLURM)")
+args = parser.parse_args()
+
+# === LOG FORMAT ===
+# Per-seed logs and their iteration/result lines: see logpack.py (LOG_RE, ITERATION_RE, RESULT_RE)
+# production = 200000[20] in the runcard -> 20 iterations
+PRODUCTION_RE = re.compile(r"^\s*production\s*=\s*\d+\s*\[\s*(\d+)\s*\]", re.IGNORECASE | re.MULTILINE)
+
+
+# === STATE ===
+# path -> {"offset", "tail", "dir", "name", "node", "iter", "val", "err", "first_seen", "last_update"}
+logs = {}
+if args.state and os.path.isfile(args.state):
+    with open(args.state) as f:
+        logs = json.load(f)
+    for entry in logs.values():
+        entry["tail"] = entry["tail"].encode("latin-1")
+
+
+def save_state(path):
+    dump = {}
+    for key, entry in logs.items():
+        dump[key] = dict(entry, tail=entry["tail"].decode("latin-1"))
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dump, f)
+    os.replace(tmp, path)
+
+
+def find_channel_dirs():
+    return sorted(d for d in os.listdir(".") if os.path.isdir(os.path.join(d, "logs")))
+
+
+def total_iterations(channel_dir):
+    """Iterations requested in the production runcards of a channel folder, per runcard name."""
+    totals = {}
+    for fname in os.listdir(channel_dir):
+        if fname.endswith(".run") and ".warmup." not in fname:
+            with open(os.path.join(channel_dir, fname), errors="replace") as f:
+                m = PRODUCTION_RE.search(f.read())
+            if m:
+                totals[fname] = int(m.group(1))
+    return totals
+
+
+def parse_new_data(entry, data):
+    """Update iteration count and accumulated result from newly appended bytes."""
+    data = entry["tail"] + data
+    # Keep an incomplete last line for the next refresh
+    cut = data.rfind(b"\n") + 1
+    entry["tail"] = data[cut:]
+    complete = data[:cut]
+    for m in logpack.ITERATION_RE.finditer(complete):
+        entry["iter"] = max(entry["iter"], int(m.group(1)))
+    results = logpack.RESULT_RE.findall(complete)
+    if results:
+        entry["val"], entry["err"] = logpack.to_float(results[-1][0]), logpack.to_float(results[-1][1])
+
+
+def scan_logs(channel_dir, now):
+    """Read only the bytes appended since the previous scan (loose logs and packed archives)."""
+    log_dir = os.path.join(channel_dir, "logs")
+    seen = set()
+    for name, size, read in logpack.log_members(log_dir, ".out"):
+        m = logpack.LOG_RE.match(name)
+        if not m:
+            continue
+        # Same key for the loose log and its packed copy: packing does not restart the parsing
+        path = os.path.join(log_dir, name)
+        seen.add(path)
+        entry = logs.get(path)
+        if entry is None:
+            entry = logs[path] = {"offset": 0, "tail": b"", "dir": channel_dir, "name": m.group("name"),
+                                  "node": int(m.group("node")), "iter": 0, "val": None, "err": None,
+                                  "first_seen": now, "last_update": now}
+        if size < entry["offset"]:
+            # Log rewritten (resubmitted seed): start over
+            entry.update(offset=0, tail=b"", iter=0, val=None, err=None, first_seen=now)
+        if size == entry["offset"]:
+            continue
+        try:
+            data = read(entry["offset"])[:size - entry["offset"]]
+        except OSError:
+            continue
+        entry["offset"] += len(data)
+        entry["last_update"] = now
+        parse_new_data(entry, data)
+    # Logs gone since the previous scan (seeds killed by watchdog.py: renamed to .killed)
+    for path in [p for p, e in logs.items() if e["dir"] == channel_dir and p not in seen]:
+        del logs[path]
+
+
+def query_squeue():
+    """job name -> (state, start epoch or None) for our jobs."""
+    jobs = {}
+    try:
+        queue = slurmq.run(slurmq.SlurmQuery().squeue(user=getpass.getuser()))
+    except (OSError, slurmq.SlurmError):
+        return jobs
+    for job in queue:
+        try:
+            start_epoch = time.mktime(time.strptime(job["start"], "%Y-%m-%dT%H:%M:%S"))
+        except ValueError:
+            start_epoch = None
+        jobs[job["name"]] = (job["state"], start_epoch)
+    return jobs
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return "-"
+    if seconds <= 0:
+        return "done"
+    h, rem = divmod(int(seconds), 3600)
+    d, h = divmod(h, 24)
+    m = rem // 60
+    return f"{d}d{h:02d}h{m:02d}m" if d else f"{h:d}h{m:02d}m"
+
+
+def build_table(dirs, jobs):
+    rows = []
+    by_name = defaultdict(list)
+    for entry in logs.values():
+        by_name[entry["name"]].append(entry)
+
+    node_states = defaultdict(lambda: defaultdict(int))
+    for jobname, (state, _) in jobs.items():
+        node_states[re.sub(r"\d+$", "", jobname)][state] += 1
+
+    dir_totals = {d: total_iterations(d) for d in dirs}
+
+    for name in sorted(by_name):
+        entries = by_name[name]
+        # RR split runcards end with .a.run / .b.run, labels with a / b
+        totals = dir_totals.get(entries[0]["dir"]) or total_iterations(entries[0]["dir"])
+        if len(totals) > 1 and name[-1:] in ("a", "b"):
+            total = next((v for k, v in totals.items() if k.endswith(f".{name[-1]}.run")), max(totals.values()))
+        else:
+            total = max(totals.values()) if totals else 0
+
+        iters = sum(e["iter"] for e in entries)
+        finished = sum(1 for e in entries if total and e["iter"] >= total)
+
+        # Inverse-variance weighted combination of the current seed results
+        wsum, wval = 0.0, 0.0
+        for e in entries:
+            if e["err"]:
+                w = 1.0 / e["err"] ** 2
+                wsum += w
+                wval += w * e["val"]
+        val = wval / wsum if wsum else None
+        err = 1.0 / math.sqrt(wsum) if wsum else None
+
+        # Seconds per iteration from the running seeds (job start time if known)
+        rates = []
+        for e in entries:
+            if e["iter"] <= 0:
+                continue
+            state, start = jobs.get(f"{name}{e['node']}", (None, None))
+            t0 = start if start else e["first_seen"]
+            if e["last_update"] > t0:
+                rates.append((e["last_update"] - t0) / e["iter"])
+        sec_per_iter = sorted(rates)[len(rates) // 2] if rates else None
+
+        running = node_states[name].get("RUNNING", 0)
+        pending = node_states[name].get("PENDING", 0)
+        eta = None
+        if total and sec_per_iter:
+            left = max((total - e["iter"] for e in entries), default=0)
+            eta = left * sec_per_iter + (total * sec_per_iter if pending else 0)
+
+        rows.append((name, running, pending, len(entries), finished, iters, len(entries) * total, val, err, eta))
+    return rows
+
+
+def print_table(rows, elapsed):
+    print(f"{'label':<12} {'R':>3} {'PD':>3} {'seeds':>6} {'done':>6} {'iterations':>15} {'result':>13} {'error':>10} {'rel.':>7} {'ETA':>11}")
+    for name, running, pending, nseeds, finished, iters, total, val, err, eta in rows:
+        rel = f"{100 * err / abs(val):6.2f}%" if val and err else "-"
+        val_s = f"{val:13.5E}" if val is not None else "-"
+        err_s = f"{err:10.2E}" if err is not None else "-"
+        print(f"{name:<12} {running:>3} {pending:>3} {nseeds:>6} {finished:>6} {f'{iters}/{total}':>15} "
+              f"{val_s:>13} {err_s:>10} {rel:>7} {format_eta(eta):>11}")
+    print(f"\n[{time.strftime('%H:%M:%S')}] {len(logs)} logs, refresh took {elapsed:.2f} s")
+
+
+# === MAIN ===
+dirs = [d.rstrip("/") for d in args.dirs] or find_channel_dirs()
+if not dirs:
+    sys.exit("No channel folder with a logs/ subfolder found")
+
+while True:
+    t0 = time.time()
+    for d in dirs:
+        scan_logs(d, t0)
+    jobs = {} if args.no_squeue else query_squeue()
+    rows = build_table(dirs, jobs)
+    if not args.once:
+        print("\033[2J\033[H", end="")
+    print_table(rows, time.time() - t0)
+    if args.state:
+        save_state(args.state)
+    if args.once:
+        break
+    time.sleep(args.refresh)
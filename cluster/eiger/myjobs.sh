@@ -3,8 +3,7 @@
 # Get current username
 USER=$(whoami)
 
-# Display jobs owned by this user
-squeue --me \
-  --format="%.18i %.9P %.20j %.8u %.2t %.10M %.6D %R" \
-  --sort=-t
-
+# Display jobs owned by this user (cached squeue of the whole account, see slurmq.py)
+python3 "$(dirname "$0")/slurmq.py" squeue --me | \
+  { IFS= read -r header; echo "$header"; sort -t$'\t' -k5,5r; } | \
+  awk -F'\t' '{ printf "%18s %9s %20s %8s %10s %10s %6s %s\n", $1, $2, $3, $4, $5, $6, $8, $10 }'
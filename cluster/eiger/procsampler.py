@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import time
+
+# --- Parse command-line arguments ---
+parser = argparse.ArgumentParser(description="Sample RSS and CPU usage of the NNLOJET processes running on this node")
+parser.add_argument('--output', required=True, help="Output file (one line per seed per sample)")
+parser.add_argument('--interval', type=float, default=60, help="Seconds between two samples (default 60)")
+parser.add_argument('--label', default="", help="Channel label written in the header (e.g. RV, RRa)")
+parser.add_argument('--threads', type=int, default=1, help="OpenMP threads per NNLOJET process, written in the header")
+parser.add_argument('--command', default="NNLOJET", help="Process name to follow (default NNLOJET)")
+parser.add_argument('--grace', type=float, default=300, help="Seconds to wait for the first process before giving up")
+args = parser.parse_args()
+
+CLK_TCK = os.sysconf("SC_CLK_TCK")
+MY_UID = os.getuid()
+
+
+def read_status(pid):
+    """Return (VmRSS, VmHWM) in kB from /proc/<pid>/status."""
+    rss, hwm = 0, 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+            elif line.startswith("VmHWM:"):
+                hwm = int(line.split()[1])
+    return rss, hwm
+
+
+def read_cpu_ticks(pid):
+    """Return utime + stime (clock ticks) from /proc/<pid>/stat."""
+    with open(f"/proc/{pid}/stat") as f:
+        stat = f.read()
+    # comm (field 2) may contain spaces: split after the closing parenthesis
+    fields = stat[stat.rindex(")") + 2:].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def read_seed(pid):
+    """Seed from the NNLOJET command line (-iseed N / --iseed N), -1 if absent."""
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        argv = f.read().decode(errors="replace").split("\0")
+    for i, arg in enumerate(argv[:-1]):
+        if arg.lstrip("-") == "iseed":
+            try:
+                return int(argv[i + 1])
+            except ValueError:
+                break
+    return -1
+
+
+def find_processes(command):
+    """PIDs of our processes whose name is <command>."""
+    pids = []
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            if entry.stat().st_uid != MY_UID:
+                continue
+            with open(f"/proc/{entry.name}/comm") as f:
+                if f.read().strip() == command:
+                    pids.append(int(entry.name))
+        except OSError:
+            continue  # process ended while scanning
+    return pids
+
+
+# === MAIN ===
+os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+last_ticks = {}   # pid -> (cpu ticks, wall time)
+seeds = {}        # pid -> seed
+seen_any = False
+t_start = time.time()
+
+with open(args.output, "w", buffering=1) as out:
+    out.write(f"# label={args.label} threads={args.threads} host={os.uname().nodename} interval={args.interval:g}\n")
+    out.write("# time seed rss_kb hwm_kb cpu_pct\n")
+
+    while True:
+        now = time.time()
+        pids = find_processes(args.command)
+        lines = []
+        for pid in pids:
+            try:
+                if pid not in seeds:
+                    seeds[pid] = read_seed(pid)
+                rss, hwm = read_status(pid)
+                ticks = read_cpu_ticks(pid)
+            except (OSError, ValueError, IndexError):
+                continue
+            # CPU utilisation since the previous sample (100 = one full core)
+            cpu = 0.0
+            if pid in last_ticks:
+                prev_ticks, prev_time = last_ticks[pid]
+                if now > prev_time:
+                    cpu = 100.0 * (ticks - prev_ticks) / CLK_TCK / (now - prev_time)
+            last_ticks[pid] = (ticks, now)
+            lines.append(f"{int(now - t_start)} {seeds[pid]} {rss} {hwm} {cpu:.0f}\n")
+        out.writelines(lines)
+
+        if pids:
+            seen_any = True
+        elif seen_any or now - t_start > args.grace:
+            break
+
+        # Forget processes that ended
+        alive = set(pids)
+        for pid in list(last_ticks):
+            if pid not in alive:
+                del last_ticks[pid]
+                seeds.pop(pid, None)
+
+        time.sleep(args.interval)
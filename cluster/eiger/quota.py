@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Quota burn rate and quota-aware submission for the group account.
+
+  quota.py status                       burn rate per user and for the group
+  quota.py check --nodes 8 --time 1-00:00:00
+                                        prints NUM_NODES=<n> (and DEFER_BEGIN=<date>
+                                        when nothing fits) to be eval'ed by the
+                                        submit scripts
+
+Usage and queue come from slurmq.py (cached sreport / squeue of the account).
+"""
+
+import argparse
+import asyncio
+import datetime
+import sys
+
+import slurmq
+
+# === CONFIG ===
+SCALE_NDHR = 5000       # Node-hours available in a quarter
+CPU_PER_NODE = 256      # Eiger: 256 logical cores per node
+RECENT_DAYS = 7         # Window for the recent burn rate
+HEADROOM = 0.05         # Fraction of the quarter budget never allocated by check
+
+
+def quarter_start(day):
+    return datetime.date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+
+
+def next_quarter_start(day):
+    start = quarter_start(day)
+    month = start.month + 3
+    return datetime.date(start.year + (month > 12), (month - 1) % 12 + 1, 1)
+
+
+def slurm_hours(text):
+    """SLURM time ([D-]HH:MM:SS, MM:SS, MM) -> hours; None for UNLIMITED/INVALID."""
+    days = 0
+    if "-" in text:
+        d, text = text.split("-", 1)
+        days = int(d)
+    try:
+        parts = [int(p) for p in text.split(":")]
+    except ValueError:
+        return None
+    if len(parts) == 3:
+        h, m, s = parts
+    elif len(parts) == 2:
+        h, (m, s) = 0, parts
+    else:
+        h, m, s = 0, parts[0], 0
+    return days * 24 + h + m / 60 + s / 3600
+
+
+def committed_node_hours(jobs):
+    """Node-hours still reserved by queued and running jobs (up to their time limit)."""
+    total = 0.0
+    for job in jobs:
+        limit = slurm_hours(job["time_limit"])
+        if limit is None:
+            continue
+        if job["state"] == "RUNNING":
+            total += job["nodes"] * max(limit - (slurm_hours(job["time"]) or 0), 0)
+        elif job["state"] == "PENDING":
+            total += job["nodes"] * limit
+    return total
+
+
+async def collect(query, today):
+    """Usage since quarter start and in the recent window, plus the queue of the account."""
+    start = quarter_start(today)
+    recent = max(start, today - datetime.timedelta(days=RECENT_DAYS))
+    usage, usage_recent, jobs = await asyncio.gather(
+        query.usage(start.isoformat()), query.usage(recent.isoformat()), query.squeue())
+    return usage, usage_recent, jobs
+
+
+def burn_model(usage, usage_recent, jobs, today, user=None):
+    """Node-hours used, burn rates (node-hours/day) and projection to the quarter end."""
+    start = quarter_start(today)
+    end = next_quarter_start(today)
+    elapsed = max((today - start).days, 1)
+    recent_days = max((today - max(start, today - datetime.timedelta(days=RECENT_DAYS))).days, 1)
+    remaining = (end - today).days
+
+    def node_hours(u):
+        if user is None:
+            return u["total"] / CPU_PER_NODE / 60
+        return sum(x["cpu_min"] for x in u["users"] if x["login"] == user) / CPU_PER_NODE / 60
+
+    used = node_hours(usage)
+    rate = used / elapsed
+    rate_recent = node_hours(usage_recent) / recent_days
+    committed = committed_node_hours([j for j in jobs if user is None or j["user"] == user])
+    # The queued work is already part of what the recent rate predicts: take the larger one
+    projected = used + max(rate_recent * remaining, committed)
+    return {"used": used, "rate": rate, "rate_recent": rate_recent, "committed": committed,
+            "projected": projected, "remaining_days": remaining}
+
+
+def status(query, today):
+    usage, usage_recent, jobs = slurmq.run(collect(query, today))
+    users = sorted({u["login"] for u in usage["users"]} | {j["user"] for j in jobs})
+
+    print(f"Quarter {quarter_start(today)} -> {next_quarter_start(today)}, budget {SCALE_NDHR} NodeHours")
+    print(f"{'user':<15} {'used':>9} {'NH/day':>8} {'NH/day ' + str(RECENT_DAYS) + 'd':>10} {'queued':>9} {'projected':>10}")
+    for user in users + [None]:
+        m = burn_model(usage, usage_recent, jobs, today, user)
+        print(f"{user or 'GROUP':<15} {m['used']:>9.1f} {m['rate']:>8.1f} {m['rate_recent']:>10.1f} "
+              f"{m['committed']:>9.1f} {m['projected']:>10.1f}")
+
+    m = burn_model(usage, usage_recent, jobs, today)
+    if m["projected"] > SCALE_NDHR:
+        over = m["projected"] - SCALE_NDHR
+        print(f"\nWarning: projected usage exceeds the budget by {over:.0f} NodeHours "
+              f"({m['remaining_days']} days left in the quarter)")
+
+
+def check(query, today, nodes, hours):
+    """Largest number of nodes (<= nodes) that fits in the remaining budget.
+
+    The submission fits when used + queued + requested stays within the
+    quarter budget (less HEADROOM). The burn-rate projection only warns: it
+    is the work being submitted, so it never defers jobs. When SLURM cannot
+    be queried the request is passed through unchanged, with a warning.
+    """
+    try:
+        usage, usage_recent, jobs = slurmq.run(collect(query, today))
+    except (OSError, slurmq.SlurmError) as e:
+        print(f"quota: cannot query SLURM ({e}), NUM_NODES={nodes} not checked", file=sys.stderr)
+        print(f"NUM_NODES={nodes}")
+        return
+    m = burn_model(usage, usage_recent, jobs, today)
+    budget = SCALE_NDHR * (1 - HEADROOM)
+    available = budget - m["used"] - m["committed"]
+    requested = nodes * hours
+
+    fit = min(nodes, max(int(available // hours), 0)) if hours > 0 else nodes
+    print(f"quota: requested {requested:.0f} NodeHours, available {available:.0f} "
+          f"(used {m['used']:.0f}, queued {m['committed']:.0f}, budget {SCALE_NDHR}), "
+          f"projected {m['projected']:.0f} at quarter end", file=sys.stderr)
+    if m["projected"] > budget:
+        sustainable = max(budget - m["used"], 0) / max(m["remaining_days"], 1)
+        print(f"quota: warning, the recent burn rate ({m['rate_recent']:.0f} NodeHours/day) exhausts the budget "
+              f"before the quarter end; {sustainable:.0f} NodeHours/day would last", file=sys.stderr)
+    if fit < nodes:
+        print(f"quota: scaling NUM_NODES {nodes} -> {fit}", file=sys.stderr)
+    print(f"NUM_NODES={fit if fit > 0 else nodes}")
+    if fit == 0:
+        begin = next_quarter_start(today).isoformat()
+        print(f"quota: no budget left, deferring the jobs to {begin}", file=sys.stderr)
+        print(f"DEFER_BEGIN={begin}")
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quota burn rate and quota-aware submission checks")
+    parser.add_argument('--account', default=slurmq.ACCOUNT, help="SLURM account")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("status", help="Burn rate per user and for the group")
+    p_check = sub.add_parser("check", help="Scale down or defer a submission that does not fit the budget")
+    p_check.add_argument('--nodes', type=int, required=True, help="Requested number of node jobs")
+    p_check.add_argument('--time', required=True, help="Walltime of each job (SLURM format, e.g. 1-00:00:00)")
+    args = parser.parse_args(argv)
+
+    query = slurmq.SlurmQuery(account=args.account)
+    today = datetime.date.today()
+    if args.command == "check":
+        hours = slurm_hours(args.time)
+        if hours is None:
+            parser.error(f"invalid --time {args.time}")
+        check(query, today, args.nodes, hours)
+    elif args.command == "status":
+        status(query, today)
+    else:
+        parser.error("choose one of: status, check")
+
+
+if __name__ == "__main__":
+    main()
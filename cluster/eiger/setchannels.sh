@@ -51,6 +51,10 @@ declare -A PRODUCTION_MAP=(
   [RRb]="200000[20]"
 )
 
+# Warmup grid cache (warmup_cache.py): channels whose warmup runcard, stage and
+# NNLOJET version match a cached warmup get its grids copied in. Empty disables it.
+WARMUP_CACHE_TOOL="./warmup_cache.py"
+
 # Defaults to apply to LO templates BEFORE copying
 LO_TEMPLATE_NUM_NODES_DEFAULT=1
 LO_TEMPLATE_WARMUP_DEFAULT="100000[10]"
@@ -73,6 +77,7 @@ This script:
   - Sets 'channel = <channel>' in runcards
   - Rewrites NAME=... in submit_nnlojet.sh to use the channel name
   - Applies per-channel NUM_NODES, production (run), and warmup (warmup.run) overrides
+  - Restores cached warmup grids (warmup_cache.py) when the warmup setup is unchanged
   - If SPLIT_RR=true and channel=RR:
       • creates <base>.a.run (region=a) and <base>.b.run (region=b)
       • creates submit_nnlojet_a.sh -> uses <base>.a.run, labeled RRa
@@ -335,6 +340,11 @@ for ch in "${CHANNELS[@]}"; do
   if ! { [[ "$ch" == "RR" && "$SPLIT_RR" == "true" ]]; }; then
     apply_channel_to_submit  "${ch}/submit_nnlojet.sh" "${ch}"
   fi
+
+  # Reuse a cached warmup grid: submit_all_warmup.sh then skips this stage
+  if [[ -n "${WARMUP_CACHE_TOOL}" && -f "${WARMUP_CACHE_TOOL}" ]]; then
+    python3 "${WARMUP_CACHE_TOOL}" restore "${ch}" --runcard "${RUNCARD_BASE}.warmup.run" || true
+  fi
 done
 
 echo
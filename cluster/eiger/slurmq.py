@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Cached asynchronous queries to SLURM (squeue, sacct, sreport).
+
+All scripts of this folder go through SlurmQuery instead of calling the SLURM
+commands directly:
+  - queries are account-wide and filtered locally, so one squeue/sacct/sreport
+    call serves every user and script of the group (batching);
+  - results are cached on disk with a TTL per command; point SLURMQ_CACHE to a
+    group-writable folder to share the cache between group members;
+  - concurrent identical queries in one process share a single subprocess, and
+    a lock file makes other processes wait for the refresh instead of running
+    the same query again;
+  - scancel() is never cached and drops the cached squeue (converge.py);
+  - FakeBackend returns canned outputs, for testing scripts without SLURM.
+
+Command line:
+  slurmq.py squeue [--me] [--json]
+  slurmq.py sacct --start 2025-10-01 [--me] [--json]
+  slurmq.py usage --start 2025-10-01 [--json]
+"""
+
+import argparse
+import asyncio
+import fcntl
+import getpass
+import hashlib
+import json
+import os
+import sys
+import time
+
+CACHE_DIR = os.environ.get("SLURMQ_CACHE", os.path.expanduser("~/.cache/slurmq"))
+ACCOUNT = os.environ.get("SLURMQ_ACCOUNT", "eth5f")
+TTL = {"squeue": 30, "sacct": 120, "sreport": 900}   # seconds
+
+# squeue output fields: (key, format code)
+SQUEUE_FIELDS = [
+    ("jobid", "%i"), ("partition", "%P"), ("name", "%j"), ("user", "%u"), ("state", "%T"),
+    ("time", "%M"), ("time_limit", "%l"), ("nodes", "%D"), ("start", "%S"), ("reason", "%R"),
+]
+SACCT_FIELDS = ["JobID", "JobName", "User", "State", "Elapsed", "NNodes", "CPUTimeRAW", "Start", "End"]
+
+
+class SlurmError(RuntimeError):
+    pass
+
+
+class SlurmBackend:
+    """Runs the real SLURM commands."""
+
+    async def run(self, argv):
+        proc = await asyncio.create_subprocess_exec(*argv, stdout=asyncio.subprocess.PIPE,
+                                                    stderr=asyncio.subprocess.PIPE)
+        out, err = await proc.communicate()
+        if proc.returncode != 0:
+            raise SlurmError(f"{' '.join(argv)} failed: {err.decode(errors='replace').strip()}")
+        return out.decode(errors="replace")
+
+
+class FakeBackend:
+    """Canned outputs keyed by command name (squeue, sacct, sreport); records the calls."""
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.calls = []
+
+    async def run(self, argv):
+        self.calls.append(list(argv))
+        if argv[0] not in self.outputs:
+            raise SlurmError(f"FakeBackend: no output for {argv[0]}")
+        return self.outputs[argv[0]]
+
+
+class SlurmQuery:
+    def __init__(self, backend=None, account=ACCOUNT, cache_dir=CACHE_DIR, ttl=None):
+        self.backend = backend or SlurmBackend()
+        self.account = account
+        self.cache_dir = cache_dir
+        self.ttl = dict(TTL, **(ttl or {}))
+        self._inflight = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # --- cache ---
+    def _read_cache(self, path, ttl):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry["time"] > ttl:
+            return None
+        return entry["stdout"]
+
+    def _write_cache(self, path, argv, stdout):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"time": time.time(), "argv": argv, "stdout": stdout}, f)
+        os.chmod(tmp, 0o664)   # group members may refresh it
+        os.replace(tmp, path)
+
+    async def _fetch(self, argv, key, ttl):
+        if not self.cache_dir:
+            return await self.backend.run(argv)
+        path = os.path.join(self.cache_dir, key + ".json")
+        stdout = self._read_cache(path, ttl)
+        if stdout is not None:
+            return stdout
+        # Only one process refreshes an entry; the others wait and read its result
+        loop = asyncio.get_event_loop()
+        with open(path + ".lock", "a") as lock:
+            await loop.run_in_executor(None, fcntl.flock, lock, fcntl.LOCK_EX)
+            try:
+                stdout = self._read_cache(path, ttl)
+                if stdout is None:
+                    stdout = await self.backend.run(argv)
+                    self._write_cache(path, argv, stdout)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return stdout
+
+    async def _query(self, argv):
+        """Cached stdout of argv; identical concurrent queries share one call."""
+        key = hashlib.sha1("\0".join(argv).encode()).hexdigest()
+        if key not in self._inflight:
+            self._inflight[key] = asyncio.ensure_future(self._fetch(argv, key, self.ttl[argv[0]]))
+            self._inflight[key].add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(self._inflight[key])
+
+    def _squeue_argv(self):
+        return ["squeue", "-A", self.account, "-h", "-o", "|".join(code for _, code in SQUEUE_FIELDS)]
+
+    # --- parsed queries ---
+    async def squeue(self, user=None):
+        """Jobs of the account (optionally of one user) as a list of dicts."""
+        out = await self._query(self._squeue_argv())
+        jobs = []
+        for line in out.splitlines():
+            values = line.split("|")
+            if len(values) != len(SQUEUE_FIELDS):
+                continue
+            job = dict(zip((key for key, _ in SQUEUE_FIELDS), values))
+            job["nodes"] = int(job["nodes"]) if job["nodes"].isdigit() else 0
+            if user is None or job["user"] == user:
+                jobs.append(job)
+        return jobs
+
+    async def sacct(self, start, end="now", user=None):
+        """Allocations (no steps) of the account since start, as a list of dicts."""
+        out = await self._query(["sacct", "-A", self.account, "-a", "-X", "-P", "-n", "-S", start, "-E", end,
+                                 "-o", ",".join(SACCT_FIELDS)])
+        jobs = []
+        for line in out.splitlines():
+            values = line.split("|")
+            if len(values) != len(SACCT_FIELDS):
+                continue
+            job = dict(zip((f.lower() for f in SACCT_FIELDS), values))
+            job["nnodes"] = int(job["nnodes"]) if job["nnodes"].isdigit() else 0
+            job["cputimeraw"] = int(job["cputimeraw"]) if job["cputimeraw"].isdigit() else 0
+            if user is None or job["user"] == user:
+                jobs.append(job)
+        return jobs
+
+    async def usage(self, start, end="now"):
+        """CPU minutes of the account since start: {"total": float, "users": [{"login", "name", "cpu_min"}]}"""
+        out = await self._query(["sreport", "-P", "-n", "-t", "Minutes", "cluster", "AccountUtilizationByUser",
+                                 f"Start={start}", f"End={end}", f"Accounts={self.account}"])
+        usage = {"total": 0.0, "users": []}
+        for line in out.splitlines():
+            values = line.split("|")
+            if len(values) < 5 or values[1] != self.account:
+                continue
+            login, name, used = values[2], values[3], float(values[4] or 0)
+            if login:
+                usage["users"].append({"login": login, "name": name, "cpu_min": used})
+            else:
+                usage["total"] = used   # account line (no login)
+        return usage
+
+    # --- actions (never cached) ---
+    async def scancel(self, jobids):
+        """Cancel jobs; the cached squeue is dropped so the next query sees it."""
+        if not jobids:
+            return
+        await self.backend.run(["scancel"] + [str(j) for j in jobids])
+        if self.cache_dir:
+            key = hashlib.sha1("\0".join(self._squeue_argv()).encode()).hexdigest()
+            try:
+                os.remove(os.path.join(self.cache_dir, key + ".json"))
+            except OSError:
+                pass
+
+
+def run(coro):
+    """asyncio.run, also on Python 3.6"""
+    if hasattr(asyncio, "run"):
+        return asyncio.run(coro)
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+# === COMMAND LINE ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cached SLURM queries (squeue, sacct, sreport) for the group scripts")
+    parser.add_argument('--account', default=ACCOUNT, help=f"SLURM account (default {ACCOUNT}, or SLURMQ_ACCOUNT)")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of a table")
+    sub = parser.add_subparsers(dest="command")
+    p_squeue = sub.add_parser("squeue", help="Queued and running jobs")
+    p_squeue.add_argument('--me', action='store_true', help="Only my jobs")
+    p_sacct = sub.add_parser("sacct", help="Job allocations since --start")
+    p_sacct.add_argument('--start', required=True, help="Start date (YYYY-MM-DD)")
+    p_sacct.add_argument('--me', action='store_true', help="Only my jobs")
+    p_usage = sub.add_parser("usage", help="CPU minutes per user since --start (sreport AccountUtilizationByUser)")
+    p_usage.add_argument('--start', required=True, help="Start date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+    if not args.command:
+        parser.error("choose one of: squeue, sacct, usage")
+
+    query = SlurmQuery(account=args.account)
+    me = getpass.getuser() if getattr(args, "me", False) else None
+    try:
+        if args.command == "squeue":
+            result = run(query.squeue(user=me))
+        elif args.command == "sacct":
+            result = run(query.sacct(args.start, user=me))
+        else:
+            result = run(query.usage(args.start))
+    except (OSError, SlurmError) as e:
+        sys.exit(f"slurmq: {e}")
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=1)
+        print()
+    elif args.command == "usage":
+        for user in result["users"]:
+            print(f"{user['login']}\t{user['name']}\t{user['cpu_min']:.0f}")
+        print(f"TOTAL\t\t{result['total']:.0f}")
+    else:
+        keys = [key for key, _ in SQUEUE_FIELDS] if args.command == "squeue" else [f.lower() for f in SACCT_FIELDS]
+        print("\t".join(keys))
+        for job in result:
+            print("\t".join(str(job[k]) for k in keys))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,28 @@ export OMP_NUM_THREADS=${CPUS_PER_TASK}
 # === STAGES TO RUN ===
 STAGES=("LO" "R" "V" "VV" "RV" "RR")
 
+# === WARMUP CACHE (warmup_cache.py) ===
+# Stages whose grids are cached are restored and skipped; the others store
+# their grids when the warmup succeeds. Empty disables the cache.
+CACHE_TOOL="warmup_cache.py"
+STORE_CMD=""
+if [ -n "${CACHE_TOOL}" ] && [ -f "${CACHE_TOOL}" ]; then
+    CACHE_TOOL=$(realpath "${CACHE_TOOL}")
+    TODO=()
+    for stage in "${STAGES[@]}"; do
+        if python3 "${CACHE_TOOL}" restore "${stage}" --runcard "${RUNCARD}"; then
+            continue
+        fi
+        TODO+=("${stage}")
+    done
+    STAGES=("${TODO[@]}")
+    STORE_CMD="&& python3 ${CACHE_TOOL} store . --runcard ${RUNCARD}"
+fi
+if [ ${#STAGES[@]} -eq 0 ]; then
+    echo "All warmup stages restored from the cache, nothing to submit."
+    exit 0
+fi
+
 sbatch <<EOF
 #!/bin/bash
 #SBATCH --job-name=${NAME}
@@ -34,7 +56,7 @@ for stage in ${STAGES[@]}; do
         cd \${stage}
 	mkdir -p logs/
         echo "Starting warmup for \${stage}"
-        NNLOJET -run ${RUNCARD} --iseed ${SEED} > ../logs/${NAME}${stage}.out 2>&1
+        NNLOJET -run ${RUNCARD} --iseed ${SEED} > ../logs/${NAME}\${stage}.out 2>&1 ${STORE_CMD}
     ) &
 done
 
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import math
+import os
+import re
+from collections import defaultdict
+
+# --- Parse command-line arguments ---
+parser = argparse.ArgumentParser(description="Summarise procsampler.py telemetry and recommend memory and processes per node")
+parser.add_argument('--input', nargs='+', default=["*/telemetry/*.tsv"], help="Telemetry files or glob patterns (default */telemetry/*.tsv)")
+parser.add_argument('--node-mem', type=float, default=250000, help="Usable memory per node in MB (default 250000)")
+parser.add_argument('--node-cpus', type=int, default=256, help="Logical CPUs per node (default 256)")
+parser.add_argument('--safety', type=float, default=1.2, help="Headroom factor on the peak RSS (default 1.2)")
+parser.add_argument('--write-profile', help="Write MEMORY_<label> and NUM_THREADS_<label> to this eiger.profile")
+args = parser.parse_args()
+
+
+def parse_header(line):
+    """'# label=RV threads=1 ...' -> dict"""
+    return dict(kv.split("=", 1) for kv in line.lstrip("#").split() if "=" in kv)
+
+
+def read_telemetry(path):
+    """Return (label, threads, {seed: (peak_hwm_kb, [cpu_pct, ...])})."""
+    label, threads = "", 1
+    seeds = defaultdict(lambda: [0, []])
+    with open(path) as f:
+        for line in f:
+            if line.startswith("#"):
+                header = parse_header(line)
+                label = header.get("label", label)
+                threads = int(header.get("threads", threads))
+                continue
+            tokens = line.split()
+            if len(tokens) != 5:
+                continue
+            _, seed, _, hwm, cpu = tokens
+            entry = seeds[int(seed)]
+            entry[0] = max(entry[0], int(hwm))
+            entry[1].append(float(cpu))
+    if not label:
+        # Fallback: job label from the file name (<NAME>_nod<ID>.tsv)
+        label = re.sub(r"_nod\d+$", "", os.path.splitext(os.path.basename(path))[0])
+    return label, threads, seeds
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    k = min(len(values) - 1, int(math.ceil(q / 100.0 * len(values))) - 1)
+    return values[max(k, 0)]
+
+
+def set_profile_kv(path, key, value):
+    """Replace KEY=... in the profile, or append it."""
+    lines = []
+    if os.path.isfile(path):
+        with open(path) as f:
+            lines = f.readlines()
+    for i, line in enumerate(lines):
+        if line.startswith(f"{key}="):
+            lines[i] = f"{key}={value}\n"
+            break
+    else:
+        lines.append(f"{key}={value}\n")
+    with open(path, "w") as f:
+        f.writelines(lines)
+
+
+# === MAIN ===
+files = []
+for pattern in args.input:
+    files.extend(sorted(glob.glob(pattern)) if any(c in pattern for c in "*?[") else [pattern])
+print(f"Found {len(files)} telemetry file(s)")
+
+# label -> {"threads": int, "peaks": [kB per seed], "cpu": [mean % per seed]}
+channels = defaultdict(lambda: {"threads": 1, "peaks": [], "cpu": []})
+for path in files:
+    label, threads, seeds = read_telemetry(path)
+    ch = channels[label]
+    ch["threads"] = threads
+    for peak, cpu in seeds.values():
+        ch["peaks"].append(peak)
+        # First sample of every process has no CPU delta
+        samples = cpu[1:] or cpu
+        ch["cpu"].append(sum(samples) / len(samples))
+
+print()
+print(f"{'label':<8} {'seeds':>6} {'thr':>4} {'peak RSS':>10} {'p95 RSS':>10} {'CPU %':>7} {'mem-per-cpu':>12} {'procs/node':>11}")
+for label in sorted(channels):
+    ch = channels[label]
+    if not ch["peaks"]:
+        continue
+    threads = ch["threads"]
+    peak_mb = max(ch["peaks"]) / 1024
+    p95_mb = percentile(ch["peaks"], 95) / 1024
+    cpu = sum(ch["cpu"]) / len(ch["cpu"])
+
+    need_mb = peak_mb * args.safety
+    mem_per_cpu = max(100, int(math.ceil(need_mb / threads / 100.0)) * 100)
+    procs = min(args.node_cpus // threads, int(args.node_mem // (mem_per_cpu * threads)))
+
+    print(f"{label:<8} {len(ch['peaks']):>6} {threads:>4} {peak_mb:>8.0f}MB {p95_mb:>8.0f}MB {cpu:>7.1f} {mem_per_cpu:>10}M {procs:>11}")
+
+    if args.write_profile:
+        set_profile_kv(args.write_profile, f"MEMORY_{label}", f"{mem_per_cpu}M")
+        set_profile_kv(args.write_profile, f"NUM_THREADS_{label}", procs)
+
+if args.write_profile:
+    print(f"\nProfile written to: {args.write_profile}")
@@ -19,28 +19,22 @@ quarter_start_month=$(( ((month - 1) / 3) * 3 + 1 ))
 QUARTER_START=$(printf "%s-%02d-01" "$year" "$quarter_start_month")
 
 
-# === EXTRACT FULL SREPORT ===
-SREPORT_OUTPUT=$(sreport cluster AccountUtilizationByUser Start=$QUARTER_START End=now Accounts=$ACCOUNT 2>/dev/null)
-#echo $SREPORT_OUTPUT
+# === USAGE FROM SREPORT (cached, see slurmq.py) ===
+# Lines: login <TAB> name <TAB> CPU minutes, last line: TOTAL <TAB> <TAB> CPU minutes
+USAGE=$(python3 "$(dirname "$0")/slurmq.py" --account "$ACCOUNT" usage --start "$QUARTER_START")
+#echo "$USAGE"
 
 # === PRINT MEMBER USAGE (CPU Minutes) ===
 echo -e "👥  Member Usage (CPU Minutes) for account '$ACCOUNT' since $QUARTER_START"
 echo    "------------------------------------------------------------"
-iflag=0
-echo "$SREPORT_OUTPUT" | awk '
-  /^[[:space:]]*alps-eig\+/ {
-    if ($3 != "") {
-      if (iflag != 0) {
-      # User line: column 3 = login, 4 = name, 6 = CPU minutes
-      printf " - %-15s %-20s %.2f NodeHours\n", $3, $4, $6/256/60
-      }
-     iflag ++;
-    }
+echo "$USAGE" | awk -F'\t' -v cores=$CPU_PER_NODE '
+  $1 != "TOTAL" {
+      printf " - %-15s %-20s %.2f NodeHours\n", $1, $2, $3/cores/60
   }'
 echo ""
 
 # === EXTRACT TOTAL USAGE ===
-CPU_MIN=$(echo "$SREPORT_OUTPUT" | awk 'NF == 4 && $3 ~ /^[0-9]+$/ { print $3 }')
+CPU_MIN=$(echo "$USAGE" | awk -F'\t' '$1 == "TOTAL" { print $3 }')
 #echo "cpu min: $CPU_MIN"
 
 # === CONVERT TO NODE-HOURS ===
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""Content-addressed cache of NNLOJET warmup grids.
+
+The key is the sha256 of
+  - the warmup runcard with comments, blank lines, seeds (iseed/seed), the
+    production setting and the HISTOGRAMS block removed: only what shapes the
+    warmup phase space (process, run name, warmup, PDF, scales, cuts,
+    channel and region lines, ...);
+  - the stage (channel folder name, e.g. RV, RR);
+  - the NNLOJET version: $NNLOJET_VERSION, or else the sha256 of the NNLOJET
+    binary found in $PATH.
+so a new campaign that only changes production settings, seeds or observables
+finds the grids of the previous one.
+
+  warmup_cache.py key RV/epemZH2bb.warmup.run          print the key
+  warmup_cache.py restore RV --runcard epemZH2bb.warmup.run   copy cached grids into RV (exit 1: miss)
+  warmup_cache.py store RV --runcard epemZH2bb.warmup.run     after the warmup: save the grids of RV
+  warmup_cache.py list
+
+setchannels.sh restores the grids of every channel it creates and
+submit_all_warmup.sh skips the stages found in the cache and stores the
+others when their warmup finishes. Export WARMUP_CACHE=<group folder> to
+share the cache with the other group members (default ~/.cache/nnlojet-warmup).
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+CACHE_DIR = os.environ.get("WARMUP_CACHE", os.path.expanduser("~/.cache/nnlojet-warmup"))
+# Grid files written by the warmup in the channel folder (store --pattern to change)
+GRID_PATTERNS = ["*.vegas_wrm*"]
+# Runcard settings that do not change the warmup grids
+IGNORED_KEYS = {"production", "iseed", "seed"}
+IGNORED_BLOCKS = {"HISTOGRAMS"}
+
+KEY_RE = re.compile(r"^\s*([A-Za-z_][\w]*)\s*=")
+
+
+def normalized_runcard(text):
+    """Warmup-relevant lines of a runcard, whitespace-normalized."""
+    lines = []
+    skip_block = None
+    for line in text.splitlines():
+        line = line.split("!", 1)[0].strip()   # '!' starts a comment
+        if not line:
+            continue
+        word = line.split()[0].upper()
+        if skip_block:
+            if word == f"END_{skip_block}":
+                skip_block = None
+            continue
+        if word in IGNORED_BLOCKS:
+            skip_block = word
+            continue
+        m = KEY_RE.match(line)
+        if m and m.group(1).lower() in IGNORED_KEYS:
+            continue
+        lines.append(" ".join(line.split()))
+    return "\n".join(lines) + "\n"
+
+
+def nnlojet_version():
+    """$NNLOJET_VERSION, or sha256 of the NNLOJET binary (remembered per path, size and mtime)."""
+    if os.environ.get("NNLOJET_VERSION"):
+        return os.environ["NNLOJET_VERSION"]
+    binary = shutil.which("NNLOJET")
+    if binary is None:
+        sys.exit("NNLOJET not found in PATH: set NNLOJET_VERSION")
+    binary = os.path.realpath(binary)
+    st = os.stat(binary)
+    memo_path = os.path.join(CACHE_DIR, "binaries.json")
+    memo_key = f"{binary}:{st.st_size}:{st.st_mtime_ns}"
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+    except (OSError, ValueError):
+        memo = {}
+    if memo_key not in memo:
+        h = hashlib.sha256()
+        with open(binary, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        memo[memo_key] = "sha256:" + h.hexdigest()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{memo_path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(memo, f, indent=1)
+        os.replace(tmp, memo_path)
+    return memo[memo_key]
+
+
+def cache_key(runcard_path, stage=None):
+    """(key, description) of a warmup runcard; stage defaults to the runcard's folder name."""
+    with open(runcard_path, errors="replace") as f:
+        runcard = normalized_runcard(f.read())
+    stage = stage or os.path.basename(os.path.dirname(os.path.abspath(runcard_path)))
+    version = nnlojet_version()
+    key = hashlib.sha256(f"stage={stage}\nversion={version}\n{runcard}".encode()).hexdigest()
+    return key, {"stage": stage, "version": version, "runcard": runcard}
+
+
+def entry_dir(key):
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def grid_files(channel_dir, patterns=GRID_PATTERNS):
+    return sorted(name for name in os.listdir(channel_dir)
+                  if os.path.isfile(os.path.join(channel_dir, name))
+                  and any(fnmatch.fnmatch(name, p) for p in patterns))
+
+
+def restore(channel_dir, runcard, stage=None):
+    """Copy the cached grids into channel_dir; returns the key on a hit, None on a miss."""
+    key, _ = cache_key(os.path.join(channel_dir, runcard), stage)
+    entry = entry_dir(key)
+    if not os.path.isfile(os.path.join(entry, "meta.json")):
+        return None
+    for name in os.listdir(entry):
+        if name != "meta.json":
+            shutil.copy2(os.path.join(entry, name), os.path.join(channel_dir, name))
+    return key
+
+
+def store(channel_dir, runcard, stage=None, patterns=GRID_PATTERNS):
+    """Save the grids of channel_dir under the key of its runcard; returns (key, files)."""
+    key, meta = cache_key(os.path.join(channel_dir, runcard), stage)
+    files = grid_files(channel_dir, patterns)
+    if not files:
+        return key, []
+    entry = entry_dir(key)
+    if os.path.isfile(os.path.join(entry, "meta.json")):
+        return key, files   # already cached (identical warmup)
+    # Fill a temporary folder and rename it: readers never see a partial entry
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    os.makedirs(tmp)
+    for name in files:
+        shutil.copy2(os.path.join(channel_dir, name), os.path.join(tmp, name))
+    meta.update(files=files, source=os.path.abspath(channel_dir), runcard_file=runcard,
+                date=time.strftime("%Y-%m-%d %H:%M:%S"), user=os.environ.get("USER", ""))
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=1)
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)   # stored meanwhile by someone else
+    return key, files
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-addressed cache of NNLOJET warmup grids")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+    p = sub.add_parser("key", help="Print the cache key of a warmup runcard")
+    p.add_argument('runcard', help="Warmup runcard (in its channel folder)")
+    p.add_argument('--stage', help="Stage name (default: folder of the runcard)")
+    for cmd, text in [("restore", "Copy cached grids into a channel folder (exit 1 on a miss)"),
+                      ("store", "Save the grids of a channel folder after its warmup")]:
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument('channel_dir', help="Channel folder, e.g. RV")
+        p.add_argument('--runcard', required=True, help="Warmup runcard name in the channel folder")
+        p.add_argument('--stage', help="Stage name (default: channel folder name)")
+        if cmd == "store":
+            p.add_argument('--pattern', action='append', help=f"Grid file pattern (default {' '.join(GRID_PATTERNS)})")
+    sub.add_parser("list", help="List the cached warmups")
+    args = parser.parse_args(argv)
+
+    if args.command == "key":
+        print(cache_key(args.runcard, args.stage)[0])
+    elif args.command == "restore":
+        key = restore(args.channel_dir, args.runcard, args.stage)
+        if key is None:
+            print(f"{args.channel_dir}: no cached warmup")
+            sys.exit(1)
+        print(f"{args.channel_dir}: warmup grids restored from cache ({key[:12]})")
+    elif args.command == "store":
+        patterns = args.pattern or GRID_PATTERNS
+        key, files = store(args.channel_dir, args.runcard, args.stage, patterns)
+        if not files:
+            sys.exit(f"{args.channel_dir}: no grid files ({' '.join(patterns)}) to store")
+        print(f"{args.channel_dir}: {len(files)} grid file(s) cached ({key[:12]})")
+    else:
+        if not os.path.isdir(CACHE_DIR):
+            return
+        for prefix in sorted(os.listdir(CACHE_DIR)):
+            if len(prefix) != 2:
+                continue
+            for key in sorted(os.listdir(os.path.join(CACHE_DIR, prefix))):
+                try:
+                    with open(os.path.join(CACHE_DIR, prefix, key, "meta.json")) as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                print(f"{key[:12]}  {meta['stage']:<5} {meta['date']}  {len(meta['files'])} file(s)  {meta['source']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import os
+import re
+import shutil
+import signal
+import subprocess
+import time
+
+import logpack
+import quota
+
+# --- Parse command-line arguments ---
+parser = argparse.ArgumentParser(description="Kill pathological NNLOJET seeds on this node and reuse their cores for spare seeds")
+parser.add_argument('--logs', required=True, help="Per-seed log prefix, e.g. logs/bbRR_nod0 (logs are <prefix>_s<SEED>.out/.err)")
+parser.add_argument('--output', required=True, help="Actions file (one line per killed or started seed)")
+parser.add_argument('--interval', type=float, default=60, help="Seconds between two checks (default 60)")
+parser.add_argument('--command', default="NNLOJET", help="Process name to follow (default NNLOJET)")
+parser.add_argument('--grace', type=float, default=300, help="Seconds to wait for the first process before giving up")
+# Anomalies
+parser.add_argument('--blowup', type=float, default=10, help="Kill when the std. dev. grows above this factor x its minimum so far (default 10)")
+parser.add_argument('--max-rel-error', type=float, default=1.0, help="Kill when std. dev./|integral| exceeds this after 2 iterations (default 1.0)")
+parser.add_argument('--stall', type=float, default=7200, help="Kill when the log did not grow for this many seconds (default 7200)")
+parser.add_argument('--runaway', type=float, default=4, help="Kill when an iteration takes this factor x the sibling median (default 4)")
+parser.add_argument('--min-siblings', type=int, default=8, help="Seeds with a completed iteration needed for the runaway check (default 8)")
+# Replacement seeds
+parser.add_argument('--spare-seeds', type=int, nargs=2, metavar=("FIRST", "COUNT"), help="Seed range for replacements (none: no respawn)")
+parser.add_argument('--walltime', help="Job time limit ([D-]HH:MM:SS): no respawn if a seed cannot finish in time")
+parser.add_argument('--numa-policy', choices=["none", "local", "interleave"], default="none",
+                    help="NUMA memory policy of the runs (NUMA_POLICY of submit_nnlojet.sh), re-applied to spare seeds")
+parser.add_argument('--reject-dir', default="rejected", help="Where the *.s<SEED>.dat files of killed seeds are moved (default rejected)")
+parser.add_argument('--dry-run', action='store_true', help="Only report the anomalies")
+args = parser.parse_args()
+
+MY_UID = os.getuid()
+KILL_GRACE = 30   # seconds between SIGTERM and SIGKILL
+# numactl options of the NUMA policies, as in cpubind.sh (the CPU set is restored from the killed run)
+NUMA_ARGS = {"none": [], "local": ["--localalloc"], "interleave": ["--interleave=all"]}
+# production = 200000[20] in the runcard -> 20 iterations
+PRODUCTION_RE = re.compile(r"^\s*production\s*=\s*\d+\s*\[\s*(\d+)\s*\]", re.IGNORECASE | re.MULTILINE)
+
+
+def read_argv(pid):
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().decode(errors="replace").split("\0")[:-1]
+
+
+def read_seed(argv):
+    """Seed from the NNLOJET command line (-iseed N / --iseed N), -1 if absent."""
+    for i, arg in enumerate(argv[:-1]):
+        if arg.lstrip("-") == "iseed":
+            try:
+                return int(argv[i + 1])
+            except ValueError:
+                break
+    return -1
+
+
+def find_processes(command):
+    """{seed: pid} of our processes whose name is <command> (and that have a seed)."""
+    procs = {}
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            if entry.stat().st_uid != MY_UID:
+                continue
+            with open(f"/proc/{entry.name}/comm") as f:
+                if f.read().strip() != command:
+                    continue
+            seed = read_seed(read_argv(entry.name))
+            if seed >= 0 and int(entry.name) != os.getpid():
+                procs[seed] = int(entry.name)
+        except OSError:
+            continue  # process ended while scanning
+    return procs
+
+
+def total_iterations(argv, cwd):
+    """Production iterations of the runcard passed with -run, or None."""
+    for i, arg in enumerate(argv[:-1]):
+        if arg.lstrip("-") == "run":
+            try:
+                with open(os.path.join(cwd, argv[i + 1]), errors="replace") as f:
+                    m = PRODUCTION_RE.search(f.read())
+                return int(m.group(1)) if m else None
+            except OSError:
+                return None
+    return None
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else None
+
+
+# === PER-SEED STATE ===
+class Seed:
+    def __init__(self, seed, now):
+        self.seed = seed
+        self.log = f"{args.logs}_s{seed}.out"
+        self.offset = 0
+        self.tail = b""
+        self.iter = 0
+        self.val = None
+        self.err = None
+        self.min_err = None
+        self.start = now
+        self.last_growth = now
+        self.last_iter_time = now
+
+    def update(self, now):
+        """Parse the bytes appended to the log since the previous check."""
+        try:
+            size = os.path.getsize(self.log)
+        except OSError:
+            return
+        if size <= self.offset:
+            return
+        with open(self.log, "rb") as f:
+            f.seek(self.offset)
+            data = self.tail + f.read(size - self.offset)
+        self.offset = size
+        self.last_growth = now
+        cut = data.rfind(b"\n") + 1
+        self.tail = data[cut:]
+        iterations, val, err = logpack.seed_result(data[:cut])
+        if iterations > self.iter:
+            self.iter = iterations
+            self.last_iter_time = now
+        if err is not None:
+            self.val, self.err = val, err
+            self.min_err = err if self.min_err is None else min(self.min_err, err)
+
+    def sec_per_iter(self):
+        return (self.last_iter_time - self.start) / self.iter if self.iter else None
+
+    def anomaly(self, now, sibling_sec_per_iter):
+        """Reason to kill this seed, or None."""
+        if self.err is not None and self.min_err and self.err > args.blowup * self.min_err:
+            return f"error blow-up: std.dev. {self.err:.3E} > {args.blowup:g} x minimum {self.min_err:.3E}"
+        if self.iter >= 2 and self.val and self.err / abs(self.val) > args.max_rel_error:
+            return f"relative error {self.err / abs(self.val):.2f} > {args.max_rel_error:g}"
+        if now - self.last_growth > args.stall:
+            return f"stalled: no output for {now - self.last_growth:.0f} s"
+        if sibling_sec_per_iter and now - self.last_iter_time > args.runaway * sibling_sec_per_iter:
+            return (f"runaway: iteration running for {now - self.last_iter_time:.0f} s, "
+                    f"siblings need {sibling_sec_per_iter:.0f} s")
+        return None
+
+
+def kill(pid, sig=signal.SIGTERM):
+    """Send sig (SIGTERM: the main loop follows up with SIGKILL after KILL_GRACE s)."""
+    try:
+        os.kill(pid, sig)
+    except OSError:
+        pass  # gone
+
+
+def alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def reject_outputs(seed, cwd):
+    """Move the histograms of a killed seed out of the way of nnlojet-combine.py."""
+    files = glob.glob(os.path.join(cwd, f"*.s{seed}.dat"))
+    if files:
+        target = os.path.join(cwd, args.reject_dir)
+        os.makedirs(target, exist_ok=True)
+        for path in files:
+            shutil.move(path, os.path.join(target, os.path.basename(path)))
+    return len(files)
+
+
+def retire_log(seed):
+    """Rename the .out of a killed seed to _s<SEED>.killed: the log parsers (logpack.LOG_RE) skip it."""
+    try:
+        os.replace(f"{args.logs}_s{seed}.out", f"{args.logs}_s{seed}.killed")
+    except OSError:
+        pass
+
+
+def respawn(argv, cwd, affinity, seed):
+    """Same command line, CPU set, NUMA policy and folder as the killed run, with a new seed."""
+    new_argv = list(argv)
+    for i, arg in enumerate(new_argv[:-1]):
+        if arg.lstrip("-") == "iseed":
+            new_argv[i + 1] = str(seed)
+    if NUMA_ARGS[args.numa_policy]:
+        new_argv = ["numactl"] + NUMA_ARGS[args.numa_policy] + new_argv
+    with open(f"{args.logs}_s{seed}.out", "w") as out, open(f"{args.logs}_s{seed}.err", "w") as err:
+        return subprocess.Popen(new_argv, cwd=cwd, stdout=out, stderr=err,
+                                preexec_fn=(lambda: os.sched_setaffinity(0, affinity)) if affinity else None)
+
+
+# === MAIN ===
+os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+seeds = {}        # seed -> Seed
+killed = set()
+dying = {}        # pid -> (seed, argv, cwd, affinity, SIGKILL time): SIGTERM sent, waiting for the exit
+children = []     # respawned runs (reaped here)
+spares = list(range(args.spare_seeds[0], args.spare_seeds[0] + args.spare_seeds[1])) if args.spare_seeds else []
+deadline = None
+if args.walltime and quota.slurm_hours(args.walltime):
+    deadline = time.time() + 3600 * quota.slurm_hours(args.walltime)
+seen_any = False
+t_start = time.time()
+
+with open(args.output, "a", buffering=1) as out:
+    out.write(f"# host={os.uname().nodename} logs={args.logs} start={time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    out.write("# time seed pid action reason\n")
+
+    while True:
+        now = time.time()
+        procs = find_processes(args.command)
+        for seed in procs:
+            if seed not in seeds:
+                seeds[seed] = Seed(seed, now)
+        running = [seeds[s] for s in procs]
+        for s in running:
+            s.update(now)
+
+        rates = [s.sec_per_iter() for s in seeds.values() if s.iter and s.seed not in killed]
+        sibling = median(rates) if len(rates) >= args.min_siblings else None
+
+        for s in running:
+            reason = s.anomaly(now, sibling)
+            if reason is None or s.seed in killed:
+                continue
+            pid = procs[s.seed]
+            out.write(f"{int(now - t_start)} {s.seed} {pid} {'flag' if args.dry_run else 'kill'} {reason}\n")
+            if args.dry_run:
+                killed.add(s.seed)   # report once
+                continue
+            try:
+                argv, cwd = read_argv(pid), os.readlink(f"/proc/{pid}/cwd")
+                affinity = os.sched_getaffinity(pid)
+            except OSError:
+                continue
+            kill(pid)
+            killed.add(s.seed)
+            dying[pid] = (s.seed, argv, cwd, affinity, now + KILL_GRACE)
+            # Mark the seed: check_err.sh lists it with the other failed ones, and
+            # monitor.py / converge.py no longer count its log
+            with open(f"{args.logs}_s{s.seed}.err", "a") as f:
+                f.write(f"watchdog.py: killed ({reason})\n")
+            retire_log(s.seed)
+
+        # Killed seeds: SIGKILL after the grace time; once gone, their outputs are
+        # moved away and a fresh seed takes the freed cores
+        for pid, (seed, argv, cwd, affinity, t_kill) in list(dying.items()):
+            if alive(pid):
+                if now >= t_kill:
+                    kill(pid, signal.SIGKILL)
+                continue
+            del dying[pid]
+            moved = reject_outputs(seed, cwd)
+            if moved:
+                out.write(f"{int(now - t_start)} {seed} {pid} reject {moved} file(s) to {args.reject_dir}\n")
+
+            # A fresh seed, if it can finish before the walltime
+            if not spares:
+                continue
+            iterations = total_iterations(argv, cwd)
+            needed = sibling * iterations if sibling and iterations else 0
+            if deadline and time.time() + needed > deadline:
+                out.write(f"{int(now - t_start)} {seed} {pid} norespawn {needed:.0f} s needed, walltime too short\n")
+                continue
+            new_seed = spares.pop(0)
+            try:
+                child = respawn(argv, cwd, affinity, new_seed)
+            except OSError as e:
+                out.write(f"{int(now - t_start)} {new_seed} - failed {e}\n")
+                continue
+            children.append(child)
+            out.write(f"{int(now - t_start)} {new_seed} {child.pid} start replaces seed {seed}\n")
+
+        children = [c for c in children if c.poll() is None]
+        if procs or children or dying:
+            seen_any = True
+        elif seen_any or now - t_start > args.grace:
+            break
+
+        time.sleep(args.interval)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""Benchmark of the post-processing and plotting scripts on synthetic data.
+
+  python3 benchmark.py                      run small and medium, compare to the baseline
+  python3 benchmark.py --save-baseline      store the throughputs as the new baseline
+  python3 benchmark.py --sizes large --only load rebin
+
+For every size a synthetic tree is generated (synthdata.py) and each benchmark
+runs the functions of the scripts themselves: makeplot6.load_dat,
+rescale_dat_files.rescale_file, sum_dat_files.process_file,
+rebinning_selected_obs.rebinning_file, a combine-style merge of the per-seed
+files, and makeplot6 figures. Throughputs (rows/s, plots/s) below
+(1 - tolerance) x baseline are flagged and make the script exit with 1.
+Baselines depend on the machine: store one per machine (--baseline).
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+import synthdata
+
+# === CONFIG ===
+SIZES = {
+    "small":  {"observables": 4, "bins": 20,  "channels": [],                     "seeds": 2},
+    "medium": {"observables": 8, "bins": 100, "channels": ["bb", "gg"],           "seeds": 4},
+    "large":  {"observables": 8, "bins": 300, "channels": ["bb", "gg", "qq", "qg"], "seeds": 3},
+}
+PROCESSES = ["hbb14nnlo", "hcc14nnlo", "hgg14nnlo"]
+REBIN_EVERY = 4     # rebinning: merge groups of 4 bins
+PLOTS = 4           # figures drawn per size (they dominate the run time)
+
+
+def data_rows(files):
+    rows = 0
+    for path in files:
+        with open(path) as f:
+            rows += sum(1 for line in f if line.strip() and not line.startswith("#"))
+    return rows
+
+
+def load_columns(path):
+    """All columns of a .dat file (combine-style merge works on the full width)."""
+    return np.loadtxt(path, comments="#", ndmin=2)
+
+
+def combine_observable(process_dir, obs):
+    """Inverse-variance merge of the seeds of every part, then sum of the parts per order."""
+    parts = {}
+    for part in synthdata.PARTS["NNLO"]:
+        seeds = [load_columns(p) for p in sorted(glob.glob(os.path.join(process_dir, "nnlojet", part, f"{part}.{obs}.s*.dat")))]
+        stack = np.stack(seeds)
+        val, err = stack[:, :, 3::2], stack[:, :, 4::2]
+        w = np.where(err > 0, 1.0 / np.where(err > 0, err, 1.0) ** 2, 0.0)
+        wsum = w.sum(axis=0)
+        merged = stack[0].copy()
+        merged[:, 3::2] = np.divide((w * val).sum(axis=0), wsum, out=np.zeros_like(wsum), where=wsum > 0)
+        merged[:, 4::2] = np.divide(1.0, np.sqrt(wsum), out=np.zeros_like(wsum), where=wsum > 0)
+        parts[part] = merged
+    orders = {}
+    for order, order_parts in synthdata.PARTS.items():
+        total = parts[order_parts[0]].copy()
+        for part in order_parts[1:]:
+            total[:, 3::2] += parts[part][:, 3::2]
+            total[:, 4::2] = np.hypot(total[:, 4::2], parts[part][:, 4::2])
+        orders[order] = total
+    return orders
+
+
+# === BENCHMARKS ===
+# Each one returns the files (or plots) it processed; only the call is timed
+def bench_load(tree, out, size):
+    import makeplot6
+    files = glob.glob(os.path.join(tree, "*", "combined", "Final", "*.dat"))
+    for path in files:
+        makeplot6.load_dat(path)
+    return files
+
+
+def bench_rescale(tree, out, size):
+    import rescale_dat_files
+    files = glob.glob(os.path.join(tree, PROCESSES[0], "combined", "Final", "*.dat"))
+    for path in files:
+        rescale_dat_files.rescale_file(path, os.path.join(out, os.path.basename(path)), 0.0943)
+    return files
+
+
+def bench_sum(tree, out, size):
+    import sum_dat_files
+    dirs = [os.path.join(tree, p, "combined", "Final") for p in PROCESSES]
+    names = sorted(os.listdir(dirs[0]))
+    for name in names:
+        sum_dat_files.process_file(name, dirs, out)
+    return [os.path.join(d, n) for d in dirs for n in names]
+
+
+def bench_rebin(tree, out, size):
+    import rebinning_selected_obs
+    cuts = list(range(0, size["bins"], REBIN_EVERY)) + [size["bins"] - 1]
+    files = glob.glob(os.path.join(tree, PROCESSES[0], "combined", "Final", "*.dat"))
+    for path in files:
+        rebinning_selected_obs.rebinning_file(path, os.path.join(out, os.path.basename(path)), cuts)
+    return files
+
+
+def bench_combine(tree, out, size):
+    process_dir = os.path.join(tree, PROCESSES[0])
+    files = glob.glob(os.path.join(process_dir, "nnlojet", "*", "*.dat"))
+    for i in range(size["observables"]):
+        combine_observable(process_dir, f"obs{i:02d}")
+    return files
+
+
+def bench_plot(tree, out, size):
+    import makeplot6
+    final = os.path.join(tree, PROCESSES[0], "combined", "Final")
+    items = []
+    for i in range(min(PLOTS, size["observables"])):
+        obs = f"obs{i:02d}"
+        args = makeplot6.parser.parse_args(["--path", final, "--input", f"LO.{obs}.dat", f"NLO.{obs}.dat", f"NNLO.{obs}.dat",
+                                            "--output", os.path.join(out, f"{obs}.png"), "--add-ratios", "1",
+                                            "--histogram", "--config-path", out])
+        makeplot6.save_figure(makeplot6.make_figure(args), args)
+        items.append(obs)
+    return items
+
+
+BENCHMARKS = {
+    "load": (bench_load, "rows/s"),
+    "rescale": (bench_rescale, "rows/s"),
+    "sum": (bench_sum, "rows/s"),
+    "rebin": (bench_rebin, "rows/s"),
+    "combine": (bench_combine, "rows/s"),
+    "plot": (bench_plot, "plots/s"),
+}
+
+
+def run_benchmark(name, tree, size, repeat):
+    func, unit = BENCHMARKS[name]
+    best = None
+    for _ in range(repeat):
+        out = tempfile.mkdtemp(dir=tree)
+        t0 = time.perf_counter()
+        # The scripts print one line per file: keep the output readable
+        with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            items = func(tree, out, size)
+        seconds = time.perf_counter() - t0
+        shutil.rmtree(out)
+        best = seconds if best is None else min(best, seconds)
+    work = len(items) if unit == "plots/s" else data_rows(items)
+    return {"seconds": best, "work": work, "unit": unit, "throughput": work / best if best > 0 else 0.0}
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the NNLOJET post-processing and plotting scripts on synthetic data")
+    parser.add_argument('--sizes', nargs='+', default=["small", "medium"], choices=list(SIZES), help="Data sizes (default small medium)")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions, the fastest is kept (default 3)")
+    parser.add_argument('--baseline', default="benchmark_baseline.json", help="Baseline file (default benchmark_baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="Store this run as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed throughput loss before flagging (default 0.2)")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--workdir', help="Folder for the synthetic trees (default: a temporary folder, removed at the end)")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    if shutil.which("latex") is None:
+        import makeplot6
+        makeplot6.PLOT_STYLE["text.usetex"] = False
+        print("Note: latex not found, plotting benchmark without usetex")
+
+    baseline = {}
+    if os.path.isfile(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get("results", {})
+    elif not args.save_baseline:
+        print(f"Note: no baseline {args.baseline} yet, run with --save-baseline to create it")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="nnlojet-bench-")
+    results = {}
+    regressions = []
+    try:
+        for size_name in args.sizes:
+            size = SIZES[size_name]
+            tree = os.path.join(workdir, size_name)
+            if not os.path.isdir(tree):
+                synthdata.generate(tree, PROCESSES, size["observables"], size["bins"], channels=size["channels"],
+                                   seeds=size["seeds"])
+            print(f"\n== {size_name}: {size['observables']} observables, {size['bins']} bins, "
+                  f"channels {size['channels'] or '-'}, {size['seeds']} seeds")
+            print(f"   {'benchmark':<10} {'time [s]':>10} {'throughput':>14} {'unit':<8} {'vs baseline':>12}")
+            results[size_name] = {}
+            for name in args.only or BENCHMARKS:
+                r = run_benchmark(name, tree, size, args.repeat)
+                results[size_name][name] = r
+                ref = baseline.get(size_name, {}).get(name)
+                flag = ""
+                if ref and ref["throughput"] > 0:
+                    ratio = r["throughput"] / ref["throughput"]
+                    flag = f"{ratio:>11.2f}x"
+                    if ratio < 1 - args.tolerance:
+                        flag += "  REGRESSION"
+                        regressions.append(f"{size_name}/{name}: {ratio:.2f}x of baseline")
+                print(f"   {name:<10} {r['seconds']:>10.3f} {r['throughput']:>14.1f} {r['unit']:<8} {flag}")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    meta = {"host": platform.node(), "python": platform.python_version(), "numpy": np.__version__,
+            "date": time.strftime("%Y-%m-%d %H:%M:%S")}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=1)
+    if args.save_baseline:
+        # Keep the sizes/benchmarks not run this time
+        merged = dict(baseline)
+        for size_name, r in results.items():
+            merged.setdefault(size_name, {}).update(r)
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": meta, "results": merged}, f, indent=1)
+        print(f"\nBaseline written to: {args.baseline}")
+    if regressions:
+        print("\nThroughput regressions (tolerance {:.0f}%):".format(100 * args.tolerance))
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Regression comparison of two trees of NNLOJET results.
+
+  python3 compare_trees.py OLD NEW [--top 20] [--scales all] [--json report.json] [--fail-above 3]
+
+OLD and NEW are combined/Final folders, or folders containing several runs
+(<run>/combined/Final, e.g. hbb14nnlo, hgg15nnlo, tot13nnlo, ...): files are
+matched by their path relative to OLD and NEW. For every histogram (order x
+observable) and every compared column (tot_scale01 by default) the bins give
+
+  pull = (new - old) / sqrt(err_new^2 + err_old^2)
+
+from which chi2/ndf, the largest |pull| and the largest relative deviation
+|new/old - 1| are reported, most discrepant first. Files are loaded and
+compared in parallel worker processes (--jobs).
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import datfile
+
+SORT_KEYS = {"chi2": "chi2_ndf", "pull": "max_pull", "dev": "max_dev"}
+
+
+def final_dirs(root):
+    """{relative folder: path} of the combined/Final folders of root (root itself if it holds .dat files)."""
+    if glob.glob(os.path.join(root, "*.dat")):
+        return {".": root}
+    dirs = {}
+    for path in sorted(glob.glob(os.path.join(root, "**", "combined", "Final"), recursive=True)):
+        dirs[os.path.relpath(path, root)] = path
+    return dirs
+
+
+def file_pairs(old_root, new_root, pattern):
+    """Matched (relative name, old path, new path) and the names found on one side only."""
+    old_dirs, new_dirs = final_dirs(old_root), final_dirs(new_root)
+    pairs, missing = [], []
+    for rel in sorted(set(old_dirs) | set(new_dirs)):
+        old = {os.path.basename(p) for p in glob.glob(os.path.join(old_dirs[rel], pattern))} if rel in old_dirs else set()
+        new = {os.path.basename(p) for p in glob.glob(os.path.join(new_dirs[rel], pattern))} if rel in new_dirs else set()
+        for name in sorted(old | new):
+            label = os.path.normpath(os.path.join(rel, name))
+            if name in old and name in new:
+                pairs.append((label, os.path.join(old_dirs[rel], name), os.path.join(new_dirs[rel], name)))
+            else:
+                missing.append((label, "old" if name in old else "new"))
+    return pairs, missing
+
+
+def compared_columns(names, scales):
+    """(value, error) column names to compare: tot_scale01 or every tot_scaleNN with an error."""
+    pairs = [(names[v], names[e]) for v, e in datfile.value_error_pairs(names, ["tot"]) if e is not None]
+    return pairs if scales == "all" else pairs[:1]
+
+
+def compare(job):
+    """Statistics of one matched file pair (runs in a worker process)."""
+    label, old_path, new_path, scales = job
+    result = {"file": label, "error": None}
+    try:
+        names = datfile.columns(old_path)
+        columns = compared_columns(names, scales)
+        wanted = ["lower", "upper"] + [c for pair in columns for c in pair]
+        old, new = datfile.load(old_path, wanted), datfile.load(new_path, wanted)
+    except (OSError, KeyError, ValueError) as e:
+        result["error"] = str(e)
+        return result
+    if len(old["lower"]) != len(new["lower"]) or not (np.allclose(old["lower"], new["lower"])
+                                                      and np.allclose(old["upper"], new["upper"])):
+        result["error"] = "binning differs"
+        return result
+
+    val_old = np.stack([old[v] for v, _ in columns])     # (columns, bins)
+    val_new = np.stack([new[v] for v, _ in columns])
+    sigma = np.hypot(np.stack([old[e] for _, e in columns]), np.stack([new[e] for _, e in columns]))
+    diff = val_new - val_old
+    has_err = sigma > 0
+    pull = np.divide(diff, sigma, out=np.zeros_like(diff), where=has_err)
+    dev = np.divide(np.abs(diff), np.abs(val_old), out=np.zeros_like(diff), where=val_old != 0)
+    ndf = int(has_err.sum())
+    worst = np.unravel_index(np.argmax(np.abs(pull)), pull.shape) if pull.size else (0, 0)
+    result.update(
+        bins=int(val_old.shape[1]), ndf=ndf,
+        chi2_ndf=float((pull[has_err] ** 2).sum() / ndf) if ndf else 0.0,
+        max_pull=float(np.abs(pull).max()) if pull.size else 0.0,
+        max_dev=float(dev.max()) if dev.size else 0.0,
+        worst_column=columns[worst[0]][0] if columns else None, worst_bin=int(worst[1]),
+    )
+    return result
+
+
+def print_report(results, missing, top, sort):
+    failed = [r for r in results if r["error"]]
+    ok = sorted((r for r in results if not r["error"]), key=lambda r: -r[SORT_KEYS[sort]])
+    print(f"{len(results)} histogram(s) compared, {len(failed)} not comparable, {len(missing)} on one side only")
+    print(f"\n{'chi2/ndf':>9} {'ndf':>5} {'max|pull|':>10} {'max dev':>9}  {'worst bin':<22} histogram")
+    for r in ok[:top]:
+        worst = f"{r['worst_column']}[{r['worst_bin']}]"
+        print(f"{r['chi2_ndf']:>9.2f} {r['ndf']:>5} {r['max_pull']:>10.2f} {100 * r['max_dev']:>8.2f}%  {worst:<22} {r['file']}")
+    if failed:
+        print("\nNot comparable:")
+        for r in failed:
+            print(f"  {r['file']}: {r['error']}")
+    if missing:
+        print("\nOnly in one tree:")
+        for label, side in missing:
+            print(f"  {label} ({side})")
+    return ok
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two trees of NNLOJET combined/Final results: pulls, chi2/ndf, deviations")
+    parser.add_argument('old', help="Reference tree (combined/Final folder or folder of runs)")
+    parser.add_argument('new', help="New tree, same layout")
+    parser.add_argument('--pattern', default="*.dat", help="Files to compare (default *.dat)")
+    parser.add_argument('--scales', choices=["central", "all"], default="central",
+                        help="Compare tot_scale01 only (default) or every tot_scaleNN column")
+    parser.add_argument('--sort', choices=list(SORT_KEYS), default="chi2", help="Ranking: chi2 (default), pull or dev")
+    parser.add_argument('--top', type=int, default=20, help="Histograms printed (default 20)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument('--json', help="Write all results to this JSON file")
+    parser.add_argument('--csv', help="Write all results to this CSV file")
+    parser.add_argument('--fail-above', type=float, help="Exit with 1 if a chi2/ndf is above this value")
+    args = parser.parse_args(argv)
+
+    pairs, missing = file_pairs(args.old, args.new, args.pattern)
+    if not pairs:
+        sys.exit(f"No matching .dat files in {args.old} and {args.new}")
+    jobs = [(label, old, new, args.scales) for label, old, new in pairs]
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(compare, jobs, chunksize=max(1, len(jobs) // (4 * args.jobs))))
+    else:
+        results = [compare(job) for job in jobs]
+
+    ranked = print_report(results, missing, args.top, args.sort)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"old": args.old, "new": args.new, "results": ranked,
+                       "not_comparable": [r for r in results if r["error"]],
+                       "missing": [{"file": l, "only_in": s} for l, s in missing]}, f, indent=1)
+        print(f"\nReport written to: {args.json}")
+    if args.csv:
+        fields = ["file", "bins", "ndf", "chi2_ndf", "max_pull", "max_dev", "worst_column", "worst_bin", "error"]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(ranked + [r for r in results if r["error"]])
+        print(f"CSV written to: {args.csv}")
+    if args.fail_above is not None and any(r["chi2_ndf"] > args.fail_above for r in ranked):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
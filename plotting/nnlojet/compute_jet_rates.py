@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""n-jet rates as a function of y_cut from the y_ij distributions.
+
+  python3 compute_jet_rates.py --path .. [--distributions y12_log y23_log y34_log]
+
+An event with transition values y12 > y23 > y34 has n jets at y_cut when
+y_{n,n+1} < y_cut < y_{n-1,n}, so with S_ij(y_cut) = sigma(y_ij > y_cut)
+
+  sigma_1 = sigma(y12 < y_cut),  sigma_n = S_{n-1,n} - S_{n,n+1},  sigma_{>=N} = S_{N-1,N} (last distribution)
+
+Each S is one reverse cumulative sum of (dsigma/dy x bin width) over the bins,
+evaluated at every bin edge, for every scale column (tot and channels) at
+once. Errors: bins are independent within a distribution (cumulative sums of
+err^2); the two distributions of a difference are added in quadrature.
+
+For every combined/Final folder below --path and every order with all the
+distributions, <ORDER>.R<n><suffix>.dat is written next to them (e.g.
+NNLO.R3_log.dat, x axis = y_cut in the variable of the distributions), in the
+NNLOJET format read by makeplot6.py. The distributions must share the binning.
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import datfile
+from compare_trees import final_dirs
+
+DISTRIBUTIONS = ["y12_log", "y23_log", "y34_log"]
+YIJ_RE = re.compile(r"^y(\d)(\d)(.*)$")
+
+
+def cumulative_above(data, pairs):
+    """S(e_j) = sum_{i>=j} x_i w_i at every edge e_0..e_B (last one 0), and its error; arrays (B+1, K)."""
+    width = data["upper"] - data["lower"]
+    xs = np.stack([data[v] for v, _ in pairs], axis=1) * width[:, None]
+    es = np.stack([data[e] if e else np.zeros_like(width) for _, e in pairs], axis=1) * width[:, None]
+    zero = np.zeros((1, len(pairs)))
+    value = np.concatenate([np.cumsum(xs[::-1], axis=0)[::-1], zero])
+    err2 = np.concatenate([np.cumsum(es[::-1] ** 2, axis=0)[::-1], zero])
+    return value, err2
+
+
+def cumulative_below(data, pairs):
+    """sigma(y < e_j) = sum_{i<j} x_i w_i at every edge and its error^2 (exact, no subtraction)."""
+    width = data["upper"] - data["lower"]
+    xs = np.stack([data[v] for v, _ in pairs], axis=1) * width[:, None]
+    es = np.stack([data[e] if e else np.zeros_like(width) for _, e in pairs], axis=1) * width[:, None]
+    zero = np.zeros((1, len(pairs)))
+    return np.concatenate([zero, np.cumsum(xs, axis=0)]), np.concatenate([zero, np.cumsum(es ** 2, axis=0)])
+
+
+def header_lines(path):
+    with open(path) as f:
+        return [line for line in f if line.startswith("#") and not line.startswith("#labels:")]
+
+
+def jet_rates(final, order, distributions):
+    """Write the rates of one order of one folder; returns (written files, error)."""
+    paths = [os.path.join(final, f"{order}.{d}.dat") for d in distributions]
+    try:
+        names = datfile.columns(paths[0])
+        for path in paths[1:]:
+            if datfile.columns(path) != names:
+                raise ValueError(f"{os.path.basename(path)}: columns differ from {os.path.basename(paths[0])}")
+        data = [datfile.load(path, names) for path in paths]
+        for d, path in zip(data[1:], paths[1:]):
+            if len(d["lower"]) != len(data[0]["lower"]) or not np.allclose(d["lower"], data[0]["lower"]):
+                raise ValueError(f"{os.path.basename(path)}: binning differs from {os.path.basename(paths[0])}")
+        pairs = [(names[v], names[e] if e is not None else None) for v, e in datfile.value_error_pairs(names)]
+        edges = np.append(data[0]["lower"], data[0]["upper"][-1])
+
+        first = int(YIJ_RE.match(distributions[0]).group(1))
+        suffix = YIJ_RE.match(distributions[0]).group(3)
+        above = [cumulative_above(d, pairs) for d in data]
+        rates = [(first, *cumulative_below(data[0], pairs))]
+        for k in range(len(data) - 1):
+            value = above[k][0] - above[k + 1][0]
+            rates.append((first + k + 1, value, above[k][1] + above[k + 1][1]))
+        rates.append((f"{first + len(data)}plus", *above[-1]))
+
+        head = header_lines(paths[0])
+        written = []
+        for n, value, err2 in rates:
+            obs = f"R{n}{suffix}"
+            rows = np.zeros((len(edges), len(names)))
+            for edge in datfile.EDGES:
+                rows[:, names.index(edge)] = edges   # x = y_cut
+            for k, (v, e) in enumerate(pairs):
+                rows[:, names.index(v)] = value[:, k]
+                if e:
+                    rows[:, names.index(e)] = np.sqrt(err2[:, k])
+            out = os.path.join(final, f"{order}.{obs}.dat")
+            with open(out, "w") as f:
+                for line in head:
+                    f.write(f"#name: {obs}\n" if line.startswith("#name:") else line)
+                f.write("#labels: " + " ".join(f"{name}[{i + 1}]" for i, name in enumerate(names)) + "\n")
+                for row in rows:
+                    f.write(" ".join(datfile.fmt(x) for x in row) + "\n")
+            written.append(out)
+        return written, None
+    except (OSError, KeyError, ValueError) as e:
+        return [], f"{final}/{order}: {e}"
+
+
+def run_job(job):
+    return jet_rates(*job)
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Jet rates vs y_cut from the y_ij distributions of NNLOJET")
+    parser.add_argument('--path', default="..", help="combined/Final folder, or folder of runs (default .., as DATADIR)")
+    parser.add_argument('--distributions', nargs='+', default=DISTRIBUTIONS,
+                        help=f"y_(n,n+1) distributions in increasing n, same binning (default {' '.join(DISTRIBUTIONS)})")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    matches = [YIJ_RE.match(d) for d in args.distributions]
+    if not all(matches) or any(int(m.group(2)) != int(m.group(1)) + 1 for m in matches) \
+            or any(int(b.group(1)) != int(a.group(1)) + 1 for a, b in zip(matches, matches[1:])):
+        parser.error("--distributions must be consecutive y_(n,n+1) names, e.g. y12_log y23_log y34_log")
+
+    jobs = []
+    for final in final_dirs(args.path).values():
+        orders = None
+        for d in args.distributions:
+            found = {name[:-len(f".{d}.dat")] for name in os.listdir(final) if name.endswith(f".{d}.dat")}
+            orders = found if orders is None else orders & found
+        jobs += [(final, order, args.distributions) for order in sorted(orders)]
+    print(f"Found {len(jobs)} folder/order combination(s) with {' '.join(args.distributions)}")
+
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(run_job, jobs))
+    else:
+        results = [run_job(job) for job in jobs]
+    written = 0
+    for files, error in results:
+        if error:
+            print(f"❌ Skipping {error}")
+        written += len(files)
+    print(f"[✓] Wrote {written} jet-rate file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Column layout of NNLOJET .dat files, read from the '#labels:' header.
+
+  #labels: lower[1] center[2] upper[3] tot_scale01[4] tot_scale01_Err[5] ... <channel>_scale07_Err[N]
+
+Files written by combine with the channel breakdown (or with all 7 scales)
+are much wider than the 11 columns the scripts used to assume, so positions
+are always looked up by name here:
+  - columns(path)             column names of a file (DEFAULT_COLUMNS without header)
+  - load(path, names)         only the requested columns, as NumPy arrays
+  - value_error_pairs(names)  (value, error) index pairs of every *_scaleNN column
+  - data_rows(lines, ...)     token lists of the data lines, checked against the header
+Writers keep every token they do not change, so unknown columns survive.
+"""
+
+import re
+
+import numpy as np
+
+# Layout of files without a '#labels:' header
+DEFAULT_COLUMNS = [
+    "lower", "center", "upper",
+    "tot_scale01", "tot_scale01_Err",
+    "tot_scale02", "tot_scale02_Err",
+    "tot_scale03", "tot_scale03_Err",
+    "tot_scale04", "tot_scale04_Err",
+]
+EDGES = ["lower", "center", "upper"]
+
+LABEL_RE = re.compile(r"^(.+)\[(\d+)\]$")
+SCALE_RE = re.compile(r"_scale\d+$")
+
+
+def parse_labels(line):
+    """'#labels: lower[1] center[2] ...' -> ['lower', 'center', ...] (ordered by the [index])"""
+    cols = {}
+    for token in line.split(":", 1)[1].split():
+        m = LABEL_RE.match(token)
+        if m:
+            cols[int(m.group(2))] = m.group(1)
+        else:
+            cols[len(cols) + 1] = token
+    names = [cols[i] for i in sorted(cols)]
+    # Bin edges may carry the observable name (e.g. ptz_lower): use the plain names
+    for i, edge in enumerate(EDGES):
+        if i < len(names) and names[i].endswith(edge):
+            names[i] = edge
+    return names
+
+
+def header_columns(lines):
+    """Column names from the header lines of a file, or None."""
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("#labels:"):
+            return parse_labels(stripped[1:])
+        if stripped and not stripped.startswith("#"):
+            break
+    return None
+
+
+def file_columns(lines):
+    """Column names of the lines of a file: the header, or DEFAULT_COLUMNS (then col<N>)
+    up to the width of the first data row for a missing or short header."""
+    names = header_columns(lines) or []
+    width = 0
+    for line in lines:
+        stripped = line.strip()
+        if stripped and not stripped.startswith("#"):
+            width = len(stripped.split())
+            break
+    if not names:
+        names = list(DEFAULT_COLUMNS[:width or len(DEFAULT_COLUMNS)])
+    for i in range(len(names), width):
+        names.append(DEFAULT_COLUMNS[i] if i < len(DEFAULT_COLUMNS) else f"col{i + 1}")
+    return names
+
+
+def columns(path):
+    """Column names of a .dat file (see file_columns)."""
+    lines = []
+    with open(path) as f:
+        for line in f:
+            lines.append(line)
+            if line.strip() and not line.lstrip().startswith("#"):
+                break
+    return file_columns(lines)
+
+
+def index(names, name, path=""):
+    try:
+        return names.index(name)
+    except ValueError:
+        raise KeyError(f"{path}: no column {name} (columns: {' '.join(names)})") from None
+
+
+def value_error_pairs(names, prefixes=None):
+    """(value index, error index or None) of every <prefix>_scaleNN column, e.g. [(3, 4), (5, 6), ...].
+
+    prefixes restricts the columns, e.g. ["tot"] for tot_scaleNN only.
+    """
+    pairs = []
+    for i, name in enumerate(names):
+        if not SCALE_RE.search(name):
+            continue
+        if prefixes is not None and name.rsplit("_scale", 1)[0] not in prefixes:
+            continue
+        err = f"{name}_Err"
+        pairs.append((i, names.index(err) if err in names else None))
+    return pairs
+
+
+def data_rows(lines, names, path=""):
+    """(line number, tokens) of the data lines; rows shorter than the header are an error."""
+    rows = []
+    for lineno, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        tokens = stripped.split()
+        if len(tokens) < len(names):
+            raise ValueError(f"{path}:{lineno}: {len(tokens)} values, the header has {len(names)} columns")
+        rows.append((lineno, tokens))
+    return rows
+
+
+def load(path, names=None):
+    """{name: array} of the requested columns (all of them by default); only those are converted."""
+    with open(path) as f:
+        return parse(f.readlines(), names, path)
+
+
+def parse(lines, names=None, path=""):
+    """load() on the lines of a file (e.g. a member of a run archive, see runarchive.py)."""
+    cols = file_columns(lines)
+    wanted = cols if names is None else list(names)
+    idx = [index(cols, name, path) for name in wanted]
+    rows = [[tokens[i] for i in idx] for _, tokens in data_rows(lines, cols, path)]
+    data = np.array(rows, dtype=float).reshape(len(rows), len(idx))
+    return {name: data[:, k] for k, name in enumerate(wanted)}
+
+
+def fmt(x):
+    return f"{x:.11E}"
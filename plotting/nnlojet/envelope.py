@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Precomputed scale-variation envelopes of every histogram.
+
+  python3 envelope.py --path .. [--scales 01 02 03 04 05 06 07] [--reference NNLO]
+
+For every combined/Final folder below --path, each <ORDER>.<obs>.dat gets
+  lower, center, upper  bin edges (a plot from the cache does not open the .dat file)
+  central            tot_scale01
+  min, max           bin-wise envelope of the scale columns (all tot_scaleNN of the file by default)
+  rel_min, rel_max   min/central, max/central
+  ref_central, ref_min, ref_max   central/min/max divided by the central of the --reference order
+                     (same observable, same folder), i.e. the ratio-plot band
+Files of the same shape are stacked and reduced in one NumPy call. The arrays
+go to <Final>/envelope.npz with the size/mtime of each source file; a rerun
+only recomputes changed files, and readers (read(), makeplot6.py --envelope
+cache) ignore stale entries.
+"""
+
+import argparse
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import datfile
+
+CACHE_NAME = "envelope.npz"
+FIELDS = ["lower", "center", "upper", "central", "min", "max", "rel_min", "rel_max", "ref_central", "ref_min", "ref_max"]
+
+
+def scale_columns(names, scales=None):
+    """tot_scaleNN column names of a file, restricted to the scale numbers in scales ("02", ...)."""
+    cols = [names[v] for v, _ in datfile.value_error_pairs(names, ["tot"])]
+    if scales:
+        cols = [c for c in cols if c.rsplit("_scale", 1)[1] in scales]
+    return cols
+
+
+def stamp(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def safe_ratio(num, den):
+    out = np.full(np.broadcast(num, den).shape, np.nan)
+    np.divide(num, den, out=out, where=den != 0)
+    return out
+
+
+def compute(paths, scales):
+    """{file name: {field: array}} for the files of one folder (no reference ratios yet).
+
+    Files without bin edges (<ORDER>.cross.dat) have no envelope and are left out.
+    """
+    loaded = {}
+    for path in paths:
+        names = datfile.columns(path)
+        if not all(edge in names for edge in datfile.EDGES):
+            continue
+        cols = scale_columns(names, scales)
+        if "tot_scale01" not in cols:
+            cols = ["tot_scale01"] + cols
+        d = datfile.load(path, datfile.EDGES + cols)
+        loaded[os.path.basename(path)] = (d, np.stack([d[c] for c in cols]))
+    # Same (scales, bins) shape -> one stacked reduction
+    groups = {}
+    for name, (_, values) in loaded.items():
+        groups.setdefault(values.shape, []).append(name)
+    result = {}
+    for names in groups.values():
+        stacked = np.stack([loaded[n][1] for n in names])           # (files, scales, bins)
+        central = np.stack([loaded[n][0]["tot_scale01"] for n in names])
+        low, high = stacked.min(axis=1), stacked.max(axis=1)
+        rel_min, rel_max = safe_ratio(low, central), safe_ratio(high, central)
+        for i, n in enumerate(names):
+            result[n] = {edge: loaded[n][0][edge] for edge in datfile.EDGES}
+            result[n].update({"central": central[i], "min": low[i], "max": high[i], "rel_min": rel_min[i], "rel_max": rel_max[i]})
+    return result
+
+
+def add_reference(entries, reference):
+    """ref_* fields: every order divided by the central of the reference order of the same observable."""
+    for name, e in entries.items():
+        order, rest = name.split(".", 1)
+        ref = entries.get(f"{reference}.{rest}")
+        if ref is None or len(ref["central"]) != len(e["central"]):
+            for field in ("ref_central", "ref_min", "ref_max"):
+                e.pop(field, None)
+            continue
+        e["ref_central"] = safe_ratio(e["central"], ref["central"])
+        e["ref_min"] = safe_ratio(e["min"], ref["central"])
+        e["ref_max"] = safe_ratio(e["max"], ref["central"])
+
+
+def load_cache(final):
+    """(meta, {file name: {field: array}}) of a folder's envelope.npz, empty if missing."""
+    try:
+        with np.load(os.path.join(final, CACHE_NAME)) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            entries = {}
+            for key in npz.files:
+                if key != "__meta__":
+                    name, field = key.rsplit("|", 1)
+                    entries.setdefault(name, {})[field] = npz[key]
+        return meta, entries
+    except (OSError, KeyError, ValueError):
+        return {}, {}
+
+
+def update_folder(job):
+    """Recompute the changed files of one folder and rewrite its cache; (folder, recomputed, skipped, total, error)."""
+    final, pattern, scales, reference, force = job
+    try:
+        paths = sorted(glob.glob(os.path.join(final, pattern)))
+        stamps = {os.path.basename(p): stamp(p) for p in paths}
+        meta, entries = load_cache(final)
+        settings = {"scales": scales, "reference": reference}
+        if force or meta.get("settings") != settings:
+            meta, entries = {}, {}
+        old = meta.get("files", {})
+        # Files without an entry but with the same stamp were skipped (no bin edges)
+        changed = [p for p in paths if old.get(os.path.basename(p)) != stamps[os.path.basename(p)]]
+        computed = compute(changed, scales)
+        entries = {n: e for n, e in entries.items() if n in stamps}
+        for path in changed:
+            entries.pop(os.path.basename(path), None)
+        entries.update(computed)
+        if reference:
+            add_reference(entries, reference)
+        arrays = {f"{n}|{field}": e[field] for n, e in entries.items() for field in FIELDS if field in e}
+        arrays["__meta__"] = np.array(json.dumps({"settings": settings, "files": stamps}))
+        tmp = os.path.join(final, f".{CACHE_NAME}.{os.getpid()}.tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, os.path.join(final, CACHE_NAME))
+        return final, len(computed), len(changed) - len(computed), len(paths), None
+    except (OSError, KeyError, ValueError) as e:
+        return final, 0, 0, 0, str(e)
+
+
+# Caches already read, per folder (makeplot6.py --batch reads each one once)
+_read_caches = {}
+
+
+def read(path):
+    """{field: array} of the cached envelope of a .dat file, or None when missing or stale."""
+    final, name = os.path.split(path)
+    cache = os.path.join(final, CACHE_NAME)
+    try:
+        key = stamp(cache)
+    except OSError:
+        return None
+    if _read_caches.get(final, (None,))[0] != key:
+        _read_caches[final] = (key, *load_cache(final))
+    _, meta, entries = _read_caches[final]
+    try:
+        if meta.get("files", {}).get(name) != stamp(path):
+            return None
+    except OSError:
+        return None
+    return entries.get(name)
+
+
+# === MAIN ===
+def main(argv=None):
+    from compare_trees import final_dirs
+
+    parser = argparse.ArgumentParser(description="Precompute the scale-variation envelopes of NNLOJET results (envelope.npz per folder)")
+    parser.add_argument('--path', default="..", help="combined/Final folder, or folder of runs (default .., as DATADIR)")
+    parser.add_argument('--pattern', default="*.dat", help="Files (default *.dat)")
+    parser.add_argument('--scales', nargs='+', help="Scale numbers of the envelope, e.g. 02 03 (default: every tot_scaleNN)")
+    parser.add_argument('--reference', default="NNLO", help="Order of the ratio envelopes (default NNLO, '' for none)")
+    parser.add_argument('--force', action='store_true', help="Recompute every file")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+    scales = sorted(f"{int(s):02d}" for s in args.scales) if args.scales else None
+
+    jobs = [(final, args.pattern, scales, args.reference, args.force) for final in final_dirs(args.path).values()]
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(update_folder, jobs))
+    else:
+        results = [update_folder(job) for job in jobs]
+    for final, changed, skipped, total, error in results:
+        if error:
+            print(f"❌ {final}: {error}")
+        else:
+            note = f", {skipped} without bin edges skipped" if skipped else ""
+            print(f"[✓] {os.path.join(final, CACHE_NAME)}: {changed} of {total} file(s) recomputed{note}")
+
+
+if __name__ == "__main__":
+    main()
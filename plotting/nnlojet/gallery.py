@@ -1,12 +1,29 @@
 #!/usr/bin/env python3
 
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+
+import gallery_page
+import plotmeta
 
 parser = argparse.ArgumentParser(description="Generate an interactive PDF plot gallery")
 parser.add_argument("--output", default="gallery.html", help="Output HTML file path")
 parser.add_argument("--input", nargs="+", required=True, help="List of folders with PDFs")
 parser.add_argument("--runcard-path", default="", help="Folder containing .run files")
+parser.add_argument("--thumb-dir", default="thumbs", help="Cache folder for the thumbnails (keyed by PDF hash and resolution)")
+parser.add_argument("--thumb-format", default="png", choices=["png", "webp"], help="Thumbnail format (webp needs Pillow)")
+parser.add_argument("--thumb-dpi", type=int, default=50, help="Resolution of the thumbnails")
+parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Parallel pdftoppm processes")
+parser.add_argument("--index", default="gallery.json", help="JSON index of the plots, updated incrementally")
+parser.add_argument("--makefile-dir", default=".", help="Folder of the Makefile providing the plot metadata")
+parser.add_argument("--page-size", type=int, default=24, help="Plots per page in the gallery")
 args = parser.parse_args()
 
 # List of folders to include
@@ -22,134 +39,141 @@ if not runcard_folder.is_dir():
 for runfile in runcard_folder.glob("*.run"):
     runcard_map[runfile.stem] = runfile
 
-page_title = "PDF Gallery: " + ", ".join(runcard_map.keys())
-#print(page_title)
-
-html = f"""
-<html>
-<head>
-    <title>{page_title}</title>
-    <style>
-        body {{ font-family: Arial, sans-serif; margin: 40px; }}
-        h1 {{ color: #333; }}
-        summary {{
-            font-size: 18px;
-            font-weight: bold;
-            cursor: pointer;
-            margin-top: 20px;
-        }}
-        .controls {{ margin-bottom: 20px; }}
-        .plot-grid {{
-            display: grid;
-            grid-gap: 20px;
-            margin-top: 10px;
-        }}
-        .plot-container {{
-            border: 1px solid #ccc;
-            border-radius: 10px;
-            padding: 10px;
-            position: relative;
-        }}
-        embed {{
-            border: 1px solid #aaa;
-            width: 100%;
-            height: 400px;
-        }}
-        h3 {{ margin-top: 0; }}
-        .clickable-title {{
-            color: #007BFF;
-            cursor: pointer;
-            text-decoration: underline;
-        }}
-        .clickable-title:hover {{
-            color: #0056b3;
-        }}
-        input[type="text"], select {{
-            padding: 10px;
-            font-size: 16px;
-            margin-right: 20px;
-        }}
-    </style>
-    <script>
-        function filterPlots() {{
-            const input = document.getElementById("searchInput").value.toLowerCase();
-            const plots = document.getElementsByClassName("plot-container");
-            for (let i = 0; i < plots.length; i++) {{
-                const name = plots[i].getAttribute("data-name").toLowerCase();
-                plots[i].style.display = name.includes(input) ? "" : "none";
-            }}
-        }}
-
-        function updateGrid() {{
-            const columns = document.getElementById("columnsSelect").value;
-            const grids = document.getElementsByClassName("plot-grid");
-            for (let i = 0; i < grids.length; i++) {{
-                grids[i].style.gridTemplateColumns = "repeat(" + columns + ", 1fr)";
-            }}
-        }}
-
-        function toggleFullscreen(id) {{
-            const el = document.getElementById(id);
-            if (!document.fullscreenElement) {{
-                el.requestFullscreen().catch(err => alert(`Error: ${{err.message}}`));
-            }} else {{
-                document.exitFullscreen();
-            }}
-        }}
-    </script>
-</head>
-<body>
-<h1>{page_title}</h1>
-
-<div class="controls">
-    <input type="text" id="searchInput" onkeyup="filterPlots()" placeholder="Search plots by filename...">
-    <label for="columnsSelect">Plots per row:</label>
-    <select id="columnsSelect" onchange="updateGrid()">
-        <option value="1">1</option>
-        <option value="2" selected>2</option>
-        <option value="3">3</option>
-        <option value="4">4</option>
-    </select>
-</div>
-"""
-
-# Folder loop
+# --- Thumbnails: rasterised once per PDF content, in parallel ---
+thumb_dir = Path(args.thumb_dir)
+thumb_dir.mkdir(parents=True, exist_ok=True)
+if shutil.which("pdftoppm") is None:
+    raise RuntimeError("pdftoppm (poppler-utils) is required to rasterise the thumbnails")
+
+thumb_format = args.thumb_format
+if thumb_format == "webp":
+    try:
+        from PIL import Image
+    except ImportError:
+        print("Warning: Pillow not available, using PNG thumbnails")
+        thumb_format = "png"
+
+def pdf_hash(pdf_file):
+    h = hashlib.sha1()
+    with open(pdf_file, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def make_thumbnail(pdf_file, thumb_file):
+    """First page of pdf_file -> thumb_file (skipped if the cached one exists)."""
+    if thumb_file.exists():
+        return False
+    # Private folder per call: the threads never share a temporary file
+    tmp_dir = Path(tempfile.mkdtemp(prefix=".tmp", dir=thumb_file.parent))
+    try:
+        subprocess.run(["pdftoppm", "-png", "-singlefile", "-r", str(args.thumb_dpi), str(pdf_file), str(tmp_dir / "thumb")],
+                       check=True)
+        tmp_png = tmp_dir / "thumb.png"
+        if thumb_format == "webp":
+            Image.open(tmp_png).save(tmp_dir / "thumb.webp", "WEBP", quality=85)
+            (tmp_dir / "thumb.webp").replace(thumb_file)
+        else:
+            tmp_png.replace(thumb_file)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return True
+
+# --- Index: only folders whose PDFs changed (name, size, mtime) are scanned again ---
+index_path = Path(args.index)
+index = {"folders": {}}
+if index_path.is_file():
+    with open(index_path) as f:
+        index = json.load(f)
+
+def folder_signature(pdf_files):
+    return [[p.name, p.stat().st_size, p.stat().st_mtime_ns] for p in pdf_files]
+
+changed = {}
 for folder in folders:
     folder_path = Path(folder)
     if not folder_path.is_dir():
         print(f"Warning: folder '{folder}' not found. Skipping.")
         continue
+    pdf_files = sorted(folder_path.glob("*.pdf"))
+    signature = folder_signature(pdf_files)
+    cached = index["folders"].get(folder)
+    if (cached is None or cached["signature"] != signature or cached.get("thumb_format") != thumb_format
+            or cached.get("thumb_dpi") != args.thumb_dpi):
+        changed[folder] = (pdf_files, signature, cached)
+
+# Metadata of the changed folders from the Makefile, with a single make call
+try:
+    folder_type = plotmeta.folder_types(args.makefile_dir) if changed else {}
+    wanted = [(p.stem, folder_type[Path(folder).as_posix()])
+              for folder, (pdf_files, _, _) in changed.items() if Path(folder).as_posix() in folder_type
+              for p in pdf_files]
+    metadata = plotmeta.plot_metadata(wanted, args.makefile_dir) if wanted else {}
+except (OSError, subprocess.CalledProcessError) as e:
+    print(f"Warning: no plot metadata from the Makefile ({e})")
+    folder_type, metadata = {}, {}
+
+jobs = []
+for folder, (pdf_files, signature, cached) in changed.items():
+    # Reuse the hashes of PDFs that did not change
+    old = {e["name"]: e for e in cached["plots"]} if cached else {}
+    plot_type = folder_type.get(Path(folder).as_posix(), "")
+    plots = []
+    for pdf_file, (_, size, mtime) in zip(pdf_files, signature):
+        prev = old.get(pdf_file.stem)
+        digest = prev["hash"] if prev and prev["size"] == size and prev["mtime"] == mtime else pdf_hash(pdf_file)
+        thumb_file = thumb_dir / f"{digest}-{args.thumb_dpi}dpi.{thumb_format}"
+        jobs.append((pdf_file, thumb_file))
+        meta = metadata.get((pdf_file.stem, plot_type), {})
+        process, energy = plotmeta.split_type(plot_type) if plot_type else ("", "")
+        runcard = runcard_map.get(pdf_file.stem)
+        plots.append({
+            "name": pdf_file.stem,
+            "folder": folder,
+            "pdf": f"{folder}/{pdf_file.name}",
+            "thumb": thumb_file.as_posix(),
+            "hash": digest, "size": size, "mtime": mtime,
+            "observable": pdf_file.stem,
+            "type": plot_type,
+            "process": meta.get("process", process),
+            "energy": meta.get("energy", energy),
+            "config": meta.get("config", ""),
+            "inputs": [f"{meta['datadir']}{p}" for p in meta.get("inputs", [])],
+            "runcard": str(runcard) if runcard else "",
+        })
+    index["folders"][folder] = {"signature": signature, "thumb_format": thumb_format, "thumb_dpi": args.thumb_dpi,
+                                "plots": plots}
+
+# Cached folders may have lost their thumbnails (thumbs/ cleaned)
+for folder in folders:
+    if folder in index["folders"] and folder not in changed:
+        for e in index["folders"][folder]["plots"]:
+            thumb_file = Path(e["thumb"])
+            if not thumb_file.exists():
+                jobs.append((Path(e["pdf"]), thumb_file))
+
+# Identical PDFs share a thumbnail: one job per thumbnail file
+jobs = list({thumb_file: (pdf_file, thumb_file) for pdf_file, thumb_file in jobs}.values())
+with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+    n_new = sum(pool.map(lambda job: make_thumbnail(*job), jobs))
+print(f"Index: {len(changed)} folder(s) rescanned, {len(index['folders']) - len(changed)} from {index_path}")
+print(f"Thumbnails: {n_new} rasterised ({thumb_dir})")
+
+# Drop folders that are not part of this gallery any more
+index["folders"] = {folder: index["folders"][folder] for folder in folders if folder in index["folders"]}
+tmp = index_path.with_name(index_path.name + ".tmp")
+with open(tmp, "w") as f:
+    json.dump(index, f, indent=1)
+tmp.replace(index_path)
+
+# --- Static page: the index is inlined, filters and pagination run in the browser ---
+page_title = "PDF Gallery: " + ", ".join(runcard_map.keys())
+plots = [e for folder in folders if folder in index["folders"] for e in index["folders"][folder]["plots"]]
 
-    html += f"<details open><summary>{folder}</summary>\n"
-    html += '<div class="plot-grid" style="grid-template-columns: repeat(2, 1fr);">\n'
-
-    for i, pdf_file in enumerate(sorted(folder_path.glob("*.pdf"))):
-        relative_path = f"{folder}/{pdf_file.name}"
-        base_name = pdf_file.stem
-        embed_id = f"embed_{folder.replace('/', '_')}_{i}"
-        runcard = runcard_map.get(base_name)
-
-        if runcard:
-            title_html = f'<a href="{runcard}" target="_blank" class="clickable-title">{runcard.name}</a>'
-        else:
-            title_html = f'<span class="clickable-title">{pdf_file.name}</span>'
-
-        html += f"""
-        <div class="plot-container" data-name="{pdf_file.name}">
-            <h3 onclick="toggleFullscreen('{embed_id}')">{title_html}</h3>
-            <embed id="{embed_id}" src="{relative_path}" type="application/pdf">
-        </div>
-        """
-
-    html += "</div></details>\n"
-
-html += """
-</body>
-</html>
-"""
+html = gallery_page.render(page_title, plots, args.page_size)
 
 # Write to file
 with open(output_html_path, "w") as f:
     f.write(html)
 
-print(f"Gallery saved to: {output_html_path}")
+print(f"Gallery saved to: {output_html_path} ({len(plots)} plots)")
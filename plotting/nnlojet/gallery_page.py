@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Static gallery page shared by gallery.py and plotserver.py.
+
+The plot index is inlined as JSON; facets, search and pagination run in the
+browser, so the page also works when opened from disk (file://).
+"""
+
+import json
+
+# Fields of the index entries used by the page
+FIELDS = ["name", "folder", "pdf", "thumb", "observable", "type", "process", "energy", "config", "inputs", "runcard"]
+
+TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>@TITLE@</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; }
+        h1 { color: #333; }
+        .layout { display: flex; gap: 30px; }
+        .facets { min-width: 200px; }
+        .facets fieldset { border: 1px solid #ccc; border-radius: 10px; margin-bottom: 15px; max-height: 300px; overflow-y: auto; }
+        .facets label { display: block; font-size: 14px; }
+        .facets .count { color: #888; }
+        .main { flex-grow: 1; }
+        .controls { margin-bottom: 20px; }
+        .plot-grid { display: grid; grid-gap: 20px; grid-template-columns: repeat(2, 1fr); }
+        .plot-container { border: 1px solid #ccc; border-radius: 10px; padding: 10px; }
+        .plot-container .meta { font-size: 12px; color: #555; }
+        .plot-container details { font-size: 12px; }
+        img.thumb { border: 1px solid #aaa; width: 100%; height: auto; cursor: zoom-in; }
+        h3 { margin-top: 0; }
+        .clickable-title { color: #007BFF; cursor: pointer; text-decoration: underline; }
+        .clickable-title:hover { color: #0056b3; }
+        input[type="text"], select { padding: 10px; font-size: 16px; margin-right: 20px; }
+        .pager button { margin: 20px 5px; padding: 5px 10px; }
+    </style>
+</head>
+<body>
+<h1>@TITLE@</h1>
+<div class="layout">
+    <div class="facets" id="facets"></div>
+    <div class="main">
+        <div class="controls">
+            <input type="text" id="searchInput" placeholder="Search plots, configs, inputs...">
+            <label for="columnsSelect">Plots per row:</label>
+            <select id="columnsSelect">
+                <option value="1">1</option>
+                <option value="2" selected>2</option>
+                <option value="3">3</option>
+                <option value="4">4</option>
+            </select>
+            <span id="matches"></span>
+        </div>
+        <div class="plot-grid" id="grid"></div>
+        <div class="pager" id="pager"></div>
+    </div>
+</div>
+<script type="application/json" id="gallery-index">@INDEX@</script>
+<script>
+const PLOTS = JSON.parse(document.getElementById("gallery-index").textContent);
+const PAGE_SIZE = @PAGE_SIZE@;
+const FACETS = [["process", "Process"], ["energy", "Energy"], ["type", "Type"], ["observable", "Observable"], ["folder", "Folder"]];
+let page = 0;
+
+function escapeHtml(s) {
+    return String(s).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+}
+
+function buildFacets() {
+    const box = document.getElementById("facets");
+    for (const [key, title] of FACETS) {
+        const counts = {};
+        for (const p of PLOTS) counts[p[key] || "-"] = (counts[p[key] || "-"] || 0) + 1;
+        const values = Object.keys(counts).sort();
+        if (values.length < 2) continue;
+        let html = "<fieldset><legend>" + title + "</legend>";
+        for (const v of values) {
+            html += '<label><input type="checkbox" data-facet="' + key + '" value="' + escapeHtml(v) + '"> '
+                  + escapeHtml(v) + ' <span class="count">(' + counts[v] + ")</span></label>";
+        }
+        box.innerHTML += html + "</fieldset>";
+    }
+    box.addEventListener("change", () => { page = 0; render(); });
+}
+
+function selected() {
+    const sel = {};
+    for (const cb of document.querySelectorAll("#facets input:checked")) {
+        (sel[cb.dataset.facet] = sel[cb.dataset.facet] || new Set()).add(cb.value);
+    }
+    return sel;
+}
+
+function matches(p, sel, text) {
+    for (const key in sel) if (!sel[key].has(p[key] || "-")) return false;
+    if (!text) return true;
+    return [p.name, p.folder, p.config, p.runcard].concat(p.inputs).join(" ").toLowerCase().includes(text);
+}
+
+function card(p) {
+    const title = p.runcard
+        ? '<a href="' + escapeHtml(p.runcard) + '" target="_blank" class="clickable-title">' + escapeHtml(p.runcard.split("/").pop()) + "</a>"
+        : '<span class="clickable-title">' + escapeHtml(p.name) + ".pdf</span>";
+    const meta = [p.process, p.energy, p.folder].filter(x => x).map(escapeHtml).join(" &middot; ");
+    let details = "";
+    if (p.config || p.inputs.length) {
+        details = "<details><summary>config and inputs</summary>" + escapeHtml(p.config) + "<br>"
+                + p.inputs.map(escapeHtml).join("<br>") + "</details>";
+    }
+    return '<div class="plot-container"><h3>' + title + '</h3><div class="meta">' + meta + "</div>"
+         + '<a href="' + escapeHtml(p.pdf) + '" target="_blank"><img class="thumb" src="' + escapeHtml(p.thumb)
+         + '" loading="lazy" alt="' + escapeHtml(p.name) + '"></a>' + details + "</div>";
+}
+
+function render() {
+    const sel = selected();
+    const text = document.getElementById("searchInput").value.toLowerCase();
+    const hits = PLOTS.filter(p => matches(p, sel, text));
+    const pages = Math.max(1, Math.ceil(hits.length / PAGE_SIZE));
+    page = Math.min(page, pages - 1);
+    document.getElementById("grid").innerHTML = hits.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).map(card).join("");
+    document.getElementById("matches").textContent = hits.length + " / " + PLOTS.length + " plots";
+    let pager = "";
+    if (pages > 1) {
+        pager += '<button onclick="gotoPage(' + (page - 1) + ')"' + (page === 0 ? " disabled" : "") + ">&lt;</button>";
+        pager += "page " + (page + 1) + " / " + pages;
+        pager += '<button onclick="gotoPage(' + (page + 1) + ')"' + (page === pages - 1 ? " disabled" : "") + ">&gt;</button>";
+    }
+    document.getElementById("pager").innerHTML = pager;
+}
+
+function gotoPage(p) { page = p; render(); window.scrollTo(0, 0); }
+
+document.getElementById("searchInput").addEventListener("input", () => { page = 0; render(); });
+document.getElementById("columnsSelect").addEventListener("change", e => {
+    document.getElementById("grid").style.gridTemplateColumns = "repeat(" + e.target.value + ", 1fr)";
+});
+buildFacets();
+render();
+</script>
+</body>
+</html>
+"""
+
+
+def render(title, plots, page_size=24):
+    """HTML page for the index entries in plots."""
+    plots_json = json.dumps([{k: e.get(k, [] if k == "inputs" else "") for k in FIELDS} for e in plots]).replace("</", "<\\/")
+    return TEMPLATE.replace("@TITLE@", title).replace("@PAGE_SIZE@", str(page_size)).replace("@INDEX@", plots_json)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Import-time budget of makeplot6.py (python -X importtime, Python >= 3.7).
+
+Measures what a single plot imports (makeplot6 + matplotlib.pyplot with Agg),
+prints the slowest top-level imports and fails if the total exceeds the
+budget or if a module that makeplot6 must not need (pandas, ...) is loaded.
+
+  python3 import_budget.py [--budget-ms 1000] [--repeat 3]
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+parser = argparse.ArgumentParser(description="Check the import-time budget of makeplot6.py")
+parser.add_argument('--budget-ms', type=float, default=1000, help="Maximum total import time in ms (default 1000)")
+parser.add_argument('--repeat', type=int, default=3, help="Measurements, the fastest one is used (default 3)")
+parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to print (default 10)")
+parser.add_argument('--forbid', nargs='*', default=["pandas", "scipy", "tkinter", "PyQt5", "PySide2"],
+                    help="Modules that must not be imported by a plot")
+args = parser.parse_args()
+
+# What one plot needs: the module itself and pyplot (imported lazily by make_figure)
+SNIPPET = "import makeplot6; makeplot6.pyplot()"
+# import time: self [us] | cumulative | imported package
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def measure():
+    """Top-level imports {module: cumulative us} and the set of all imported modules."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", SNIPPET], cwd=str(Path(__file__).parent),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode != 0:
+        sys.exit(f"Import failed:\n{proc.stderr}")
+    top, modules = {}, set()
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        modules.add(m.group(4))
+        # One space of indentation = imported at top level
+        if len(m.group(3)) <= 1:
+            top[m.group(4)] = int(m.group(2))
+    return top, modules
+
+
+# === MAIN ===
+if sys.version_info < (3, 7):
+    sys.exit("python -X importtime needs Python >= 3.7")
+
+runs = [measure() for _ in range(args.repeat)]
+top, modules = min(runs, key=lambda run: sum(run[0].values()))
+total_ms = sum(top.values()) / 1000
+
+print(f"{'module':<40} {'cumulative':>12}")
+for name, us in sorted(top.items(), key=lambda kv: -kv[1])[:args.top]:
+    print(f"{name:<40} {us / 1000:>10.1f}ms")
+print(f"{'TOTAL':<40} {total_ms:>10.1f}ms  (budget {args.budget_ms:.0f}ms)")
+
+forbidden = sorted(m for m in args.forbid if m in modules)
+if forbidden:
+    sys.exit(f"FAIL: makeplot6 imports {', '.join(forbidden)}")
+if total_ms > args.budget_ms:
+    sys.exit(f"FAIL: import time {total_ms:.0f}ms over budget {args.budget_ms:.0f}ms")
+print("OK")
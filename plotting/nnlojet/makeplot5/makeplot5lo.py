@@ -55,7 +55,8 @@ plt.rcParams.update({
 })
 
 def load_df(filename):
-    df = pd.read_csv(filename, sep=r"\s+", comment="#", header=None)
+    # Only the first 9 columns: wider files (all scales, channel breakdown) load too
+    df = pd.read_csv(filename, sep=r"\s+", comment="#", header=None, usecols=range(9))
     df.columns = [
         "lower", "center", "upper",
         "tot_scale01", "tot_scale01_Err",
@@ -1,19 +1,22 @@
 #!/usr/bin/env python3
 
-from matplotlib.transforms import Bbox
-import pandas as pd
+# Start-up matters (one process per plot from the Makefile): no pandas, and
+# matplotlib is only imported when a figure is drawn (see pyplot(), import_budget.py)
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import gridspec
 import argparse
 import os
 import ast
+import shlex
+import sys
 import warnings
 
+import datfile
+import profiling
+
 # --- Parse command-line arguments ---
 parser = argparse.ArgumentParser(description="Plot LO, NLO and NNLO differential cross sections from NNLOJET")
 parser.add_argument('--path', default="combined/Final", help="Input common path (usually combined/Final)")
-parser.add_argument('--input', nargs='+', required=True, help="List of input filenames (e.g. first LO, second NLO, third NNLO)")
+parser.add_argument('--input', nargs='+', help="List of input filenames (e.g. first LO, second NLO, third NNLO)")
 parser.add_argument('--output', default="output.pdf", help="Output filename")
 parser.add_argument('--add-ratios', type=int, default=0, help="Add arbitrary number of ratio plots as extra axes (default is 0)")
 parser.add_argument('--set-ratios', type=ast.literal_eval, help="Enter list (or list of lists for multiple ratios) of files for ratio plots (first one is always the denominator)")
@@ -24,74 +27,147 @@ parser.add_argument('--legend-ncol', type=int, default=1, help="Number of column
 parser.add_argument('--histogram', action='store_true', help="Plot as histogram instead of function-style curve")
 parser.add_argument('--rescale', type=float, help="Rescale the x axis by a factor")
 parser.add_argument('--normalize', nargs='+', type=float, help="Normalization factor for the top plot (enter a factor per input file)")
+parser.add_argument('--normalize-xsec', nargs='+', metavar="RUN:ORDER[/mH]",
+                    help="Normalization factors from the cross-section table of xsec_table.py, per input file (one key: all files); "
+                         "auto = run and order of each input, /mH for the xsec/mH value")
+parser.add_argument('--xsec-table', help="Cross-section table (default <path>/xsec_table.json)")
+parser.add_argument('--envelope', choices=["23", "all", "cache"], default="23",
+                    help="Scale band: tot_scale02/03 (default), every tot_scaleNN column (all), "
+                         "or the envelope.npz of envelope.py (cache, falls back to all when stale)")
 parser.add_argument('--config-path', default="config/", type=str, help="Path to the config files")
 parser.add_argument('--place-text', type=int, default=3, choices=[1, 2, 3, 4, 5, 6],
                     help="Position of the optional text box: 1=upper-left, 2=upper-central, 3=upper-right (default), 4=lower-left, 5=lower-central, 6=lower-right")
-args = parser.parse_args()
-
-filename_list = []
-for input in args.input:
-    filename_list.append(os.path.join(args.path, input))
-outputname = args.output
-
-# --- Extract observable name from input LO (e.g. "mH" from "LO.mH.dat") ---
-observable = os.path.basename(filename_list[0]).split('.')[1]
-config_file = os.path.join(args.config_path, f"{observable}.config")
-
-# --- Load labels from config file ---
-config = {
-    "xlabel": r"$m_H$ [GeV]",
-    "ylabel_top": "cross section [pb]",
-    "ylabel_bottom_list": ["LO/NLO"],
-    "process": "$e^+e^-\rightarrow ZH(e^+e^-b\\bar{b})$",
-    "legend": ["LO", "NLO", "NNLO"],
-    "color": ['green', 'blue', 'red'],
-    "line_style": ['-', '--', '-.'],
-    "ycut" : None,
-    "xmin": None,
-    "xmax": None,
-    "ymin": None,
-    "ymax": None,
-    "ymin_ratio": 0.5,
-    "ymax_ratio": 1.5,
-    "scale": 1.0
-}
-
-if os.path.isfile(config_file):
-    with open(config_file, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
-            if "=" in line:
-                key, val = line.strip().split("=", 1)
-                key = key.strip()
-                val = val.strip()
-
-                try:
-                    config[key] = ast.literal_eval(val)
-                except (ValueError, SyntaxError):
-                    config[key] = val
-else:
-    warnings.warn(f"Config file {config_file} not found. Using default labels.")
-
-# --- Plot settings ---
-plt.rcParams.update({
+# Output formats: all written from the same figure, no re-rasterisation of the PDF
+parser.add_argument('--extra-formats', nargs='+', default=[], choices=["pdf", "png", "jpeg", "svg"],
+                    help="Also save the figure in these formats (e.g. png jpeg)")
+parser.add_argument('--dpi', type=int, default=300, help="Resolution of the extra raster formats (default 300)")
+parser.add_argument('--extra-dir', default="", help="Prefix folder for the extra formats (e.g. jpeg -> jpeg/<output folder>/<obs>.jpeg)")
+parser.add_argument('--multipage', help="Also append every figure to this multipage PDF")
+parser.add_argument('--batch', help="File with one set of plot options per line: all plots are drawn in this process")
+profiling.add_arguments(parser)
+
+# Style, reset before each figure (the logo switches LaTeX off)
+PLOT_STYLE = {
     "text.usetex": True,
     "font.family": "serif",
     "font.size": 14
-})
-
-def load_df(filename):
-    df = pd.read_csv(filename, sep=r"\s+", comment="#", header=None)
-    df.columns = [
-        "lower", "center", "upper",
-        "tot_scale01", "tot_scale01_Err",
-        "tot_scale02", "tot_scale02_Err",
-        "tot_scale03", "tot_scale03_Err",
-        "tot_scale04", "tot_scale04_Err"
-    ]
-    return df
+}
+
+
+def load_config(filename_list, config_path):
+    """Labels and ranges of the observable (config/<obs>.config), with defaults."""
+    # --- Extract observable name from input LO (e.g. "mH" from "LO.mH.dat") ---
+    observable = os.path.basename(filename_list[0]).split('.')[1]
+    config_file = os.path.join(config_path, f"{observable}.config")
+
+    # --- Load labels from config file ---
+    config = {
+        "xlabel": r"$m_H$ [GeV]",
+        "ylabel_top": "cross section [pb]",
+        "ylabel_bottom_list": ["LO/NLO"],
+        "process": r"$e^+e^-\rightarrow ZH(e^+e^-b\bar{b})$",
+        "legend": ["LO", "NLO", "NNLO"],
+        "color": ['green', 'blue', 'red'],
+        "line_style": ['-', '--', '-.'],
+        "ycut" : None,
+        "xmin": None,
+        "xmax": None,
+        "ymin": None,
+        "ymax": None,
+        "ymin_ratio": 0.5,
+        "ymax_ratio": 1.5,
+        "scale": 1.0
+    }
+
+    if os.path.isfile(config_file):
+        with open(config_file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if "=" in line:
+                    key, val = line.strip().split("=", 1)
+                    key = key.strip()
+                    val = val.strip()
+
+                    try:
+                        config[key] = ast.literal_eval(val)
+                    except (ValueError, SyntaxError):
+                        config[key] = val
+    else:
+        warnings.warn(f"Config file {config_file} not found. Using default labels.")
+    return config
+
+# Columns a plot needs; their positions come from the '#labels:' header (datfile.py)
+DAT_COLUMNS = ["lower", "center", "upper", "tot_scale01", "tot_scale02", "tot_scale03"]
+
+def load_dat(filename):
+    """Columns of a NNLOJET .dat file needed for a plot, as NumPy arrays by name."""
+    return datfile.load(filename, DAT_COLUMNS)
+
+
+# Cross-section tables already read (a batch reads each one once)
+_xsec_tables = {}
+
+def xsec_normalization(args):
+    """--normalize-xsec: one factor per input file from the table of xsec_table.py."""
+    path = args.xsec_table or os.path.join(args.path, "xsec_table.json")
+    if path not in _xsec_tables:
+        import json
+        with open(path) as f:
+            _xsec_tables[path] = json.load(f)["runs"]
+    runs = _xsec_tables[path]
+    keys = args.normalize_xsec * len(args.input) if len(args.normalize_xsec) == 1 else args.normalize_xsec
+    if len(keys) != len(args.input):
+        raise ValueError("--normalize-xsec needs one key, or one key per input file")
+    factors = []
+    for key, filename in zip(keys, args.input):
+        key, _, per = key.partition("/")
+        if key == "auto":
+            # <E>/<run>/combined/Final/<ORDER>.<obs>.dat
+            parts = os.path.normpath(filename).split(os.sep)
+            run = parts[parts.index("combined") - 1] if "combined" in parts[1:] else None
+            order = os.path.basename(filename).split(".")[0]
+        else:
+            run, _, order = key.partition(":")
+        try:
+            entry = runs[run][order]
+        except KeyError:
+            raise KeyError(f"{path}: no cross section for {run}:{order} (run xsec_table.py)") from None
+        factors.append(entry["over_mH"] if per == "mH" else entry["xsec"])
+    return factors
+
+
+def load_plot_data(filename, mode="23"):
+    """load_dat() plus the scale band (band_low, band_up) of the --envelope mode."""
+    if mode == "cache":
+        import envelope
+        cached = envelope.read(filename)
+        if cached is not None:
+            data = {edge: cached[edge] for edge in datfile.EDGES}
+            data.update(tot_scale01=cached["central"], band_low=cached["min"], band_up=cached["max"])
+            return data
+        warnings.warn(f"No up-to-date envelope for {filename} (run envelope.py), computing it")
+        mode = "all"
+    if mode == "all":
+        import envelope
+        cols = envelope.scale_columns(datfile.columns(filename))
+        data = datfile.load(filename, datfile.EDGES + sorted(set(cols) | {"tot_scale01"}))
+        values = np.stack([data[c] for c in cols])
+        data["band_low"], data["band_up"] = values.min(axis=0), values.max(axis=0)
+        return data
+    data = load_dat(filename)
+    data["band_low"] = np.minimum(data["tot_scale02"], data["tot_scale03"])
+    data["band_up"] = np.maximum(data["tot_scale02"], data["tot_scale03"])
+    return data
+
+
+def pyplot():
+    """matplotlib.pyplot with the non-interactive Agg backend, imported on first use."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
 
 # --- Helper: enforce first/last ticks while keeping Matplotlib's formatter ---
 def add_first_last_xticks(ax, xmin, xmax, is_log=False):
@@ -112,200 +188,343 @@ def add_first_last_xticks(ax, xmin, xmax, is_log=False):
     # Keep the existing formatter (so style matches other ticks)
     ax.xaxis.set_major_formatter(ax.xaxis.get_major_formatter())
 
-# --- Load data ---
-df_list = []
-for filename in filename_list:
-    df_list.append(load_df(filename))
-
-# Sanity check
-for i_df in range(1, len(df_list)):
-    if not df_list[0]["center"].equals(df_list[i_df]["center"]):
-        raise ValueError("Central bin values do not match between (at least) two input files")
-
-x = df_list[0]["center"]
-if args.rescale:
-    x = x / args.rescale
-x_edges = df_list[0]["lower"].tolist()
-x_edges.append(df_list[0]["upper"].iloc[-1])
-x_edges = np.array(x_edges)
-if args.rescale:
-    x_edges = x_edges / args.rescale
-
-# Values
-val_central = []
-val_low = []
-val_up = []
-for df in df_list:
-    # Use user's chosen central/low/up mapping
-    val_central.append(df["tot_scale01"])
-    val_low.append(df[["tot_scale02", "tot_scale03"]].min(axis=1))
-    val_up.append(df[["tot_scale02", "tot_scale03"]].max(axis=1))
-
-# --- Normalization ---
-norm = []
-for i in range(len(val_central)):
-    if args.normalize:
-        if len(args.normalize) != len(val_central):
-            raise ValueError("Normalization factors must match the number of input files (even if the same normalization factor)")
-        norm.append(args.normalize[i])
+def make_figure(args, profiler=None):
+    """Draw one plot and return the figure."""
+    profiler = profiler or profiling.Profiler("makeplot6")
+    plt = pyplot()
+    plt.rcParams.update(PLOT_STYLE)
+    filename_list = [os.path.join(args.path, input) for input in args.input]
+    config = load_config(filename_list, args.config_path)
+    profiler.lap("config")
+
+    # --- Load data ---
+    data_list = []
+    for filename in filename_list:
+        data_list.append(load_plot_data(filename, args.envelope))
+
+    # Sanity check
+    for i_data in range(1, len(data_list)):
+        if not np.array_equal(data_list[0]["center"], data_list[i_data]["center"]):
+            raise ValueError("Central bin values do not match between (at least) two input files")
+    profiler.lap("load")
+
+    x = data_list[0]["center"]
+    if args.rescale:
+        x = x / args.rescale
+    x_edges = np.append(data_list[0]["lower"], data_list[0]["upper"][-1])
+    if args.rescale:
+        x_edges = x_edges / args.rescale
+
+    # Values
+    val_central = []
+    val_low = []
+    val_up = []
+    for data in data_list:
+        # Use user's chosen central/low/up mapping
+        val_central.append(data["tot_scale01"])
+        val_low.append(data["band_low"])
+        val_up.append(data["band_up"])
+
+    # --- Normalization ---
+    norm = []
+    if args.normalize and args.normalize_xsec:
+        raise ValueError("Use either --normalize or --normalize-xsec")
+    xsec_norm = xsec_normalization(args) if args.normalize_xsec else None
+    for i in range(len(val_central)):
+        if xsec_norm:
+            norm.append(xsec_norm[i])
+        elif args.normalize:
+            if len(args.normalize) != len(val_central):
+                raise ValueError("Normalization factors must match the number of input files (even if the same normalization factor)")
+            norm.append(args.normalize[i])
+        else:
+            norm.append(1)
+    profiler.lap("compute")
+
+    # --- Plotting ---
+    if args.add_ratios > 0:
+        height = 4.5
+        height_ratios = [5]
+        nrows = 1
+        ncols = 1
+        for iratio in range(args.add_ratios):
+            height += 1.5
+            height_ratios.append(1.5)
+            nrows += 1
+        fig = plt.figure(figsize=(7, height), constrained_layout=True)
+        gs = fig.add_gridspec(nrows, ncols, height_ratios=height_ratios, hspace=0.02)
+        ax1 = fig.add_subplot(gs[0])
+        ax2 = [fig.add_subplot(gs[iratio+1], sharex=ax1) for iratio in range(args.add_ratios)]
     else:
-        norm.append(1)
-
-# --- Plotting ---
-if args.add_ratios > 0:
-    height = 4.5
-    height_ratios = [5]
-    nrows = 1
-    ncols = 1
-    for iratio in range(args.add_ratios):
-        height += 1.5
-        height_ratios.append(1.5)
-        nrows += 1
-    fig = plt.figure(figsize=(7, height), constrained_layout=True)
-    gs = fig.add_gridspec(nrows, ncols, height_ratios=height_ratios, hspace=0.02)
-    ax1 = fig.add_subplot(gs[0])
-    ax2 = [fig.add_subplot(gs[iratio+1], sharex=ax1) for iratio in range(args.add_ratios)]
-else:
-    fig, ax1 = plt.subplots(figsize=(8, 4.5), constrained_layout=True)
-    ax2 = None
-
-# Top plot: total cross section
-color = config['color']
-style = config['line_style']  # fixed key name
-while len(config['legend']) < len(val_central):
-    config['legend'].append(None)
-
-for i in range(len(val_central)):
-    if args.histogram:
-        ax1.stairs(val_central[i]/norm[i], x_edges, label=config['legend'][i], color=color[i], linestyle=style[i], linewidth=1)
-        low = pd.concat([pd.Series(val_low[i]/norm[i]), pd.Series([0])], ignore_index=True)
-        up = pd.concat([pd.Series(val_up[i]/norm[i]), pd.Series([0])], ignore_index=True)
-        ax1.fill_between(x_edges, low, up, step='post', color=color[i], alpha=0.15, label=None)
+        fig, ax1 = plt.subplots(figsize=(8, 4.5), constrained_layout=True)
+        ax2 = None
+
+    # Top plot: total cross section
+    color = config['color']
+    style = config['line_style']  # fixed key name
+    while len(config['legend']) < len(val_central):
+        config['legend'].append(None)
+
+    for i in range(len(val_central)):
+        if args.histogram:
+            ax1.stairs(val_central[i]/norm[i], x_edges, label=config['legend'][i], color=color[i], linestyle=style[i], linewidth=1)
+            low = np.append(val_low[i]/norm[i], 0)
+            up = np.append(val_up[i]/norm[i], 0)
+            ax1.fill_between(x_edges, low, up, step='post', color=color[i], alpha=0.15, label=None)
+        else:
+            ax1.plot(x, val_central[i]/norm[i], color=color[i], linewidth=1, linestyle=style[i], label=config['legend'][i])
+            ax1.fill_between(x, val_low[i]/norm[i], val_up[i]/norm[i], color=color[i], alpha=0.15)
+
+    ax1.set_ylabel(config["ylabel_top"])
+    xmin = float(config["xmin"]) if config["xmin"] not in [None, "None"] else x.min()
+    xmax = float(config["xmax"]) if config["xmax"] not in [None, "None"] else x.max()
+    ymin = float(config["ymin"]) if config["ymin"] not in [None, "None"] else None
+    ymax = float(config["ymax"]) if config["ymax"] not in [None, "None"] else None
+
+    ax1.set_xlim(xmin, xmax)
+    if (ymin not in [None, "None"] and ymax not in [None, "None"]):
+        ax1.set_ylim(ymin, ymax)
     else:
-        ax1.plot(x, val_central[i]/norm[i], color=color[i], linewidth=1, linestyle=style[i], label=config['legend'][i])
-        ax1.fill_between(x, val_low[i]/norm[i], val_up[i]/norm[i], color=color[i], alpha=0.15)
-
-ax1.set_ylabel(config["ylabel_top"])
-xmin = float(config["xmin"]) if config["xmin"] not in [None, "None"] else x.min()
-xmax = float(config["xmax"]) if config["xmax"] not in [None, "None"] else x.max()
-ymin = float(config["ymin"]) if config["ymin"] not in [None, "None"] else None
-ymax = float(config["ymax"]) if config["ymax"] not in [None, "None"] else None
-
-ax1.set_xlim(xmin, xmax)
-if (ymin not in [None, "None"] and ymax not in [None, "None"]):
-    ax1.set_ylim(ymin, ymax)
-else:
-    ax1.set_ylim(bottom=0)
-
-if args.add_ratios > 0 and ax2:
-    ax1.tick_params(labelbottom=False)
-
-if args.x_logscale:
-    ax1.set_xscale('log')
-if args.y_logscale:
-    ax1.set_yscale('log')
-
-ax1.legend(loc='upper left', ncol=args.legend_ncol, frameon=False)
-ax1.grid(True, alpha=0.5)
-
-# Bottom plot: ratios
-if args.add_ratios > 0 and ax2:
-
-    if not args.set_ratios:
-        default_ratios = range(1, len(args.input)+1)
-        set_ratios = [default_ratios for _ in range(args.add_ratios)]
+        ax1.set_ylim(bottom=0)
+
+    if args.add_ratios > 0 and ax2:
+        ax1.tick_params(labelbottom=False)
+
+    if args.x_logscale:
+        ax1.set_xscale('log')
+    if args.y_logscale:
+        ax1.set_yscale('log')
+
+    ax1.legend(loc='upper left', ncol=args.legend_ncol, frameon=False)
+    ax1.grid(True, alpha=0.5)
+
+    # Bottom plot: ratios
+    if args.add_ratios > 0 and ax2:
+
+        if not args.set_ratios:
+            default_ratios = range(1, len(args.input)+1)
+            set_ratios = [default_ratios for _ in range(args.add_ratios)]
+        else:
+            if len(args.set_ratios) != args.add_ratios:
+                raise ValueError("set_ratios does not match with the requested number of ratio plots")
+            set_ratios = args.set_ratios
+
+        for iratio in range(args.add_ratios):
+            val_ratio = []
+            val_ratio_low = []
+            val_ratio_up = []
+            for i in set_ratios[iratio]:
+                i_den = set_ratios[iratio][0]
+
+                num_central = np.array(val_central[i-1]) / norm[i-1]
+                den_central = np.array(val_central[i_den-1]) / norm[i_den-1]
+                num_low = np.array(val_low[i-1]) / norm[i-1]
+                num_up = np.array(val_up[i-1]) / norm[i-1]
+
+                mask = den_central != 0
+
+                ratio = np.full_like(num_central, np.nan)
+                ratio[mask] = num_central[mask] / den_central[mask]
+                val_ratio.append(ratio)
+
+                rlow = np.full_like(num_low, np.nan)
+                rlow[mask] = num_low[mask] / den_central[mask]
+                val_ratio_low.append(rlow)
+
+                rup = np.full_like(num_up, np.nan)
+                rup[mask] = num_up[mask] / den_central[mask]
+                val_ratio_up.append(rup)
+
+            for i in range(len(val_ratio)):
+                ci = set_ratios[iratio][i] - 1  # color/style index aligned with input
+                if args.histogram:
+                    ax2[iratio].stairs(val_ratio[i], x_edges, label=config['legend'][i], color=color[ci], linestyle=style[ci], linewidth=1)
+                    ratio_low = np.append(val_ratio_low[i], 0)
+                    ratio_up = np.append(val_ratio_up[i], 0)
+                    ax2[iratio].fill_between(x_edges, ratio_low, ratio_up, step='post', color=color[ci], alpha=0.15, label=None)
+                else:
+                    ax2[iratio].plot(x, val_ratio[i], color=color[ci], linestyle=style[ci])
+                    ax2[iratio].fill_between(x, val_ratio_low[i], val_ratio_up[i], color=color[ci], alpha=0.15)
+
+            ax2[iratio].set_ylabel(config["ylabel_bottom_list"][iratio])
+            if iratio != len(ax2) - 1:
+                ax2[iratio].tick_params(labelbottom=False)
+                ax2[iratio].set_xlabel("")
+                ax1.set_xlabel("")
+            if iratio == len(ax2) - 1:
+                ax2[iratio].set_xlabel(config["xlabel"])
+            ax2[iratio].set_ylim(config["ymin_ratio"], config["ymax_ratio"])
+            ax2[iratio].grid(True, alpha=0.5)
+
+        # Ensure first/last ticks appear on the shared x-axis (apply to bottom ratio axis)
+        add_first_last_xticks(ax2[-1], xmin, xmax, is_log=args.x_logscale)
+
     else:
-        if len(args.set_ratios) != args.add_ratios:
-            raise ValueError("set_ratios does not match with the requested number of ratio plots")
-        set_ratios = args.set_ratios
-
-    for iratio in range(args.add_ratios):
-        val_ratio = []
-        val_ratio_low = []
-        val_ratio_up = []
-        for i in set_ratios[iratio]:
-            i_den = set_ratios[iratio][0]
-
-            num_central = np.array(val_central[i-1]) / norm[i-1]
-            den_central = np.array(val_central[i_den-1]) / norm[i_den-1]
-            num_low = np.array(val_low[i-1]) / norm[i-1]
-            num_up = np.array(val_up[i-1]) / norm[i-1]
-
-            mask = den_central != 0
-
-            ratio = np.full_like(num_central, np.nan)
-            ratio[mask] = num_central[mask] / den_central[mask]
-            val_ratio.append(ratio)
-
-            rlow = np.full_like(num_low, np.nan)
-            rlow[mask] = num_low[mask] / den_central[mask]
-            val_ratio_low.append(rlow)
-
-            rup = np.full_like(num_up, np.nan)
-            rup[mask] = num_up[mask] / den_central[mask]
-            val_ratio_up.append(rup)
-
-        for i in range(len(val_ratio)):
-            ci = set_ratios[iratio][i] - 1  # color/style index aligned with input
-            if args.histogram:
-                ax2[iratio].stairs(val_ratio[i], x_edges, label=config['legend'][i], color=color[ci], linestyle=style[ci], linewidth=1)
-                ratio_low = pd.concat([pd.Series(val_ratio_low[i]), pd.Series([0])], ignore_index=True)
-                ratio_up = pd.concat([pd.Series(val_ratio_up[i]), pd.Series([0])], ignore_index=True)
-                ax2[iratio].fill_between(x_edges, ratio_low, ratio_up, step='post', color=color[ci], alpha=0.15, label=None)
-            else:
-                ax2[iratio].plot(x, val_ratio[i], color=color[ci], linestyle=style[ci])
-                ax2[iratio].fill_between(x, val_ratio_low[i], val_ratio_up[i], color=color[ci], alpha=0.15)
-
-        ax2[iratio].set_ylabel(config["ylabel_bottom_list"][iratio])
-        if iratio != len(ax2) - 1:
-            ax2[iratio].tick_params(labelbottom=False)
-            ax2[iratio].set_xlabel("")
-            ax1.set_xlabel("")
-        if iratio == len(ax2) - 1:
-            ax2[iratio].set_xlabel(config["xlabel"])
-        ax2[iratio].set_ylim(config["ymin_ratio"], config["ymax_ratio"])
-        ax2[iratio].grid(True, alpha=0.5)
-
-    # Ensure first/last ticks appear on the shared x-axis (apply to bottom ratio axis)
-    add_first_last_xticks(ax2[-1], xmin, xmax, is_log=args.x_logscale)
-
-else:
-    ax1.set_xlabel(config["xlabel"])
-    # Ensure first/last ticks appear on x-axis
-    add_first_last_xticks(ax1, xmin, xmax, is_log=args.x_logscale)
-
-# Optional text box
-textbox = r"$\sqrt{s}=240$ GeV" + "\n" + r"$\mu_R = {}$".format(config["scale"])
-if "ycut" in config and config["ycut"] not in [None, "None", ""]:
-    textbox += "\n" + r"$y_{{cut}} = {}$".format(config["ycut"])
-
-pos = {
-    1: (0.05, 0.95, 'left',  'top'),    # upper-left
-    2: (0.5, 0.95, 'center',  'top'),   # upper-central
-    3: (0.88, 0.95, 'center', 'top'),   # upper-right
-    4: (0.05, 0.05, 'left',  'bottom'), # lower-left
-    5: (0.5, 0.05, 'center',  'bottom'),# lower-central
-    6: (0.88, 0.05, 'center', 'bottom') # lower-right
-}[args.place_text]
-
-ax1.text(pos[0], pos[1], textbox, transform=ax1.transAxes, ha=pos[2], va=pos[3],
-         bbox=dict(facecolor='white', edgecolor='black', boxstyle='round'))
-ax1.text(
-    0.02, 1.06, config["process"], transform=ax1.transAxes,
-    fontsize=14, fontweight='bold', fontstyle='italic', ha='left', va='top',
-)
-
-if args.add_logo:
-    plt.rcParams.update({
-        "text.usetex": False,
-        "font.family": "sans-serif",
-        "font.sans-serif": ["DejaVu Sans", "Arial"],
-        "font.size": 14
-    })
+        ax1.set_xlabel(config["xlabel"])
+        # Ensure first/last ticks appear on x-axis
+        add_first_last_xticks(ax1, xmin, xmax, is_log=args.x_logscale)
+
+    # Optional text box
+    textbox = r"$\sqrt{s}=240$ GeV" + "\n" + r"$\mu_R = {}$".format(config["scale"])
+    if "ycut" in config and config["ycut"] not in [None, "None", ""]:
+        textbox += "\n" + r"$y_{{cut}} = {}$".format(config["ycut"])
+
+    pos = {
+        1: (0.05, 0.95, 'left',  'top'),    # upper-left
+        2: (0.5, 0.95, 'center',  'top'),   # upper-central
+        3: (0.88, 0.95, 'center', 'top'),   # upper-right
+        4: (0.05, 0.05, 'left',  'bottom'), # lower-left
+        5: (0.5, 0.05, 'center',  'bottom'),# lower-central
+        6: (0.88, 0.05, 'center', 'bottom') # lower-right
+    }[args.place_text]
+
+    ax1.text(pos[0], pos[1], textbox, transform=ax1.transAxes, ha=pos[2], va=pos[3],
+             bbox=dict(facecolor='white', edgecolor='black', boxstyle='round'))
     ax1.text(
-        0.98, 1.08, "NNLOJET", transform=ax1.transAxes,
-        fontsize=16, fontweight='bold', fontstyle='italic', ha='right', va='top'
+        0.02, 1.06, config["process"], transform=ax1.transAxes,
+        fontsize=14, fontweight='bold', fontstyle='italic', ha='left', va='top',
     )
 
-# Save figure
-plt.savefig(outputname)
+    if args.add_logo:
+        plt.rcParams.update({
+            "text.usetex": False,
+            "font.family": "sans-serif",
+            "font.sans-serif": ["DejaVu Sans", "Arial"],
+            "font.size": 14
+        })
+        ax1.text(
+            0.98, 1.08, "NNLOJET", transform=ax1.transAxes,
+            fontsize=16, fontweight='bold', fontstyle='italic', ha='right', va='top'
+        )
+
+    profiler.lap("draw")
+    return fig
+
+
+def output_paths(args):
+    """Main output plus one file per extra format (same stem, optional prefix folder).
+
+    With --extra-dir an absolute --output keeps its folders below the prefix
+    (--output /a/b.pdf --extra-dir jpeg -> jpeg/a/b.jpeg).
+    """
+    paths = [args.output]
+    stem, ext = os.path.splitext(args.output)
+    if args.extra_dir:
+        stem = os.path.splitdrive(stem)[1].lstrip("/" + os.sep)
+    for fmt in args.extra_formats:
+        if fmt == ext.lstrip('.') and not args.extra_dir:
+            continue
+        paths.append(os.path.join(args.extra_dir, f"{stem}.{fmt}"))
+    return paths
+
+
+def save_figure(fig, args, pages=None, profiler=None):
+    profiler = profiler or profiling.Profiler("makeplot6")
+    if profiler.log and fig.get_layout_engine() is not None:
+        # constrained_layout runs inside every savefig: report it separately
+        engine = fig.get_layout_engine()
+        engine.execute = profiler.wrap(engine.execute, "layout")
+    for i, path in enumerate(output_paths(args)):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The main output keeps matplotlib's default resolution
+        fig.savefig(path, dpi=args.dpi if i > 0 else None)
+    if pages is not None:
+        pages.savefig(fig)
+    pyplot().close(fig)
+    profiler.lap("save")
+
+
+def profile_text_rendering(profiler):
+    """Add the LaTeX runs (usetex) and mathtext parsing to the 'text' phase."""
+    import inspect
+    from matplotlib.texmanager import TexManager
+    from matplotlib.mathtext import MathTextParser
+    make_dvi = inspect.getattr_static(TexManager, "make_dvi")
+    if isinstance(make_dvi, classmethod):
+        TexManager.make_dvi = classmethod(profiler.wrap(make_dvi.__func__, "text"))
+    else:
+        TexManager.make_dvi = profiler.wrap(make_dvi, "text")
+    MathTextParser.parse = profiler.wrap(MathTextParser.parse, "text")
+
+
+# Options of the command line that concern the whole batch, and per-plot ones that belong in the batch file
+BATCH_OPTIONS = {"batch", "multipage", "profile", "profile_cprofile"}
+PLOT_ONLY_OPTIONS = {"input", "output"}
+
+
+def explicit_options(argv):
+    """{dest: value} of the options given in argv (any spelling: --opt value, --opt=value), without defaults."""
+    defaults = [(action, action.default) for action in parser._actions]
+    try:
+        for action, _ in defaults:
+            action.default = argparse.SUPPRESS
+        return vars(parser.parse_args(argv))
+    finally:
+        for action, default in defaults:
+            action.default = default
+
+
+def read_batch(filename, argv):
+    """One argument list per non-empty line; the plot options of the command line apply to every plot."""
+    common = {dest: value for dest, value in explicit_options(argv).items() if dest not in BATCH_OPTIONS}
+    misplaced = sorted(dest for dest in common if dest in PLOT_ONLY_OPTIONS)
+    if misplaced:
+        parser.error(f"{', '.join('--' + dest for dest in misplaced)} with --batch: put them in the batch file")
+    items = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                item = parser.parse_args(shlex.split(line))
+                vars(item).update(common)
+                items.append(item)
+    return items
+
+
+# === MAIN ===
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv)
+    if args.batch:
+        items = read_batch(args.batch, argv)
+    elif args.input:
+        items = [args]
+    else:
+        parser.error("one of --input or --batch is required")
+
+    profiler = profiling.Profiler("makeplot6", args.profile, args.profile_cprofile)
+    if args.profile:
+        pyplot()
+        profile_text_rendering(profiler)
+    pages = None
+    if args.multipage:
+        from matplotlib.backends.backend_pdf import PdfPages
+        pyplot()
+        pages = PdfPages(args.multipage)
+    failed = 0
+    try:
+        for item in items:
+            if not item.input:
+                print(f"Skipping batch entry without --input (output {item.output})")
+                failed += 1
+                continue
+            missing = [f for f in item.input if not os.path.isfile(os.path.join(item.path, f))]
+            if missing and len(items) > 1:
+                print(f"Missing input: {os.path.join(item.path, missing[0])}, skipping {item.output}")
+                failed += 1
+                continue
+            with profiler.item(item.output):
+                fig = make_figure(item, profiler)
+                save_figure(fig, item, pages, profiler)
+            if len(items) > 1:
+                print(f"[{' '.join(item.input)}] → {' '.join(output_paths(item))}")
+    finally:
+        if pages is not None:
+            pages.close()
+    if failed:
+        sys.exit(f"{failed} of {len(items)} plots failed")
+
+
+if __name__ == "__main__":
+    main()
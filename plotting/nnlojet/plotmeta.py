@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Plot metadata taken from the Makefile, shared by the gallery and plot tools.
+
+The Makefile stays the single source of truth: folder -> TYPE (<TYPE>_OUTDIR),
+config folder (CONFIG_<TYPE>), input .dat files (<obs>_<TYPE>_INPUTS) and
+makeplot6.py options (<obs>_<TYPE>_OPTS) are read with one call to
+'make print-vars'.
+"""
+
+import shlex
+import subprocess
+from pathlib import Path
+
+# Plot types of the Makefile: process (GG, BB, TOT) + energy variant (small, mid, full)
+TYPES = ["GG", "GGmid", "GGsmall", "BB", "BBmid", "BBsmall", "TOT", "TOTmid", "TOTsmall"]
+
+
+def split_type(plot_type):
+    """'GGsmall' -> ('GG', 'small'), 'TOT' -> ('TOT', 'full')"""
+    for variant in ("small", "mid"):
+        if plot_type.endswith(variant):
+            return plot_type[:-len(variant)], variant
+    return plot_type, "full"
+
+
+def make_vars(names, makefile_dir="."):
+    """Values of the Makefile variables in names, with a single make call."""
+    if not names:
+        return {}
+    out = subprocess.run(["make", "-s", "--no-print-directory", "-C", str(makefile_dir), "print-vars",
+                          "VARS=" + " ".join(names)],
+                         stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    values = {}
+    for line in out.splitlines():
+        if "=" in line:
+            key, val = line.split("=", 1)
+            values[key] = val.strip()
+    return values
+
+
+def folder_types(makefile_dir="."):
+    """Output folder (as written in the Makefile) -> TYPE"""
+    outdirs = make_vars([f"{t}_OUTDIR" for t in TYPES], makefile_dir)
+    return {Path(outdirs[f"{t}_OUTDIR"]).as_posix(): t for t in TYPES if outdirs.get(f"{t}_OUTDIR")}
+
+
+def plot_metadata(plots, makefile_dir="."):
+    """Metadata of the (observable, TYPE) pairs in plots.
+
+    Returns {(observable, TYPE): {"observable", "type", "process", "energy",
+    "config", "config_dir", "datadir", "inputs", "opts"}} with inputs
+    relative to datadir.
+    """
+    plots = sorted(set(plots))
+    types = sorted({t for _, t in plots})
+    names = ["DATADIR"] + [f"CONFIG_{t}" for t in types]
+    names += [f"{obs}_{t}_{kind}" for obs, t in plots for kind in ("INPUTS", "OPTS")]
+    values = make_vars(names, makefile_dir)
+
+    datadir = values.get("DATADIR", "")
+    meta = {}
+    for obs, t in plots:
+        process, energy = split_type(t)
+        config_dir = values.get(f"CONFIG_{t}", "")
+        meta[(obs, t)] = {
+            "observable": obs,
+            "type": t,
+            "process": process,
+            "energy": energy,
+            "config": str(Path(config_dir) / f"{obs}.config") if config_dir else "",
+            "config_dir": config_dir,
+            "datadir": datadir,
+            "inputs": values.get(f"{obs}_{t}_INPUTS", "").split(),
+            "opts": values.get(f"{obs}_{t}_OPTS", ""),
+        }
+    return meta
+
+
+def all_plots(makefile_dir="."):
+    """(observable, TYPE) pairs the Makefile knows how to plot (INCL_EXCL with OPTS)."""
+    names = make_vars(["INCL_EXCL"], makefile_dir).get("INCL_EXCL", "").split()
+    opts = make_vars([f"{obs}_{t}_OPTS" for obs in names for t in TYPES], makefile_dir)
+    return [(obs, t) for t in TYPES for obs in names if opts.get(f"{obs}_{t}_OPTS")]
+
+
+def plot_command(meta, output, makefile_dir="."):
+    """makeplot6.py command of the Makefile recipe for one plot (run from makefile_dir)."""
+    python = make_vars(["PYTHON"], makefile_dir).get("PYTHON") or "python3"
+    return (shlex.split(python) + ["./makeplot6.py", "--path", meta["datadir"], "--input"] + meta["inputs"]
+            + ["--output", str(output)] + shlex.split(meta["opts"]) + ["--config-path", meta["config_dir"]])
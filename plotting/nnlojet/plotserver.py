@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""Local HTTP server rendering the Makefile plots on demand.
+
+  python3 plotserver.py [--port 8000]   then open http://localhost:8000
+
+The page is the one of gallery.py, over every (observable, TYPE) of the
+Makefile. A plot is rendered with makeplot6.py (same inputs, OPTS and config
+as 'make <obs> TYPE=<TYPE>') the first time its thumbnail or PDF is requested,
+and cached in --cache-dir until makeplot6.py (or a module it imports), the
+config file, the inputs, the Makefile options or the xsec_table.json /
+envelope.npz the options read change.
+"""
+
+from pathlib import Path
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import shutil
+import socketserver
+import subprocess
+import threading
+import urllib.parse
+
+import envelope
+import gallery_page
+import makeplot6
+import plotmeta
+
+parser = argparse.ArgumentParser(description="Serve the plot gallery, rendering each figure only when it is viewed")
+parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: local only)")
+parser.add_argument("--makefile-dir", default=".", help="Folder of the Makefile and makeplot6.py")
+parser.add_argument("--cache-dir", default="plotcache", help="Folder for the rendered PDFs and thumbnails")
+parser.add_argument("--thumb-dpi", type=int, default=50, help="Resolution of the thumbnails")
+parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Plots rendered in parallel")
+parser.add_argument("--page-size", type=int, default=24, help="Plots per page in the gallery")
+args = parser.parse_args()
+
+makefile_dir = Path(args.makefile_dir).resolve()
+cache_dir = Path(args.cache_dir).resolve()
+if shutil.which("pdftoppm") is None:
+    raise RuntimeError("pdftoppm (poppler-utils) is required to rasterise the thumbnails")
+
+
+# --- Plot metadata, reloaded when the Makefile changes ---
+class Plots:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.meta = {}
+
+    def get(self):
+        mtime = (makefile_dir / "Makefile").stat().st_mtime_ns
+        with self.lock:
+            if mtime != self.mtime:
+                self.meta = plotmeta.plot_metadata(plotmeta.all_plots(makefile_dir), makefile_dir)
+                self.mtime = mtime
+                print(f"Loaded {len(self.meta)} plots from {makefile_dir / 'Makefile'}")
+            return self.meta
+
+
+plots = Plots()
+
+
+def file_state(path):
+    try:
+        st = path.stat()
+        return [str(path), st.st_size, st.st_mtime_ns]
+    except OSError:
+        return [str(path), None, None]
+
+
+# makeplot6.py and the modules it imports
+CODE_FILES = ["makeplot6.py", "datfile.py", "profiling.py", "envelope.py"]
+
+
+def option_files(meta, cmd):
+    """Data files read because of the plot options: the cross-section table, the envelope caches."""
+    try:
+        opts, _ = makeplot6.parser.parse_known_args(cmd[cmd.index("./makeplot6.py") + 1:])
+    except SystemExit:
+        return []
+    files = []
+    if opts.normalize_xsec:
+        files.append(makefile_dir / (opts.xsec_table or os.path.join(opts.path, "xsec_table.json")))
+    if opts.envelope == "cache":
+        files += sorted({makefile_dir / opts.path / os.path.dirname(f) / envelope.CACHE_NAME for f in meta["inputs"]})
+    return files
+
+
+def cache_key(meta, cmd):
+    """Changes whenever the command, the code of makeplot6.py, the config file, an input or a table it reads changes."""
+    files = [makefile_dir / f for f in CODE_FILES] + [makefile_dir / meta["config"]]
+    files += [makefile_dir / meta["datadir"] / f for f in meta["inputs"]]
+    files += option_files(meta, cmd)
+    return hashlib.sha1(json.dumps([cmd] + [file_state(f) for f in files]).encode()).hexdigest()
+
+
+# --- Rendering: one lock per plot, at most --jobs makeplot6.py at a time ---
+render_slots = threading.Semaphore(args.jobs)
+plot_locks = {}
+plot_locks_lock = threading.Lock()
+
+
+class RenderError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def render(plot_type, obs):
+    """Path of the up-to-date PDF and thumbnail of one plot, rendering them if needed."""
+    meta = plots.get().get((obs, plot_type))
+    if meta is None:
+        raise RenderError(404, f"No plot {obs} for TYPE={plot_type} in the Makefile")
+    out_dir = cache_dir / plot_type
+    pdf_file, thumb_file, key_file = out_dir / f"{obs}.pdf", out_dir / f"{obs}.png", out_dir / f"{obs}.key"
+
+    with plot_locks_lock:
+        lock = plot_locks.setdefault((plot_type, obs), threading.Lock())
+    with lock:
+        cmd = plotmeta.plot_command(meta, pdf_file, makefile_dir)
+        key = cache_key(meta, cmd)
+        if pdf_file.exists() and thumb_file.exists() and key_file.exists() and key_file.read_text() == key:
+            return pdf_file, thumb_file
+
+        for f in meta["inputs"]:
+            if not (makefile_dir / meta["datadir"] / f).is_file():
+                raise RenderError(404, f"Missing input: {meta['datadir']}{f}")
+        out_dir.mkdir(parents=True, exist_ok=True)
+        with render_slots:
+            print(f"[{' '.join(meta['inputs'])}] → makeplot6.py → {pdf_file}")
+            proc = subprocess.run(cmd, cwd=str(makefile_dir), stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                  universal_newlines=True)
+            if proc.returncode != 0 or not pdf_file.exists():
+                raise RenderError(500, f"makeplot6.py failed for {obs} ({plot_type}):\n{proc.stdout}")
+            subprocess.run(["pdftoppm", "-png", "-singlefile", "-r", str(args.thumb_dpi), str(pdf_file),
+                            str(thumb_file.with_suffix(""))], check=True)
+        key_file.write_text(key)
+        return pdf_file, thumb_file
+
+
+def gallery_html():
+    entries = []
+    for (obs, plot_type), meta in plots.get().items():
+        entries.append(dict(meta, name=obs, folder=plot_type,
+                            pdf=f"/pdf/{plot_type}/{obs}.pdf", thumb=f"/thumb/{plot_type}/{obs}.png",
+                            inputs=[f"{meta['datadir']}{f}" for f in meta["inputs"]]))
+    return gallery_page.render("Plot server: " + str(makefile_dir), entries, args.page_size)
+
+
+# --- HTTP ---
+class Handler(http.server.BaseHTTPRequestHandler):
+    def send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urllib.parse.urlparse(self.path).path.strip("/").split("/")
+        try:
+            if parts == [""]:
+                self.send(200, gallery_html().encode(), "text/html; charset=utf-8")
+            elif len(parts) == 3 and parts[0] in ("pdf", "thumb"):
+                pdf_file, thumb_file = render(parts[1], Path(parts[2]).stem)
+                if parts[0] == "pdf":
+                    self.send(200, pdf_file.read_bytes(), "application/pdf")
+                else:
+                    self.send(200, thumb_file.read_bytes(), "image/png")
+            else:
+                self.send(404, b"Not found", "text/plain")
+        except RenderError as e:
+            print(e)
+            self.send(e.status, str(e).encode(), "text/plain; charset=utf-8")
+
+    def log_message(self, format, *log_args):
+        pass
+
+
+class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+# === MAIN ===
+plots.get()
+server = Server((args.host, args.port), Handler)
+print(f"Serving plots on http://{args.host}:{args.port} (cache: {cache_dir})")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
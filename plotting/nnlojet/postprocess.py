@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""Post-processing of the combined NNLOJET results in one pass, driven by postprocess.ini.
+
+Replaces the chain rebinning_selected_obs.py (combined.bak -> combined.temp ->
+combined), rescale_dat_files.py (hbb -> hcc) and sum_dat_files.py (-> tot):
+every .dat file is read once, the declared steps are applied in memory and
+only the outputs are written.
+
+  python3 postprocess.py [postprocess.ini] [--jobs N] [--force] [--dry-run]
+
+Each section of the ini file is one histogram set: its source is a folder
+(input), another section (from) or the sum of sections (sum), followed by
+steps, and it is written to output if given. {E} in a section name is
+expanded over the energies of [Settings] (or of the section). Steps:
+
+  rebin [cutpoints] files=GLOB     as rebinning_selected_obs.py (data-line indices)
+  rescale FACTOR [errors=yes]      as rescale_dat_files.py (FACTOR may be (1.29/4.20)**2)
+  normalize FACTOR|integral        divide values and errors (integral: sum of tot_scale01 x bin width)
+
+Observables (and energies) are processed in parallel worker processes. An
+output is only rewritten when its inputs (size and mtime), its section or an
+upstream section changed: the keys are kept in <output>/.postprocess.json.
+"""
+
+import argparse
+import ast
+import configparser
+import fnmatch
+import glob
+import hashlib
+import json
+import operator
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import datfile
+from rebinning_selected_obs import build_segments
+
+MANIFEST = ".postprocess.json"
+OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+             ast.Div: operator.truediv, ast.Pow: operator.pow, ast.USub: operator.neg, ast.UAdd: operator.pos}
+
+
+def number(text):
+    """Value of an arithmetic expression of numbers, e.g. '(1.29/4.20)**2'."""
+    def ev(node):
+        if isinstance(node, ast.Expression):
+            return ev(node.body)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return float(node.value)
+        if isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](ev(node.left), ev(node.right))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in OPERATORS:
+            return OPERATORS[type(node.op)](ev(node.operand))
+        raise ValueError(f"not a number: {text}")
+    return ev(ast.parse(text, mode="eval"))
+
+
+# === HISTOGRAMS IN MEMORY ===
+class Hist:
+    """One .dat file: comment lines before/after the data, column names and the data tokens.
+
+    Tokens are kept as text and only the columns a step changes are converted
+    and reformatted (datfile.fmt), so the output matches the file-based scripts.
+    """
+
+    def __init__(self, head, names, tokens, tail):
+        self.head, self.names, self.tokens, self.tail = head, names, tokens, tail
+
+    @classmethod
+    def read(cls, path):
+        with open(path) as f:
+            lines = f.readlines()
+        names = datfile.file_columns(lines)
+        rows = datfile.data_rows(lines, names, path)
+        if rows and len({len(tokens) for _, tokens in rows}) > 1:
+            raise ValueError(f"{path}: data rows of different lengths")
+        first = rows[0][0] if rows else len(lines) + 1
+        head = [line for lineno, line in enumerate(lines, 1) if lineno < first and not _is_data(line)]
+        tail = [line for lineno, line in enumerate(lines, 1) if lineno > first and not _is_data(line)]
+        tokens = np.empty((len(rows), len(rows[0][1]) if rows else len(names)), dtype=object)
+        for i, (_, row) in enumerate(rows):
+            tokens[i] = row
+        return cls(head, names, tokens, tail)
+
+    def copy(self):
+        return Hist(self.head, self.names, self.tokens.copy(), self.tail)
+
+    def values(self, idx):
+        return self.tokens[:, idx].astype(float)
+
+    def set(self, idx, values):
+        self.tokens[:, idx] = np.vectorize(datfile.fmt, otypes=[object])(values)
+
+    def write(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.writelines(self.head)
+            f.writelines(" ".join(row) + "\n" for row in self.tokens)
+            f.writelines(self.tail)
+        os.replace(tmp, path)
+
+
+def _is_data(line):
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+# === STEPS ===
+def group_sums(x, starts, ends):
+    """Sums of x over the row groups [start, end), accumulated in row order like the
+    loops of rebinning_selected_obs.py (same rounding), vectorized across groups."""
+    acc = np.zeros(len(starts))
+    for j in range(int((ends - starts).max())):
+        rows = starts + j
+        inside = rows < ends
+        acc[inside] += x[rows[inside]]
+    return acc
+
+
+def rebin(h, cuts):
+    """Merge the data lines of each segment of cuts (rebinning_selected_obs.py rules), vectorized."""
+    n = len(h.tokens)
+    segments = [(lo, min(hi + 1 if closed else hi, n)) for lo, hi, closed in build_segments(cuts) if lo < n]
+    if not segments:
+        return h
+    # Groups of consecutive rows: one per merged segment, one per untouched row
+    starts, merged, pos = [], [], 0
+    for lo, end in segments:
+        starts += range(pos, lo)
+        merged += [False] * (lo - pos)
+        starts.append(lo)
+        merged.append(True)
+        pos = max(end, lo + 1)
+    starts += range(pos, n)
+    merged += [False] * (n - pos)
+    starts, merged = np.array(starts), np.array(merged)
+    if not merged.any():
+        return h
+    ends = np.append(starts[1:], n)
+    keep = h.tokens[starts].copy()
+
+    lower, center, upper = h.values(0), h.values(1), h.values(2)
+    width = upper - lower
+    cwidth = np.maximum(width, 0.0)
+    den = group_sums(width, starts, ends)
+    cden = group_sums(cwidth, starts, ends)
+    out = Hist(h.head, h.names, keep, h.tail)
+    sel = np.flatnonzero(merged)
+    out.tokens[sel, 0] = [datfile.fmt(x) for x in lower[starts[sel]]]
+    centers = np.where(cden > 0, group_sums(center * cwidth, starts, ends) / np.where(cden > 0, cden, 1), center[starts])
+    out.tokens[sel, 1] = [datfile.fmt(x) for x in centers[sel]]
+    out.tokens[sel, 2] = [datfile.fmt(x) for x in upper[ends[sel] - 1]]
+    safe = np.where(den > 0, den, 1)
+    for v_idx, e_idx in datfile.value_error_pairs(h.names):
+        vals = np.where(den > 0, group_sums(h.values(v_idx) * width, starts, ends) / safe, 0.0)
+        out.tokens[sel, v_idx] = [datfile.fmt(x) for x in vals[sel]]
+        if e_idx is not None:
+            errs = np.where(den > 0, np.sqrt(group_sums((h.values(e_idx) * width) ** 2, starts, ends)) / safe, 0.0)
+            out.tokens[sel, e_idx] = [datfile.fmt(x) for x in errs[sel]]
+    return out
+
+
+def rescale(h, factor, with_errors=False):
+    """Scale columns x factor (errors too with with_errors), as rescale_dat_files.py."""
+    out = h.copy()
+    for v_idx, e_idx in datfile.value_error_pairs(h.names):
+        out.set(v_idx, h.values(v_idx) * factor)
+        if with_errors and e_idx is not None:
+            out.set(e_idx, h.values(e_idx) * factor)
+    return out
+
+
+def normalize(h, factor):
+    """Values and errors / factor; 'integral': the integral of tot_scale01."""
+    if factor == "integral":
+        i = datfile.index(h.names, "tot_scale01")
+        factor = float(np.sum(h.values(i) * (h.values(2) - h.values(0))))
+        if factor == 0:
+            raise ValueError("integral of tot_scale01 is zero")
+    return rescale(h, 1.0 / factor, with_errors=True)
+
+
+def add(hists, with_errors=False):
+    """Sum of the scale columns, as sum_dat_files.py (errors of the first one, or in quadrature)."""
+    first = hists[0]
+    for h in hists[1:]:
+        if h.names != first.names or h.tokens.shape != first.tokens.shape:
+            raise ValueError("column headers or number of bins differ")
+    out = first.copy()
+    for v_idx, e_idx in datfile.value_error_pairs(first.names):
+        out.set(v_idx, np.sum([h.values(v_idx) for h in hists], axis=0))
+        if with_errors and e_idx is not None:
+            out.set(e_idx, np.sqrt(np.sum([h.values(e_idx) ** 2 for h in hists], axis=0)))
+    return out
+
+
+def apply_steps(h, steps, filename):
+    for op, arg, options in steps:
+        if not fnmatch.fnmatch(filename, options.get("files", "*")):
+            continue
+        if op == "rebin":
+            h = rebin(h, arg)
+        elif op == "rescale":
+            h = rescale(h, arg, options.get("errors", "no") == "yes")
+        else:
+            h = normalize(h, arg)
+    return h
+
+
+# === CONFIGURATION ===
+def parse_step(line):
+    """'rebin [0, 4, 8] files=*costh*' -> ('rebin', [0, 4, 8], {'files': '*costh*'})"""
+    words = line.split()
+    op, rest = words[0], words[1:]
+    options = {}
+    while rest and "=" in rest[-1] and not rest[-1].startswith("["):
+        key, value = rest.pop().split("=", 1)
+        options[key] = value
+    text = " ".join(rest)
+    if op == "rebin":
+        arg = ast.literal_eval(text)
+        if not isinstance(arg, list) or len(arg) < 2:
+            raise ValueError(f"rebin needs a list of at least 2 cutpoints: {text}")
+    elif op == "rescale":
+        arg = number(text)
+    elif op == "normalize":
+        arg = "integral" if text == "integral" else number(text)
+    else:
+        raise ValueError(f"unknown step '{op}' (rebin, rescale, normalize)")
+    return op, arg, options
+
+
+def read_config(path):
+    """{section name: spec} with the {E} sections expanded and paths made absolute."""
+    cp = configparser.ConfigParser(interpolation=None)
+    cp.optionxform = str
+    if not cp.read(path):
+        sys.exit(f"Cannot read {path}")
+    settings = cp["Settings"] if cp.has_section("Settings") else {}
+    base = os.path.join(os.path.dirname(os.path.abspath(path)), settings.get("base", "."))
+    sections = {}
+    for template in cp.sections():
+        if template == "Settings":
+            continue
+        raw = dict(cp[template])
+        energies = raw.pop("energies", settings.get("energies", "")).split() if "{E}" in template else [""]
+        for e in energies:
+            spec = {k: v.replace("{E}", e) for k, v in raw.items()}
+            name = template.replace("{E}", e)
+            try:
+                sections[name] = parse_section(name, spec, base)
+            except (ValueError, SyntaxError) as err:
+                sys.exit(f"{path} [{name}]: {err}")
+    for name, sec in sections.items():
+        for dep in sec["deps"]:
+            if dep not in sections:
+                sys.exit(f"{path} [{name}]: unknown section {dep}")
+    return sections
+
+
+def parse_section(name, spec, base):
+    sources = [k for k in ("input", "from", "sum") if k in spec]
+    if len(sources) != 1:
+        raise ValueError("needs exactly one of input, from, sum")
+    sec = {"name": name, "source": sources[0], "deps": [], "input": None,
+           "pattern": spec.get("pattern", "*.dat"),
+           "with_errors": spec.get("with_errors", "no") == "yes",
+           "output": os.path.normpath(os.path.join(base, spec["output"])) if spec.get("output") else None,
+           "steps": [parse_step(line) for line in spec.get("steps", "").splitlines() if line.strip()],
+           "text": json.dumps(sorted(spec.items()))}
+    if sec["source"] == "input":
+        sec["input"] = os.path.normpath(os.path.join(base, spec["input"]))
+    else:
+        sec["deps"] = spec[sec["source"]].split()
+    return sec
+
+
+def topological(sections, names):
+    """names and their dependencies, dependencies first."""
+    order, state = [], {}
+
+    def visit(name):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "open":
+            sys.exit(f"Circular sections: {name}")
+        state[name] = "open"
+        for dep in sections[name]["deps"]:
+            visit(dep)
+        state[name] = "done"
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def section_files(sections):
+    """{section: set of file names} (a sum only has the files present in all its sections)."""
+    files = {}
+    for name in topological(sections, sections):
+        sec = sections[name]
+        if sec["source"] == "input":
+            found = {os.path.basename(p) for p in glob.glob(os.path.join(sec["input"], sec["pattern"]))}
+        else:
+            dep_files = [files[d] for d in sec["deps"]]
+            found = set.intersection(*dep_files) if dep_files else set()
+            for missing in sorted(set.union(*dep_files) - found) if sec["source"] == "sum" else []:
+                print(f"❌ [{name}] Skipping {missing} — missing in one of the sections")
+            found = {f for f in found if fnmatch.fnmatch(f, sec["pattern"])}
+        files[name] = found
+    return files
+
+
+def file_key(sections, name, filename, memo):
+    """Hash of everything an output depends on: section texts and input file size/mtime."""
+    if (name, filename) not in memo:
+        sec = sections[name]
+        h = hashlib.sha256(sec["text"].encode())
+        if sec["input"]:
+            st = os.stat(os.path.join(sec["input"], filename))
+            h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+        for dep in sec["deps"]:
+            h.update(file_key(sections, dep, filename, memo).encode())
+        memo[(name, filename)] = h.hexdigest()
+    return memo[(name, filename)]
+
+
+def read_manifest(folder):
+    try:
+        with open(os.path.join(folder, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# === WORKER ===
+def run_job(job):
+    """Compute the sections of one file name and write the stale outputs; (filename, written, error)."""
+    sections, order, filename, outputs = job
+    hists = {}
+    try:
+        for name in order:
+            sec = sections[name]
+            if sec["source"] == "input":
+                h = Hist.read(os.path.join(sec["input"], filename))
+            elif sec["source"] == "from":
+                h = hists[sec["deps"][0]]
+            else:
+                h = add([hists[d] for d in sec["deps"]], sec["with_errors"])
+            hists[name] = apply_steps(h, sec["steps"], filename)
+        for name, key in outputs:
+            hists[name].write(os.path.join(sections[name]["output"], filename))
+    except (OSError, KeyError, ValueError) as e:
+        return filename, [], str(e)
+    return filename, outputs, None
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebin, rescale, sum and normalize NNLOJET results in memory (postprocess.ini)")
+    parser.add_argument('config', nargs='?', default="postprocess.ini", help="Configuration file (default postprocess.ini)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    parser.add_argument('--force', action='store_true', help="Rewrite every output, changed inputs or not")
+    parser.add_argument('--dry-run', action='store_true', help="Only print the outputs that would be written")
+    args = parser.parse_args(argv)
+
+    sections = read_config(args.config)
+    files = section_files(sections)
+    outputs = [name for name in sections if sections[name]["output"]]
+    manifests = {name: read_manifest(sections[name]["output"]) for name in outputs}
+
+    # One job per file name and group of connected sections (e.g. one energy)
+    group = {name: name for name in sections}
+
+    def root(name):
+        while group[name] != name:
+            name = group[name]
+        return name
+
+    for name, sec in sections.items():
+        for dep in sec["deps"]:
+            group[root(dep)] = root(name)
+
+    stale, up_to_date, memo = {}, 0, {}
+    for name in outputs:
+        for filename in sorted(files[name]):
+            key = file_key(sections, name, filename, memo)
+            target = os.path.join(sections[name]["output"], filename)
+            if not args.force and manifests[name].get(filename) == key and os.path.isfile(target):
+                up_to_date += 1
+                continue
+            stale.setdefault((root(name), filename), []).append((name, key))
+
+    print(f"{len(stale)} job(s) to run, {up_to_date} output(s) up to date")
+    if args.dry_run:
+        for (_, filename), outs in sorted(stale.items()):
+            for name, _ in outs:
+                print(f"  {os.path.join(sections[name]['output'], filename)}")
+        return
+    if not stale:
+        return
+
+    for name in outputs:
+        os.makedirs(sections[name]["output"], exist_ok=True)
+    jobs = []
+    for (_, filename), outs in sorted(stale.items()):
+        order = topological(sections, [name for name, _ in outs])
+        jobs.append(({n: sections[n] for n in order}, order, filename, outs))
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(run_job, jobs, chunksize=max(1, len(jobs) // (4 * args.jobs))))
+    else:
+        results = [run_job(job) for job in jobs]
+
+    written = 0
+    for filename, outs, error in results:
+        if error:
+            print(f"❌ Skipping {filename} — {error}")
+        for name, key in outs:
+            manifests[name][filename] = key
+            written += 1
+    for name in outputs:
+        path = os.path.join(sections[name]["output"], MANIFEST)
+        with open(path + ".tmp", "w") as f:
+            json.dump(manifests[name], f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+    print(f"[✓] Wrote {written} file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Per-phase timing of the plotting and post-processing tools.
+
+The tools (makeplot6.py, rescale_dat_files.py, sum_dat_files.py,
+rebinning_selected_obs.py) take --profile LOG: every processed item (plot or
+file) appends one JSON line to LOG with its phase timings, e.g.
+
+  {"tool": "makeplot6", "item": "figures/hgg/mH_all.pdf", "total": 3.1,
+   "phases": {"config": 0.001, "load": 0.004, "compute": 0.001, "draw": 0.2, "save": 2.8, ...}}
+
+The phases do not overlap: the time of a wrapped call (layout, text) or of a
+phase() block is taken out of the lap() it runs in, so the phases of an item
+add up to its total. With --profile-cprofile DIR each item also runs under cProfile (DIR/<tool>.<item>.prof).
+Several processes can append to the same LOG (one line per write), so a whole
+'make' run ends up in one file. Aggregate it with
+
+  python3 profiling.py LOG [--json report.json] [--csv report.csv] [--keep 5]
+
+which prints the time per tool and phase and the slowest items, and deletes
+the cProfile dumps of all but the --keep slowest items per tool.
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import socket
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Profiler:
+    """Phase timings per item; does nothing without a log file."""
+
+    def __init__(self, tool, log=None, cprofile_dir=None):
+        self.tool = tool
+        self.log = log
+        self.cprofile_dir = cprofile_dir if log else None
+        self.phases = None
+        self.last = None
+        self.nested = 0.0   # time of phase()/wrap() since the last lap, not part of it
+        self.stack = []     # time of the calls nested in each running phase()/wrap()
+        if self.cprofile_dir:
+            os.makedirs(self.cprofile_dir, exist_ok=True)
+
+    @contextmanager
+    def item(self, name):
+        if not self.log:
+            yield
+            return
+        self.phases = defaultdict(float)
+        prof = None
+        if self.cprofile_dir:
+            import cProfile
+            prof = cProfile.Profile()
+            prof.enable()
+        start = time.time()
+        self.nested = 0.0
+        t0 = self.last = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - t0
+            record = {"tool": self.tool, "item": name, "host": socket.gethostname(), "pid": os.getpid(),
+                      "start": start, "total": total, "phases": dict(self.phases)}
+            if prof is not None:
+                prof.disable()
+                path = os.path.join(self.cprofile_dir, f"{self.tool}.{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}.prof")
+                prof.dump_stats(path)
+                record["cprofile"] = path
+            self.phases = None
+            # One write per record: concurrent processes can share the log
+            with open(self.log, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+    @contextmanager
+    def phase(self, name):
+        if self.phases is None:
+            yield
+            return
+        self.stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._exclusive(name, time.perf_counter() - t0)
+
+    def _exclusive(self, name, elapsed):
+        """Close the innermost phase()/wrap(): its own time to name, all of it out of the enclosing one."""
+        children = self.stack.pop()
+        self.add(name, elapsed - children)
+        if self.stack:
+            self.stack[-1] += elapsed
+        else:
+            self.nested += elapsed
+
+    def lap(self, name):
+        """Time since the previous lap (or the start of the item) goes to phase name, less the nested phases."""
+        if self.phases is not None:
+            now = time.perf_counter()
+            self.phases[name] += now - self.last - self.nested
+            self.last = now
+            self.nested = 0.0
+
+    def add(self, name, seconds):
+        """Time measured elsewhere (e.g. by a wrapped library call)."""
+        if self.phases is not None:
+            self.phases[name] += seconds
+
+    def wrap(self, func, name):
+        """func, with its run time moved to phase name (out of the enclosing lap or phase)."""
+        def timed(*args, **kwargs):
+            if self.phases is None:
+                return func(*args, **kwargs)
+            self.stack.append(0.0)
+            t0 = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._exclusive(name, time.perf_counter() - t0)
+        return timed
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', metavar="LOG", help="Append per-phase timings of every item to this JSONL file (see profiling.py)")
+    parser.add_argument('--profile-cprofile', metavar="DIR", help="With --profile: also save a cProfile dump per item in DIR")
+
+
+# === REPORT ===
+def read_log(path):
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue   # line cut by an interrupted process
+    return records
+
+
+def aggregate(records):
+    tools = defaultdict(lambda: {"items": 0, "total": 0.0, "phases": defaultdict(lambda: [0.0, 0.0])})
+    for r in records:
+        t = tools[r["tool"]]
+        t["items"] += 1
+        t["total"] += r["total"]
+        for phase, seconds in r["phases"].items():
+            t["phases"][phase][0] += seconds
+            t["phases"][phase][1] = max(t["phases"][phase][1], seconds)
+    report = {}
+    for tool, t in tools.items():
+        report[tool] = {
+            "items": t["items"], "total": t["total"],
+            "phases": {p: {"total": s, "mean": s / t["items"], "max": m, "share": s / t["total"] if t["total"] else 0.0}
+                       for p, (s, m) in sorted(t["phases"].items(), key=lambda kv: -kv[1][0])},
+        }
+    return report
+
+
+def prune_cprofile(records, keep):
+    """Keep the cProfile dumps of the keep slowest items per tool only."""
+    by_tool = defaultdict(list)
+    for r in records:
+        if r.get("cprofile"):
+            by_tool[r["tool"]].append(r)
+    removed = 0
+    for rs in by_tool.values():
+        rs.sort(key=lambda r: -r["total"])
+        for r in rs[keep:]:
+            if os.path.isfile(r["cprofile"]):
+                os.remove(r["cprofile"])
+                removed += 1
+            r["cprofile"] = None
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate the --profile logs of the plotting and post-processing tools")
+    parser.add_argument('log', help="JSONL log written with --profile")
+    parser.add_argument('--json', help="Write the aggregated report to this JSON file")
+    parser.add_argument('--csv', help="Write one row per item and phase to this CSV file")
+    parser.add_argument('--top', type=int, default=10, help="Slowest items to print per tool (default 10)")
+    parser.add_argument('--keep', type=int, default=5, help="cProfile dumps kept per tool, slowest items first (default 5)")
+    args = parser.parse_args(argv)
+
+    records = read_log(args.log)
+    if not records:
+        sys.exit(f"No records in {args.log}")
+    report = aggregate(records)
+    removed = prune_cprofile(records, args.keep)
+
+    for tool, t in sorted(report.items()):
+        print(f"== {tool}: {t['items']} item(s), {t['total']:.2f} s")
+        print(f"   {'phase':<12} {'total [s]':>10} {'mean [s]':>10} {'max [s]':>10} {'share':>7}")
+        for phase, p in t["phases"].items():
+            print(f"   {phase:<12} {p['total']:>10.3f} {p['mean']:>10.3f} {p['max']:>10.3f} {100 * p['share']:>6.1f}%")
+        slowest = sorted((r for r in records if r["tool"] == tool), key=lambda r: -r["total"])[:args.top]
+        print("   slowest:")
+        for r in slowest:
+            top_phase = max(r["phases"].items(), key=lambda kv: kv[1])[0] if r["phases"] else "-"
+            prof = f"  [{r['cprofile']}]" if r.get("cprofile") else ""
+            print(f"   {r['total']:>8.3f} s  {r['item']}  (mostly {top_phase}){prof}")
+        print()
+    if removed:
+        print(f"Removed {removed} cProfile dump(s) outside the {args.keep} slowest per tool")
+
+    if args.json:
+        slowest = {tool: [r for r in sorted(records, key=lambda r: -r["total"]) if r["tool"] == tool][:args.top]
+                   for tool in report}
+        with open(args.json, "w") as f:
+            json.dump({"log": args.log, "tools": report, "slowest": slowest}, f, indent=1)
+        print(f"Report written to: {args.json}")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["tool", "item", "phase", "seconds"])
+            for r in records:
+                writer.writerow([r["tool"], r["item"], "total", f"{r['total']:.6f}"])
+                for phase, seconds in r["phases"].items():
+                    writer.writerow([r["tool"], r["item"], phase, f"{seconds:.6f}"])
+        print(f"CSV written to: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,22 @@ import os, glob, math, shutil
 import argparse
 import ast
 
+import datfile
+import profiling
+
 # === PARSER ===
 parser = argparse.ArgumentParser(description="Rebinning script for NNLOJET output distributions")
 parser.add_argument('--input', required=True, help="Input filename")
 parser.add_argument('--output', required=True, help="Output filename")
 parser.add_argument('--rebinning', type=ast.literal_eval, required=True, help="Rebinning: sorted cutpoints; indices are 0-based data-line indices")
 parser.add_argument('--pattern', required=True, help="File pattern for rebinning")
-args = parser.parse_args()
+profiling.add_arguments(parser)
 
 #input_dir   = "hbb15nnlo/combined.temp/Final"
 #output_dir  = "hbb15nnlo/combined/Final"
-input_dir = args.input
-output_dir = args.output
 
 #file_pattern = "*costh_j12*"
 #file_pattern = "*min_costh*"
-file_pattern = args.pattern 
 
 # Sorted cutpoints; indices are 0-based data-line indices
 
@@ -31,16 +31,15 @@ file_pattern = args.pattern
 
 #rebinning for min_costh
 #rebinning = list(range(38, 90, 4))
-rebinning = args.rebinning 
 
 # Which value/error columns to aggregate (0-based)
 # Each tuple is (value_idx, error_idx). If a column has no error, set error_idx=None.
-VALUE_SCHEMA = [(3,4), (5,6), (7,8), (9,10)]  # e.g. tot_scale01,02,03,04 with their errors
+# None: every <prefix>_scaleNN column of the file's '#labels:' header with its _Err
+# (tot_scale01..04 = [(3,4), (5,6), (7,8), (9,10)] for files without header)
+VALUE_SCHEMA = None
 
 # Formatting used for numeric outputs
-def _fmt(x): return f"{x:.11E}"
-
-os.makedirs(output_dir, exist_ok=True)
+_fmt = datfile.fmt
 
 # ------------------------------------------------------------
 #                MODULAR AGGREGATION STRATEGY
@@ -149,11 +148,14 @@ def build_segments(cuts):
     segs.append((cuts[-2], cuts[-1], True))       # last right-closed
     return segs
 
-def rebinning_file(input_path, output_path, cuts):
+def rebinning_file(input_path, output_path, cuts, profiler=None):
+    profiler = profiler or profiling.Profiler("rebin")
     segments = build_segments(cuts)
 
     with open(input_path, "r") as fin:
         lines = fin.readlines()
+    profiler.lap("load")
+    schema = VALUE_SCHEMA or datfile.value_error_pairs(datfile.file_columns(lines))
 
     output_lines = []
     data_index = 0  # counts only non-comment, non-empty data lines
@@ -198,7 +200,7 @@ def rebinning_file(input_path, output_path, cuts):
 
             if end_here:
                 # collapse and flush a single line
-                agg_line = aggregate_segment_to_line(seg_buffer, VALUE_SCHEMA)
+                agg_line = aggregate_segment_to_line(seg_buffer, schema)
                 output_lines.append(agg_line)
                 seg_buffer = []
                 # advance segment
@@ -216,34 +218,50 @@ def rebinning_file(input_path, output_path, cuts):
 
     # If file ended mid-segment, flush what we have
     if seg_buffer:
-        agg_line = aggregate_segment_to_line(seg_buffer, VALUE_SCHEMA)
+        agg_line = aggregate_segment_to_line(seg_buffer, schema)
         output_lines.append(agg_line)
+    profiler.lap("compute")
 
     with open(output_path, "w") as fout:
         fout.writelines(output_lines)
+    profiler.lap("save")
 
     print(f"[✓] Wrote: {output_path} | data lines processed: {data_index} | segments: {segments}")
 
 # === MAIN ===
-pattern = os.path.join(input_dir, file_pattern)
-files = glob.glob(pattern)
-print(f"Found {len(files)} file(s) matching '{file_pattern}' in {input_dir}")
-
-for input_file in files:
-    filename = os.path.basename(input_file)
-    output_file = os.path.join(output_dir, filename)
-    rebinning_file(input_file, output_file, rebinning)
-
-# Copy untouched files to the new folder
-pattern = os.path.join(input_dir, file_pattern)
-files = glob.glob(pattern)
-# Copy untouched files to the new folder (only if not already there)
-all_files = glob.glob(os.path.join(input_dir, "*"))
-for f in all_files:
-    if f not in files:  # not processed by rebinning
-        target = os.path.join(output_dir, os.path.basename(f))
-        if not os.path.exists(target):
-            shutil.copy(f, target)
-            print(f"[→] Copied unchanged: {os.path.basename(f)}")
-        else:
-            print(f"[skip] Already exists in output: {os.path.basename(f)}")
+def main(argv=None):
+    args = parser.parse_args(argv)
+    input_dir = args.input
+    output_dir = args.output
+    file_pattern = args.pattern
+    rebinning = args.rebinning
+    os.makedirs(output_dir, exist_ok=True)
+
+    profiler = profiling.Profiler("rebin", args.profile, args.profile_cprofile)
+    pattern = os.path.join(input_dir, file_pattern)
+    files = glob.glob(pattern)
+    print(f"Found {len(files)} file(s) matching '{file_pattern}' in {input_dir}")
+
+    for input_file in files:
+        filename = os.path.basename(input_file)
+        output_file = os.path.join(output_dir, filename)
+        with profiler.item(input_file):
+            rebinning_file(input_file, output_file, rebinning, profiler)
+
+    # Copy untouched files to the new folder
+    pattern = os.path.join(input_dir, file_pattern)
+    files = glob.glob(pattern)
+    # Copy untouched files to the new folder (only if not already there)
+    all_files = glob.glob(os.path.join(input_dir, "*"))
+    for f in all_files:
+        if f not in files:  # not processed by rebinning
+            target = os.path.join(output_dir, os.path.basename(f))
+            if not os.path.exists(target):
+                shutil.copy(f, target)
+                print(f"[→] Copied unchanged: {os.path.basename(f)}")
+            else:
+                print(f"[skip] Already exists in output: {os.path.basename(f)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,10 @@
 
 import os
 import glob
+import argparse
+
+import datfile
+import profiling
 
 # === USER SETTINGS ===
 input_dir = "hbb14nnlo/combined/Final"
@@ -12,41 +16,65 @@ mb = 4.20
 mc = 1.29
 rescale_factor = mc**2/mb**2                    # <-- Change only in the Yukawa factor
 
-# === Ensure output directory exists ===
-os.makedirs(output_dir, exist_ok=True)
+# === PARSER === (defaults = user settings above)
+parser = argparse.ArgumentParser(description="Rescale the scale columns (tot and channels) of NNLOJET .dat files by a constant factor")
+parser.add_argument('--input', default=input_dir, help=f"Input folder (default {input_dir})")
+parser.add_argument('--output', default=output_dir, help=f"Output folder (default {output_dir})")
+parser.add_argument('--pattern', default=file_pattern, help=f"File pattern (default {file_pattern})")
+parser.add_argument('--factor', type=float, default=rescale_factor, help=f"Rescaling factor (default (mc/mb)^2 = {rescale_factor:.6g})")
+parser.add_argument('--with-errors', action='store_true', help="Rescale the _Err columns too (default: values only)")
+profiling.add_arguments(parser)
 
 # === FUNCTION TO PROCESS FILE ===
-def rescale_file(input_path, output_path, factor):
+def rescale_file(input_path, output_path, factor, profiler=None, with_errors=False):
+    profiler = profiler or profiling.Profiler("rescale")
     with open(input_path, 'r') as fin:
         lines = fin.readlines()
+    profiler.lap("load")
 
-    output_lines = []
-    for line in lines:
-        if line.strip().startswith("#") or line.strip() == "":
-            output_lines.append(line)
-            continue
+    # Every <prefix>_scaleNN column of the header (tot and channels), other columns untouched
+    names = datfile.file_columns(lines)
+    indices = []
+    for val_idx, err_idx in datfile.value_error_pairs(names):
+        indices.append(val_idx)
+        if with_errors and err_idx is not None:
+            indices.append(err_idx)
+    rows = dict(datfile.data_rows(lines, names, input_path))
 
-        tokens = line.strip().split()
-        if len(tokens) < 11:
+    output_lines = []
+    for lineno, line in enumerate(lines, 1):
+        tokens = rows.get(lineno)
+        if tokens is None:
             output_lines.append(line)
             continue
 
-        # Rescale only the tot_scale0X columns: positions 3,5,7,9 (0-based)
-        for i in [3, 5, 7, 9]:
-            tokens[i] = f"{float(tokens[i]) * factor:.11E}"
+        for i in indices:
+            tokens[i] = datfile.fmt(float(tokens[i]) * factor)
 
         output_lines.append(" ".join(tokens) + "\n")
+    profiler.lap("compute")
 
     with open(output_path, 'w') as fout:
         fout.writelines(output_lines)
+    profiler.lap("save")
     print(f"[✓] Wrote: {output_path}")
 
 # === MAIN ===
-pattern = os.path.join(input_dir, file_pattern)
-files = glob.glob(pattern)
-print(f"Found {len(files)} file(s) matching '{file_pattern}' in {input_dir}")
-
-for input_file in files:
-    filename = os.path.basename(input_file)
-    output_file = os.path.join(output_dir, filename)
-    rescale_file(input_file, output_file, rescale_factor)
+def main(argv=None):
+    args = parser.parse_args(argv)
+    os.makedirs(args.output, exist_ok=True)
+    profiler = profiling.Profiler("rescale", args.profile, args.profile_cprofile)
+
+    pattern = os.path.join(args.input, args.pattern)
+    files = glob.glob(pattern)
+    print(f"Found {len(files)} file(s) matching '{args.pattern}' in {args.input}")
+
+    for input_file in files:
+        filename = os.path.basename(input_file)
+        output_file = os.path.join(args.output, filename)
+        with profiler.item(input_file):
+            rescale_file(input_file, output_file, args.factor, profiler, args.with_errors)
+
+
+if __name__ == "__main__":
+    main()
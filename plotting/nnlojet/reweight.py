@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Coupling and scale variations from the channel breakdown, without new runs.
+
+  python3 reweight.py --input hbb14nnlo/combined/Final --output reweighted --variations reweight.ini
+
+The input files must carry the channel breakdown (<channel>_scaleNN columns:
+combine without the 'columns' restriction of combine.ini). Each file is
+loaded once as an array X[channel, scale, bin] and every variation of the ini
+file is a weight per channel, so all of them are evaluated in one contraction:
+
+  tot[v, s, b] = sum_c W[v, c] X[c, s, b]      err^2 = sum_c W[v, c]^2 E[c, s, b]^2
+
+A variation section sets channel factors (bb = (1.29/4.20)**2, channels not
+listed keep 1) and optionally central = NN, which makes the computed scale
+NN the central one (swapped with scale01). Output: <output>/<variation>/<file>,
+same columns as the input, channel columns scaled too.
+"""
+
+import argparse
+import configparser
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import datfile
+from postprocess import Hist, number
+
+
+def read_variations(path):
+    """[(name, {channel: factor}, central scale or None)] of the ini file."""
+    cp = configparser.ConfigParser(interpolation=None)
+    cp.optionxform = str
+    if not cp.read(path):
+        sys.exit(f"Cannot read {path}")
+    variations = []
+    for name in cp.sections():
+        factors, central = {}, None
+        for key, value in cp[name].items():
+            try:
+                if key == "central":
+                    central = int(value)
+                else:
+                    factors[key] = number(value)
+            except (ValueError, SyntaxError):
+                sys.exit(f"{path} [{name}]: bad value {key} = {value}")
+        variations.append((name, factors, central))
+    if not variations:
+        sys.exit(f"{path}: no variation")
+    return variations
+
+
+def breakdown(names):
+    """(channels, scales, value index[c][s], error index[c][s] or None) of the <channel>_scaleNN columns."""
+    channels, scales, index, err = [], [], {}, {}
+    for v_idx, e_idx in datfile.value_error_pairs(names):
+        prefix, scale = names[v_idx].rsplit("_scale", 1)
+        if prefix == "tot":
+            scales.append(scale)
+            continue
+        if prefix not in channels:
+            channels.append(prefix)
+        index[prefix, scale], err[prefix, scale] = v_idx, e_idx
+    if not channels:
+        raise ValueError("no channel breakdown (<channel>_scaleNN columns)")
+    missing = [f"{c}_scale{s}" for c in channels for s in scales if (c, s) not in index]
+    if missing:
+        raise ValueError(f"missing columns {' '.join(missing)}")
+    return channels, scales, [[index[c, s] for s in scales] for c in channels], [[err[c, s] for s in scales] for c in channels]
+
+
+def weight_matrix(variations, channels):
+    """W[variation, channel]: the channel factors of every variation (1 if not set)."""
+    W = np.ones((len(variations), len(channels)))
+    for v, (_, factors, _) in enumerate(variations):
+        for channel, factor in factors.items():
+            if channel in channels:
+                W[v, channels.index(channel)] = factor
+    return W
+
+
+def reweight_file(job):
+    """Write every variation of one file; returns (file, warning or error)."""
+    path, output, variations = job
+    filename = os.path.basename(path)
+    try:
+        h = Hist.read(path)
+        channels, scales, val_idx, err_idx = breakdown(h.names)
+        unknown = sorted({c for _, factors, _ in variations for c in factors} - set(channels))
+        if unknown:
+            raise ValueError(f"unknown channel(s) {' '.join(unknown)} (file has {' '.join(channels)})")
+        X = np.stack([np.stack([h.values(i) for i in row]) for row in val_idx])        # (C, S, B)
+        E = np.stack([np.stack([h.values(i) if i is not None else np.zeros(len(h.tokens)) for i in row])
+                      for row in err_idx])
+        W = weight_matrix(variations, channels)                                        # (V, C)
+        tot = np.einsum("vc,csb->vsb", W, X)
+        tot_err = np.sqrt(np.einsum("vc,csb->vsb", W ** 2, E ** 2))
+        tot_idx = [datfile.index(h.names, f"tot_scale{s}") for s in scales]
+        tot_err_idx = [h.names.index(f"tot_scale{s}_Err") if f"tot_scale{s}_Err" in h.names else None for s in scales]
+
+        # The breakdown must add up to the total (else the variations are meaningless)
+        reference = np.stack([h.values(i) for i in tot_idx])
+        scale = np.maximum(np.abs(reference).max(), np.finfo(float).tiny)
+        deviation = float(np.abs(X.sum(axis=0) - reference).max() / scale)
+        warning = f"channels differ from tot by {deviation:.1E} (relative)" if deviation > 1e-6 else None
+
+        for v, (name, _, central) in enumerate(variations):
+            perm = list(range(len(scales)))
+            if central is not None:
+                c = scales.index(f"{central:02d}")
+                perm[0], perm[c] = perm[c], perm[0]
+            out = h.copy()
+            for s, p in enumerate(perm):
+                out.set(tot_idx[s], tot[v, p])
+                if tot_err_idx[s] is not None:
+                    out.set(tot_err_idx[s], tot_err[v, p])
+                for c in range(len(channels)):
+                    out.set(val_idx[c][s], W[v, c] * X[c, p])
+                    if err_idx[c][s] is not None:
+                        out.set(err_idx[c][s], abs(W[v, c]) * E[c, p])
+            folder = os.path.join(output, name)
+            os.makedirs(folder, exist_ok=True)
+            out.write(os.path.join(folder, filename))
+    except (OSError, KeyError, ValueError) as e:
+        return filename, f"❌ Skipping: {e}"
+    return filename, warning
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coupling and scale variations of NNLOJET results from the channel breakdown")
+    parser.add_argument('--input', required=True, help="Input folder (combined/Final with channel columns)")
+    parser.add_argument('--output', required=True, help="Output folder (one subfolder per variation)")
+    parser.add_argument('--variations', default="reweight.ini", help="Variations file (default reweight.ini)")
+    parser.add_argument('--pattern', default="*.dat", help="File pattern (default *.dat)")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    variations = read_variations(args.variations)
+    for name, _, central in variations:
+        if central is not None and not 1 <= central <= 99:
+            sys.exit(f"{args.variations} [{name}]: central must be a scale number, e.g. 2")
+    files = sorted(glob.glob(os.path.join(args.input, args.pattern)))
+    print(f"Found {len(files)} file(s) matching '{args.pattern}' in {args.input}, {len(variations)} variation(s)")
+
+    jobs = [(path, args.output, variations) for path in files]
+    if args.jobs > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(reweight_file, jobs, chunksize=max(1, len(jobs) // (4 * args.jobs))))
+    else:
+        results = [reweight_file(job) for job in jobs]
+
+    failed = [(f, m) for f, m in results if m and m.startswith("❌")]
+    for filename, message in failed:
+        print(f"{filename}: {message}")
+    warned = [(f, m) for f, m in results if m and not m.startswith("❌")]
+    if warned:
+        print(f"Warning: in {len(warned)} file(s) the channels do not add up to tot, e.g. {warned[0][0]}: {warned[0][1]}")
+    done = len(results) - len(failed)
+    print(f"[✓] Wrote {done} file(s) x {len(variations)} variation(s) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""One compressed archive per run instead of thousands of small .dat files.
+
+A run folder (hbb14nnlo, hgg15nnlo, ...) is packed into a single zip file
+(default <run>.zip next to it): every .dat file becomes one deflate-compressed
+member named by its path inside the run, e.g.
+
+  combined/Final/NNLO.mH_all.dat
+  nnlojet/RR/RR.mH_all.s1234.dat
+
+The zip central directory is the index: one observable (all orders, parts and
+seeds) is read without touching the other members, and new seeds are appended
+without rewriting the archive.
+
+  python3 runarchive.py pack ../hbb14nnlo                    # add new files (run again as seeds arrive)
+  python3 runarchive.py pack ../hbb14nnlo --update --remove  # also replace changed files, delete the packed ones
+  python3 runarchive.py list ../hbb14nnlo.zip --observable mH_all
+  python3 runarchive.py export ../hbb14nnlo.zip ../hbb14nnlo --prefix combined/Final
+
+export writes the members back as .dat files (what makeplot6.py reads).
+In Python: with runarchive.open_archive(path) as zf: runarchive.load(zf, member, names).
+"""
+
+import argparse
+import fnmatch
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+import zlib
+
+import datfile
+
+# <PART or ORDER>.<observable>[.s<seed>].dat
+MEMBER_RE = re.compile(r"(?:^|/)(?P<part>[^/.]+)\.(?P<observable>[^/]+?)(?:\.s(?P<seed>\d+))?\.dat$")
+
+
+def default_archive(run_dir):
+    return os.path.normpath(run_dir) + ".zip"
+
+
+def member_info(name):
+    """{'part', 'observable', 'seed'} of a member name (seed None for combined files), or None."""
+    m = MEMBER_RE.search(name)
+    if not m:
+        return None
+    info = m.groupdict()
+    info["seed"] = int(info["seed"]) if info["seed"] else None
+    return info
+
+
+def open_archive(path, mode="r"):
+    return zipfile.ZipFile(path, mode, compression=zipfile.ZIP_DEFLATED, allowZip64=True)
+
+
+def select(zf, observable=None, part=None, seed=None, prefix=None, pattern=None):
+    """Member names matching all the given filters (prefix: folder inside the run)."""
+    names = []
+    for name in zf.namelist():
+        if prefix and not name.startswith(prefix.rstrip("/") + "/"):
+            continue
+        if pattern and not fnmatch.fnmatch(os.path.basename(name), pattern):
+            continue
+        if observable or part or seed is not None:
+            info = member_info(name)
+            if info is None:
+                continue
+            if (observable and info["observable"] != observable) or (part and info["part"] != part) \
+                    or (seed is not None and info["seed"] != seed):
+                continue
+        names.append(name)
+    return names
+
+
+def read_lines(zf, name):
+    return zf.read(name).decode().splitlines(keepends=True)
+
+
+def load(zf, name, names=None):
+    """{column: array} of one member, like datfile.load on the exported file."""
+    return datfile.parse(read_lines(zf, name), names, f"{zf.filename}:{name}")
+
+
+def file_crc(path):
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def run_files(run_dir, pattern):
+    """{member name: path} of the files of a run matching pattern."""
+    files = {}
+    for root, _, names in os.walk(run_dir):
+        for name in names:
+            if fnmatch.fnmatch(name, pattern):
+                path = os.path.join(root, name)
+                files[os.path.relpath(path, run_dir).replace(os.sep, "/")] = path
+    return files
+
+
+def same_file(info, path):
+    return info.file_size == os.path.getsize(path) and info.CRC == file_crc(path)
+
+
+# === COMMANDS ===
+def pack(run_dir, archive, pattern="*.dat", update=False, remove=False):
+    """Append the files of run_dir not yet in archive; returns (added, replaced, unchanged, changed but not replaced)."""
+    files = run_files(run_dir, pattern)
+    existing = {}
+    if os.path.isfile(archive):
+        with open_archive(archive) as zf:
+            existing = {info.filename: info for info in zf.infolist()}
+
+    new = sorted(name for name in files if name not in existing)
+    changed = sorted(name for name in files if name in existing and not same_file(existing[name], files[name]))
+    unchanged = len(files) - len(new) - len(changed)
+
+    if changed and update:
+        # Members cannot be replaced in place: copy the others to a new archive
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(archive)), suffix=".zip")
+        os.close(fd)
+        skip = set(changed)
+        with open_archive(archive) as src, open_archive(tmp, "w") as dst:
+            for info in src.infolist():
+                if info.filename not in skip:
+                    with src.open(info) as fin, dst.open(info, "w") as fout:
+                        shutil.copyfileobj(fin, fout)
+        os.replace(tmp, archive)
+
+    to_write = sorted(new + changed) if update else new
+    if to_write:
+        with open_archive(archive, "a" if os.path.isfile(archive) else "w") as zf:
+            for name in to_write:
+                zf.write(files[name], name)
+
+    if remove:
+        # Only files whose archived copy is verified identical
+        with open_archive(archive) as zf:
+            infos = {info.filename: info for info in zf.infolist()}
+            for name, path in files.items():
+                if name in infos and same_file(infos[name], path):
+                    os.remove(path)
+    return len(new), len(changed) if update else 0, unchanged, 0 if update else len(changed)
+
+
+def export(archive, output_dir, names=None, force=False):
+    """Write members (all by default) as files under output_dir; returns the paths written."""
+    written = []
+    with open_archive(archive) as zf:
+        for name in names if names is not None else zf.namelist():
+            path = os.path.join(output_dir, *name.split("/"))
+            if not force and os.path.isfile(path) and same_file(zf.getinfo(name), path):
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with zf.open(name) as fin, open(path, "wb") as fout:
+                shutil.copyfileobj(fin, fout)
+            written.append(path)
+    return written
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack NNLOJET run folders into one indexed zip archive and read them back")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+
+    p = sub.add_parser("pack", help="Append the .dat files of a run folder to its archive")
+    p.add_argument('run_dir', help="Run folder, e.g. ../hbb14nnlo")
+    p.add_argument('--archive', help="Archive file (default <run_dir>.zip)")
+    p.add_argument('--pattern', default="*.dat", help="Files to pack (default *.dat)")
+    p.add_argument('--update', action='store_true', help="Replace members whose file changed (rewrites the archive)")
+    p.add_argument('--remove', action='store_true', help="Delete the packed files once their archived copy is verified")
+
+    for cmd, text in [("list", "List the members of an archive"), ("export", "Write members back as .dat files")]:
+        p = sub.add_parser(cmd, help=text)
+        p.add_argument('archive', help="Archive file")
+        if cmd == "export":
+            p.add_argument('output', help="Output folder (member paths are kept below it)")
+            p.add_argument('--force', action='store_true', help="Overwrite identical files too")
+        p.add_argument('--observable', help="Only this observable")
+        p.add_argument('--part', help="Only this order/part (LO, NLO, NNLO, RR, ...)")
+        p.add_argument('--seed', type=int, help="Only this seed")
+        p.add_argument('--prefix', help="Only members below this folder, e.g. combined/Final")
+        p.add_argument('--pattern', help="Only members whose file name matches, e.g. '*.mH_*.dat'")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        if not os.path.isdir(args.run_dir):
+            sys.exit(f"No such folder: {args.run_dir}")
+        archive = args.archive or default_archive(args.run_dir)
+        added, replaced, unchanged, kept = pack(args.run_dir, archive, args.pattern, args.update, args.remove)
+        print(f"{archive}: {added} added, {replaced} replaced, {unchanged} unchanged")
+        if kept:
+            print(f"Warning: {kept} file(s) changed since packing, archive kept the old copy (use --update)")
+        return
+
+    with open_archive(args.archive) as zf:
+        names = select(zf, args.observable, args.part, args.seed, args.prefix, args.pattern)
+        if args.command == "list":
+            for name in names:
+                info = zf.getinfo(name)
+                print(f"{info.file_size:>12} {info.compress_size:>12}  {name}")
+            print(f"{len(names)} member(s)")
+            return
+    written = export(args.archive, args.output, names, args.force)
+    print(f"Exported {len(written)} file(s) to {args.output} ({len(names) - len(written)} already up to date)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,11 @@
 
 import os
 import glob
+import math
+import argparse
+
+import datfile
+import profiling
 
 # === USER SETTINGS ===
 input_dir_1 = "hbb14nnlo/combined/Final/"
@@ -9,72 +14,90 @@ input_dir_2 = "hcc14nnlo/combined/Final/"
 input_dir_3 = "hgg14nnlo/combined/Final/"
 output_dir  = "tot14nnlo/combined/Final/"
 file_pattern = "*.dat"  # Match common file extensions
-tot_scale_indices = [3, 5, 7, 9]  # 0-based indices of tot_scale01..04
+# Summed columns: every <prefix>_scaleNN of the '#labels:' header (datfile.py)
 
-# === Ensure output directory exists ===
-os.makedirs(output_dir, exist_ok=True)
+# === PARSER === (defaults = user settings above)
+parser = argparse.ArgumentParser(description="Sum the scale columns (tot and channels) of the same NNLOJET .dat files over several folders")
+parser.add_argument('--input', nargs='+', default=[input_dir_1, input_dir_2, input_dir_3],
+                    help=f"Input folders (default {input_dir_1} {input_dir_2} {input_dir_3})")
+parser.add_argument('--output', default=output_dir, help=f"Output folder (default {output_dir})")
+parser.add_argument('--pattern', default=file_pattern, help=f"File pattern in the first input folder (default {file_pattern})")
+parser.add_argument('--with-errors', action='store_true', help="Add the _Err columns in quadrature (default: errors of the first folder)")
+profiling.add_arguments(parser)
 
 def read_file_lines(path):
     with open(path, 'r') as f:
         return f.readlines()
 
-def is_data_line(line):
-    return line.strip() and not line.strip().startswith("#")
-
-def parse_line_to_tokens(line):
-    return line.strip().split()
-
-def sum_scale_columns(tokens_list):
+def sum_scale_columns(tokens_list, pairs, with_errors=False):
     result = tokens_list[0][:]  # start with a copy of first
-    for i in tot_scale_indices:
-        summed = sum(float(tokens[i]) for tokens in tokens_list)
-        result[i] = f"{summed:.11E}"
+    for val_idx, err_idx in pairs:
+        summed = sum(float(tokens[val_idx]) for tokens in tokens_list)
+        result[val_idx] = datfile.fmt(summed)
+        if with_errors and err_idx is not None:
+            result[err_idx] = datfile.fmt(math.sqrt(sum(float(tokens[err_idx]) ** 2 for tokens in tokens_list)))
     return result
 
-def process_file(filename):
-    file1 = os.path.join(input_dir_1, filename)
-    file2 = os.path.join(input_dir_2, filename)
-    file3 = os.path.join(input_dir_3, filename)
+def process_file(filename, input_dirs, output_dir, profiler=None, with_errors=False):
+    profiler = profiler or profiling.Profiler("sum")
+    files = [os.path.join(d, filename) for d in input_dirs]
 
-    if not all(os.path.isfile(f) for f in [file1, file2, file3]):
+    if not all(os.path.isfile(f) for f in files):
         print(f"❌ Skipping {filename} — missing in one of the folders")
         return
 
-    lines1 = read_file_lines(file1)
-    lines2 = read_file_lines(file2)
-    lines3 = read_file_lines(file3)
+    lines_list = [read_file_lines(f) for f in files]
+    profiler.lap("load")
 
-    if len(lines1) != len(lines2) or len(lines1) != len(lines3):
+    if any(len(lines) != len(lines_list[0]) for lines in lines_list):
         print(f"❌ Skipping {filename} — line count mismatch")
         return
 
+    names_list = [datfile.file_columns(lines) for lines in lines_list]
+    if any(names != names_list[0] for names in names_list):
+        print(f"❌ Skipping {filename} — column headers differ")
+        return
+    names = names_list[0]
+    pairs = datfile.value_error_pairs(names)
+    rows_list = [dict(datfile.data_rows(lines, names, f)) for lines, f in zip(lines_list, files)]
+
     output_lines = []
-    for l1, l2, l3 in zip(lines1, lines2, lines3):
-        if not is_data_line(l1):
-            output_lines.append(l1)
+    for lineno, line in enumerate(lines_list[0], 1):
+        if lineno not in rows_list[0]:
+            output_lines.append(line)
             continue
 
-        tokens1 = parse_line_to_tokens(l1)
-        tokens2 = parse_line_to_tokens(l2)
-        tokens3 = parse_line_to_tokens(l3)
+        tokens_list = [rows.get(lineno) for rows in rows_list]
 
-        if len(tokens1) != len(tokens2) or len(tokens1) != len(tokens3):
+        if any(tokens is None or len(tokens) != len(tokens_list[0]) for tokens in tokens_list):
             print(f"❌ Skipping line in {filename} — token count mismatch")
             return
 
-        summed_tokens = sum_scale_columns([tokens1, tokens2, tokens3])
+        summed_tokens = sum_scale_columns(tokens_list, pairs, with_errors)
         output_lines.append(" ".join(summed_tokens) + "\n")
+    profiler.lap("compute")
 
     output_path = os.path.join(output_dir, filename)
     with open(output_path, 'w') as f:
         f.writelines(output_lines)
+    profiler.lap("save")
     print(f"[✓] Wrote: {output_path}")
 
 # === MAIN LOOP ===
-input_files = glob.glob(os.path.join(input_dir_1, file_pattern))
-file_names = [os.path.basename(f) for f in input_files]
+def main(argv=None):
+    args = parser.parse_args(argv)
+    os.makedirs(args.output, exist_ok=True)
+    profiler = profiling.Profiler("sum", args.profile, args.profile_cprofile)
+
+    input_files = glob.glob(os.path.join(args.input[0], args.pattern))
+    file_names = [os.path.basename(f) for f in input_files]
+
+    print(f"Found {len(file_names)} file(s) in {args.input[0]} to process")
+
+    for fname in file_names:
+        with profiler.item(fname):
+            process_file(fname, args.input, args.output, profiler, args.with_errors)
 
-print(f"Found {len(file_names)} file(s) in {input_dir_1} to process")
 
-for fname in file_names:
-    process_file(fname)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Synthetic NNLOJET output trees, for testing and benchmarking the scripts.
+
+  python3 synthdata.py --output synth --observables 8 --bins 50 --channels bb gg --seeds 10
+
+writes, for every process folder:
+  <process>/combined/Final/<ORDER>.<obs>.dat        (LO, NLO, NNLO; what makeplot6.py reads)
+  <process>/nnlojet/<PART>/<PART>.<obs>.s<seed>.dat  (per-seed raw files, as merged by combine)
+
+The files follow the NNLOJET layout: a '#labels:' header naming the columns
+(lower center upper, tot_scaleNN/tot_scaleNN_Err for every scale, then the
+channel breakdown <channel>_scaleNN/_Err when --channels is given) and
+whitespace separated values.
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+PARTS = {"LO": ["LO"], "NLO": ["LO", "V", "R"], "NNLO": ["LO", "V", "R", "VV", "RV", "RR"]}
+
+
+def column_names(scales=7, channels=()):
+    names = ["lower", "center", "upper"]
+    for prefix in ["tot"] + list(channels):
+        for i in range(1, scales + 1):
+            names += [f"{prefix}_scale{i:02d}", f"{prefix}_scale{i:02d}_Err"]
+    return names
+
+
+def header(observable, names):
+    labels = " ".join(f"{name}[{i}]" for i, name in enumerate(names, 1))
+    return f"#name: {observable}\n#labels: {labels}\n#nx: 3\n"
+
+
+def histogram(rng, bins, scales, channels, norm=1.0, rel_err=0.01):
+    """Rows of a smooth synthetic distribution, with scale variations and channel breakdown."""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    center = 0.5 * (edges[:-1] + edges[1:])
+    shape = norm * (np.exp(-((center - 0.4) / 0.15) ** 2) + 0.05)
+    # Scale variations: +-10% band around the central scale
+    factors = np.concatenate([[1.0], rng.uniform(0.9, 1.1, scales - 1)])
+    fractions = rng.dirichlet(np.ones(len(channels))) if channels else []
+
+    # Channels are drawn first and tot is their sum (errors in quadrature), as in a real run
+    parts = []
+    for weight in list(fractions) or [1.0]:
+        block = []
+        for f in factors:
+            value = weight * f * shape * (1 + rel_err * rng.standard_normal(bins))
+            block += [value, np.abs(value) * rel_err]
+        parts.append(block)
+    tot = [sum(block[i] for block in parts) if i % 2 == 0 else np.sqrt(sum(block[i] ** 2 for block in parts))
+           for i in range(2 * scales)]
+
+    cols = [edges[:-1], center, edges[1:]] + tot
+    if channels:
+        for block in parts:
+            cols += block
+    return np.column_stack(cols)
+
+
+def write_dat(path, observable, names, rows):
+    with open(path, "w") as f:
+        f.write(header(observable, names))
+        np.savetxt(f, rows, fmt="%.11E")
+
+
+def generate(output, processes=("hbb14nnlo",), observables=4, bins=50, scales=7, channels=(), seeds=4, seed=1):
+    """Write a synthetic tree; returns the list of observable names."""
+    rng = np.random.default_rng(seed)
+    names = column_names(scales, channels)
+    obs_names = [f"obs{i:02d}" for i in range(observables)]
+    for process in processes:
+        final = os.path.join(output, process, "combined", "Final")
+        os.makedirs(final, exist_ok=True)
+        for obs in obs_names:
+            for order in PARTS:
+                norm = {"LO": 1.0, "NLO": 1.2, "NNLO": 1.25}[order]
+                write_dat(os.path.join(final, f"{order}.{obs}.dat"), obs, names,
+                          histogram(rng, bins, scales, channels, norm))
+            for part in PARTS["NNLO"]:
+                part_dir = os.path.join(output, process, "nnlojet", part)
+                os.makedirs(part_dir, exist_ok=True)
+                for s in range(1, seeds + 1):
+                    write_dat(os.path.join(part_dir, f"{part}.{obs}.s{s}.dat"), obs, names,
+                              histogram(rng, bins, scales, channels, 0.2, rel_err=0.05))
+    return obs_names
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic NNLOJET combined/Final and per-seed trees")
+    parser.add_argument('--output', default="synth", help="Output folder (default synth)")
+    parser.add_argument('--processes', nargs='+', default=["hbb14nnlo", "hgg14nnlo", "hcc14nnlo"], help="Process folders")
+    parser.add_argument('--observables', type=int, default=4, help="Number of observables (obs00, obs01, ...)")
+    parser.add_argument('--bins', type=int, default=50, help="Bins per histogram")
+    parser.add_argument('--scales', type=int, default=7, help="Scale variations (tot_scale01...)")
+    parser.add_argument('--channels', nargs='*', default=[], help="Channel breakdown columns (e.g. bb gg qq)")
+    parser.add_argument('--seeds', type=int, default=4, help="Per-seed raw files per part and observable")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed")
+    args = parser.parse_args(argv)
+
+    obs = generate(args.output, args.processes, args.observables, args.bins, args.scales, args.channels,
+                   args.seeds, args.seed)
+    n_files = len(args.processes) * len(obs) * (len(PARTS) + len(PARTS["NNLO"]) * args.seeds)
+    print(f"Wrote {n_files} files ({len(obs)} observables x {len(args.processes)} processes) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Integrated cross sections of every run and order, for the --normalize factors.
+
+  python3 xsec_table.py [--path ..] [--observable mH_all] [--makefile xsec.mk [--energy 15]]
+
+For each run folder <path>/<E>/<run>/combined/Final (e.g. 14/hbb14nnlo) and
+each order, the cross section is read from <ORDER>.cross.dat when combine
+wrote it, else integrated over the bins of <ORDER>.<observable>.dat:
+
+  xsec = sum_i tot_scale01_i x (upper_i - lower_i),  err = sqrt(sum_i (err_i x width_i)^2)
+
+together with xsec/mH (the E_j normalization, d sigma/d(E/mH)). Sums of runs
+(--sum, default hbbhgg<E>nnlo = hbb + hgg and tot<E>nnlo = hbb + hcc + hgg when
+there is no tot folder) are added per energy. The table is written to
+<path>/xsec_table.json; entries whose file did not change are not recomputed.
+
+makeplot6.py --normalize-xsec hgg15nnlo:LO hgg15nnlo:NLO hgg15nnlo:NNLO reads it
+(RUN:ORDER/mH for the /mH value, auto: run and order of each input file).
+
+--makefile FILE writes the values as a Makefile fragment (included by the
+Makefile): bbLO_15=..., tot2NNLO_over_mH_14=... for every energy, and the
+plain bbLO=... names of the *_OPTS for --energy (default: the highest one).
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+import datfile
+
+TABLE_NAME = "xsec_table.json"
+MH = 125.09
+DEFAULT_SUMS = ["hbbhgg{E}nnlo=hbb{E}nnlo+hgg{E}nnlo", "tot{E}nnlo=hbb{E}nnlo+hcc{E}nnlo+hgg{E}nnlo"]
+# Makefile names of the runs for --makefile (bbLO=..., tot2NNLO_over_mH=...)
+MAKEFILE_NAMES = {"hbb": "bb", "hcc": "cc", "hgg": "gg", "hbbhgg": "tot1", "tot": "tot2"}
+RUN_RE = re.compile(r"^([a-z]+)(\d+)nnlo$")
+
+
+def find_runs(path):
+    """{run name: combined/Final folder} one or two levels below path."""
+    runs = {}
+    for pattern in ("*/combined/Final", "*/*/combined/Final"):
+        for final in sorted(glob.glob(os.path.join(path, pattern))):
+            runs.setdefault(os.path.basename(os.path.dirname(os.path.dirname(final))), final)
+    return runs
+
+
+def stamp(path):
+    st = os.stat(path)
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def integrate(path):
+    """(xsec, err) of a .dat file: the value of a cross file, or the bin-width integral."""
+    names = datfile.columns(path)
+    if "lower" not in names or "upper" not in names:
+        d = datfile.load(path, ["tot_scale01", "tot_scale01_Err"])
+        return float(d["tot_scale01"][0]), float(d["tot_scale01_Err"][0])
+    d = datfile.load(path, ["lower", "upper", "tot_scale01", "tot_scale01_Err"])
+    width = d["upper"] - d["lower"]
+    return float(d["tot_scale01"] @ width), float(math.sqrt(np.sum((d["tot_scale01_Err"] * width) ** 2)))
+
+
+def run_entries(final, observable, mass, cached, base):
+    """{order: entry} of one run, reusing the cached entries of unchanged files."""
+    sources = {}
+    for path in glob.glob(os.path.join(final, f"*.{observable}.dat")) + glob.glob(os.path.join(final, "*.cross.dat")):
+        order = os.path.basename(path).split(".")[0]
+        if path.endswith(".cross.dat") or order not in sources:
+            sources[order] = path   # a cross file wins
+    entries = {}
+    for order, path in sorted(sources.items()):
+        rel, st = os.path.relpath(path, base), stamp(path)
+        old = cached.get(order)
+        if old and old.get("source") == rel and old.get("stamp") == st:
+            entries[order] = old
+            continue
+        xsec, err = integrate(path)
+        entries[order] = {"xsec": xsec, "err": err, "over_mH": xsec / mass, "source": rel, "stamp": st}
+    return entries
+
+
+def add_sums(runs, sums, mass):
+    """Runs made of other runs, per energy ({E}); existing run folders are kept."""
+    energies = sorted({m.group(2) for m in map(RUN_RE.match, runs) if m})
+    for spec in sums:
+        name_t, parts_t = spec.split("=", 1)
+        for e in energies:
+            name = name_t.replace("{E}", e)
+            parts = [p.replace("{E}", e) for p in parts_t.split("+")]
+            if name in runs or not all(p in runs for p in parts):
+                continue
+            orders = set.intersection(*(set(runs[p]) for p in parts))
+            runs[name] = {}
+            for order in sorted(orders):
+                xsec = sum(runs[p][order]["xsec"] for p in parts)
+                err = math.sqrt(sum(runs[p][order]["err"] ** 2 for p in parts))
+                runs[name][order] = {"xsec": xsec, "err": err, "over_mH": xsec / mass, "source": "sum " + "+".join(parts)}
+
+
+def makefile_lines(runs, energy):
+    """Variable assignments of the Makefile: NAME<ORDER>[_over_mH]_<E> for every energy, without _<E> for energy."""
+    by_energy = {}
+    for name in sorted(runs):
+        m = RUN_RE.match(name)
+        if m and m.group(1) in MAKEFILE_NAMES:
+            by_energy.setdefault(m.group(2), []).append((MAKEFILE_NAMES[m.group(1)], name))
+    lines = []
+    for e in sorted(by_energy, key=int, reverse=True):
+        suffixes = ["", f"_{e}"] if e == energy else [f"_{e}"]
+        for suffix in suffixes:
+            lines.append(f"# {', '.join(name for _, name in by_energy[e])}")
+            for short, name in by_energy[e]:
+                for order, entry in runs[name].items():
+                    lines.append(f"{short}{order}{suffix}={entry['xsec']!r}")
+                    lines.append(f"{short}{order}_over_mH{suffix}={entry['over_mH']!r}")
+    return lines
+
+
+def load_table(path):
+    """The table written by this script ({} if missing)."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# === MAIN ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Table of integrated cross sections (and /mH) of every run and order")
+    parser.add_argument('--path', default="..", help="Folder holding the runs, e.g. 14/hbb14nnlo (default .., as DATADIR)")
+    parser.add_argument('--observable', default="mH_all", help="Fully inclusive observable integrated when there is no <ORDER>.cross.dat (default mH_all)")
+    parser.add_argument('--mass', type=float, default=MH, help=f"Higgs mass of the /mH values (default {MH})")
+    parser.add_argument('--sum', nargs='*', default=DEFAULT_SUMS, help="Summed runs NAME=RUN+RUN ({E} = energy)")
+    parser.add_argument('--output', help=f"Table file (default <path>/{TABLE_NAME})")
+    parser.add_argument('--force', action='store_true', help="Recompute every entry")
+    parser.add_argument('--makefile', metavar="FILE", help="Also write the values as an includable Makefile fragment (make xsec: xsec.mk)")
+    parser.add_argument('--energy', help="Energy of the plain bbLO=... variables of --makefile (default: the highest one)")
+    args = parser.parse_args(argv)
+    output = args.output or os.path.join(args.path, TABLE_NAME)
+
+    old = load_table(output)
+    if args.force or old.get("observable") != args.observable or old.get("mass") != args.mass:
+        old = {}
+    runs = {}
+    for name, final in find_runs(args.path).items():
+        entries = run_entries(final, args.observable, args.mass, old.get("runs", {}).get(name, {}), args.path)
+        if entries:
+            runs[name] = entries
+    add_sums(runs, args.sum, args.mass)
+
+    table = {"observable": args.observable, "mass": args.mass, "runs": runs}
+    with open(output + ".tmp", "w") as f:
+        json.dump(table, f, indent=1, sort_keys=True)
+    os.replace(output + ".tmp", output)
+
+    print(f"{'run':<14} {'order':<9} {'xsec':>13} {'error':>10} {'xsec/mH':>13}  source")
+    for name in sorted(runs):
+        for order, e in runs[name].items():
+            print(f"{name:<14} {order:<9} {e['xsec']:13.6E} {e['err']:10.2E} {e['over_mH']:13.6E}  {e['source']}")
+    print(f"Table written to: {output}")
+
+    if args.makefile:
+        energies = sorted({m.group(2) for m in map(RUN_RE.match, runs) if m}, key=int)
+        energy = args.energy or (energies[-1] if energies else None)
+        with open(args.makefile + ".tmp", "w") as f:
+            f.write(f"# Written by xsec_table.py from {output}: rerun make xsec instead of editing\n")
+            f.write("\n".join(makefile_lines(runs, energy)) + "\n")
+        os.replace(args.makefile + ".tmp", args.makefile)
+        print(f"Makefile variables written to: {args.makefile} (plain names: energy {energy})")
+
+if __name__ == "__main__":
+    main()